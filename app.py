@@ -1,13 +1,46 @@
 # PendemixAI - COVID-19 Global Vaccination Tracker
 import streamlit as st
 import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-import plotly.express as px
-import plotly.graph_objects as go
+import time
 import warnings
+from functools import partial
+from pendemix import config
+from pendemix.downsample import downsample_frame, point_budget
+from pendemix.export import EXPORT_FORMATS, build_export, discard_exports, iter_export_chunks
+from pendemix.figcache import FigureCache, figure_nbytes
+from pendemix.forecast import BAND_LEVEL, forecast_frame, forecast_tensor, monte_carlo_forecast
+from pendemix.geo import build_map_data
+from pendemix.ingest import IngestStore
+from pendemix.lazy import LazyModule
+from pendemix.lineage import ArtifactRegistry
+from pendemix.profiling import SectionProfiler, new_rerun_id
+from pendemix.pyramid import LEVELS, fill_points
+from pendemix.query import make_backend
+from pendemix.refresh import DataRefresher, format_age
+from pendemix.regions import REGIONS, SUB_REGIONS, countries_in
+from pendemix.shared import AllocationMeter, freeze_frame
+from pendemix.storage import dataset_key, dataset_params, load_dataset
+from pendemix.summary import top_countries
+from pendemix.views import build_dataset_views
 warnings.filterwarnings('ignore')
 
+# Imported on the first chart built, not at every cold start
+px = LazyModule('plotly.express')
+
+rerun_started = time.perf_counter()
+
+# Measure what this rerun allocates (enabled with PENDEMIX_TRACK_ALLOCATIONS=1)
+allocation_meter = AllocationMeter().start() if config.TRACK_ALLOCATIONS else None
+
+# Wall time and allocations per dashboard section (PENDEMIX_PROFILE=1 or PENDEMIX_ADMIN=1)
+profiler = SectionProfiler(
+    enabled=config.PROFILE_SECTIONS,
+    log_path=config.PROFILE_LOG or None,
+    latest=st.session_state.setdefault('section_profile', {}),
+    context={'session': st.session_state.setdefault('profile_session', new_rerun_id())},
+    meter=allocation_meter
+)
+
 # Page configuration
 st.set_page_config(
     page_title="PendemixAI - COVID-19 Vaccination Tracker",
@@ -136,137 +169,188 @@ st.markdown("<h1 class='main-title'>🌍 PENDEMIXAI - COVID-19 GLOBAL VACCINATIO
 st.markdown("<p class='subtitle'>Advanced AI-powered analytics for global vaccination monitoring</p>", unsafe_allow_html=True)
 
 # Load data with ALL countries
-@st.cache_data
-def load_all_countries_data():
-    # List of ALL countries in the world (200+ countries)
-    all_countries = [
-        'AFGHANISTAN', 'ALBANIA', 'ALGERIA', 'ANDORRA', 'ANGOLA', 'ANTIGUA AND BARBUDA', 'ARGENTINA', 
-        'ARMENIA', 'AUSTRALIA', 'AUSTRIA', 'AZERBAIJAN', 'BAHAMAS', 'BAHRAIN', 'BANGLADESH', 'BARBADOS', 
-        'BELARUS', 'BELGIUM', 'BELIZE', 'BENIN', 'BHUTAN', 'BOLIVIA', 'BOSNIA AND HERZEGOVINA', 'BOTSWANA', 
-        'BRAZIL', 'BRUNEI', 'BULGARIA', 'BURKINA FASO', 'BURUNDI', 'CABO VERDE', 'CAMBODIA', 'CAMEROON', 
-        'CANADA', 'CENTRAL AFRICAN REPUBLIC', 'CHAD', 'CHILE', 'CHINA', 'COLOMBIA', 'COMOROS', 'CONGO', 
-        'COSTA RICA', 'CROATIA', 'CUBA', 'CYPRUS', 'CZECH REPUBLIC', 'DEMOCRATIC REPUBLIC OF THE CONGO', 
-        'DENMARK', 'DJIBOUTI', 'DOMINICA', 'DOMINICAN REPUBLIC', 'ECUADOR', 'EGYPT', 'EL SALVADOR', 
-        'EQUATORIAL GUINEA', 'ERITREA', 'ESTONIA', 'ESWATINI', 'ETHIOPIA', 'FIJI', 'FINLAND', 'FRANCE', 
-        'GABON', 'GAMBIA', 'GEORGIA', 'GERMANY', 'GHANA', 'GREECE', 'GRENADA', 'GUATEMALA', 'GUINEA', 
-        'GUINEA-BISSAU', 'GUYANA', 'HAITI', 'HONDURAS', 'HUNGARY', 'ICELAND', 'INDIA', 'INDONESIA', 
-        'IRAN', 'IRAQ', 'IRELAND', 'ISRAEL', 'ITALY', 'JAMAICA', 'JAPAN', 'JORDAN', 'KAZAKHSTAN', 
-        'KENYA', 'KIRIBATI', 'KUWAIT', 'KYRGYZSTAN', 'LAOS', 'LATVIA', 'LEBANON', 'LESOTHO', 'LIBERIA', 
-        'LIBYA', 'LIECHTENSTEIN', 'LITHUANIA', 'LUXEMBOURG', 'MADAGASCAR', 'MALAWI', 'MALAYSIA', 
-        'MALDIVES', 'MALI', 'MALTA', 'MARSHALL ISLANDS', 'MAURITANIA', 'MAURITIUS', 'MEXICO', 
-        'MICRONESIA', 'MOLDOVA', 'MONACO', 'MONGOLIA', 'MONTENEGRO', 'MOROCCO', 'MOZAMBIQUE', 'MYANMAR', 
-        'NAMIBIA', 'NAURU', 'NEPAL', 'NETHERLANDS', 'NEW ZEALAND', 'NICARAGUA', 'NIGER', 'NIGERIA', 
-        'NORTH KOREA', 'NORTH MACEDONIA', 'NORWAY', 'OMAN', 'PAKISTAN', 'PALAU', 'PALESTINE', 'PANAMA', 
-        'PAPUA NEW GUINEA', 'PARAGUAY', 'PERU', 'PHILIPPINES', 'POLAND', 'PORTUGAL', 'QATAR', 'ROMANIA', 
-        'RUSSIA', 'RWANDA', 'SAINT KITTS AND NEVIS', 'SAINT LUCIA', 'SAINT VINCENT AND THE GRENADINES', 
-        'SAMOA', 'SAN MARINO', 'SAO TOME AND PRINCIPE', 'SAUDI ARABIA', 'SENEGAL', 'SERBIA', 'SEYCHELLES', 
-        'SIERRA LEONE', 'SINGAPORE', 'SLOVAKIA', 'SLOVENIA', 'SOLOMON ISLANDS', 'SOMALIA', 'SOUTH AFRICA', 
-        'SOUTH KOREA', 'SOUTH SUDAN', 'SPAIN', 'SRI LANKA', 'SUDAN', 'SURINAME', 'SWEDEN', 'SWITZERLAND', 
-        'SYRIA', 'TAIWAN', 'TAJIKISTAN', 'TANZANIA', 'THAILAND', 'TIMOR-LESTE', 'TOGO', 'TONGA', 
-        'TRINIDAD AND TOBAGO', 'TUNISIA', 'TURKEY', 'TURKMENISTAN', 'TUVALU', 'UGANDA', 'UKRAINE', 
-        'UNITED ARAB EMIRATES', 'UNITED KINGDOM', 'UNITED STATES', 'URUGUAY', 'UZBEKISTAN', 'VANUATU', 
-        'VATICAN CITY', 'VENEZUELA', 'VIETNAM', 'YEMEN', 'ZAMBIA', 'ZIMBABWE'
-    ]
-    
-    dates = pd.date_range('2021-01-01', '2023-12-31', freq='D')
-    
-    # Country population data (approximate in millions)
-    country_population = {
-        'CHINA': 1444, 'INDIA': 1408, 'UNITED STATES': 331, 'INDONESIA': 273, 'PAKISTAN': 225,
-        'BRAZIL': 214, 'NIGERIA': 211, 'BANGLADESH': 166, 'RUSSIA': 146, 'MEXICO': 129,
-        'JAPAN': 126, 'ETHIOPIA': 117, 'PHILIPPINES': 111, 'EGYPT': 102, 'VIETNAM': 97,
-        'DEMOCRATIC REPUBLIC OF THE CONGO': 90, 'TURKEY': 84, 'IRAN': 84, 'GERMANY': 83, 'THAILAND': 70,
-        'UNITED KINGDOM': 68, 'FRANCE': 65, 'ITALY': 60, 'SOUTH AFRICA': 60, 'TANZANIA': 60,
-        'MYANMAR': 54, 'KENYA': 54, 'SOUTH KOREA': 51, 'COLOMBIA': 51, 'SPAIN': 47,
-        'ARGENTINA': 45, 'UGANDA': 45, 'ALGERIA': 44, 'SUDAN': 44, 'UKRAINE': 44,
-        'IRAQ': 41, 'AFGHANISTAN': 39, 'POLAND': 38, 'CANADA': 38, 'MOROCCO': 37,
-        'SAUDI ARABIA': 35, 'UZBEKISTAN': 34, 'PERU': 33, 'MALAYSIA': 33, 'ANGOLA': 33,
-        'MOZAMBIQUE': 31, 'GHANA': 31, 'YEMEN': 30, 'NEPAL': 29, 'VENEZUELA': 28,
-        'MADAGASCAR': 28, 'CAMEROON': 27, 'CÔTE D\'IVOIRE': 27, 'NORTH KOREA': 26,
-        'AUSTRALIA': 26, 'NIGER': 25, 'SRI LANKA': 21, 'BURKINA FASO': 21, 'MALI': 20,
-        'ROMANIA': 19, 'CHILE': 19, 'MALAWI': 19, 'KAZAKHSTAN': 19, 'ZAMBIA': 19,
-        'GUATEMALA': 18, 'ECUADOR': 18, 'NETHERLANDS': 17, 'SYRIA': 17, 'CAMBODIA': 17,
-        'SENEGAL': 17, 'CHAD': 16, 'SOMALIA': 16, 'ZIMBABWE': 15, 'GUINEA': 13,
-        'RWANDA': 13, 'BENIN': 12, 'BURUNDI': 12, 'TUNISIA': 12, 'BOLIVIA': 12,
-        'BELGIUM': 12, 'HAITI': 11, 'JORDAN': 10, 'DOMINICAN REPUBLIC': 11,
-        'CUBA': 11, 'SOUTH SUDAN': 11, 'SWEDEN': 10, 'CZECH REPUBLIC': 11,
-        'GREECE': 10, 'PORTUGAL': 10, 'AZERBAIJAN': 10, 'HUNGARY': 10,
-        'UNITED ARAB EMIRATES': 10, 'BELARUS': 9, 'ISRAEL': 9, 'TAJIKISTAN': 10,
-        'AUSTRIA': 9, 'SWITZERLAND': 9, 'PAPUA NEW GUINEA': 9, 'SERBIA': 9,
-        'PARAGUAY': 7, 'LAOS': 7, 'LIBYA': 7, 'BULGARIA': 7, 'LEBANON': 7,
-        'NICARAGUA': 7, 'KYRGYZSTAN': 7, 'EL SALVADOR': 7, 'TURKMENISTAN': 6,
-        'SINGAPORE': 6, 'DENMARK': 6, 'FINLAND': 6, 'SLOVAKIA': 5, 'NORWAY': 5,
-        'CONGO': 6, 'COSTA RICA': 5, 'PALESTINE': 5, 'OMAN': 5, 'LIBERIA': 5,
-        'IRELAND': 5, 'NEW ZEALAND': 5, 'CENTRAL AFRICAN REPUBLIC': 5,
-        'MAURITANIA': 5, 'PANAMA': 4, 'KUWAIT': 4, 'CROATIA': 4, 'GEORGIA': 4,
-        'MOLDOVA': 4, 'ERITREA': 4, 'URUGUAY': 3, 'BOSNIA AND HERZEGOVINA': 3,
-        'MONGOLIA': 3, 'ARMENIA': 3, 'JAMAICA': 3, 'QATAR': 3, 'ALBANIA': 3,
-        'LITHUANIA': 3, 'NAMIBIA': 3, 'GAMBIA': 2, 'BOTSWANA': 2, 'GABON': 2,
-        'LESOTHO': 2, 'SLOVENIA': 2, 'GUINEA-BISSAU': 2, 'LATVIA': 2,
-        'BAHRAIN': 2, 'NORTH MACEDONIA': 2, 'TRINIDAD AND TOBAGO': 1,
-        'ESTONIA': 1, 'MAURITIUS': 1, 'CYPRUS': 1, 'ESWATINI': 1, 'DJIBOUTI': 1,
-        'FIJI': 1, 'COMOROS': 1, 'GUYANA': 1, 'BHUTAN': 1, 'SOLOMON ISLANDS': 1,
-        'MONTENEGRO': 1, 'LUXEMBOURG': 1, 'SURINAME': 1, 'CABO VERDE': 1,
-        'MICRONESIA': 0.1, 'MALTA': 0.5, 'BRUNEI': 0.4, 'BELIZE': 0.4,
-        'BAHAMAS': 0.4, 'ICELAND': 0.4, 'VANUATU': 0.3, 'BARBADOS': 0.3,
-        'SAO TOME AND PRINCIPE': 0.2, 'SAMOA': 0.2, 'SAINT LUCIA': 0.2,
-        'KIRIBATI': 0.1, 'GRENADA': 0.1, 'TONGA': 0.1, 'SEYCHELLES': 0.1,
-        'ANTIGUA AND BARBUDA': 0.1, 'ANDORRA': 0.1, 'DOMINICA': 0.1,
-        'MARSHALL ISLANDS': 0.1, 'SAINT KITTS AND NEVIS': 0.1,
-        'MONACO': 0.04, 'LIECHTENSTEIN': 0.04, 'SAN MARINO': 0.03,
-        'PALAU': 0.02, 'NAURU': 0.01, 'TUVALU': 0.01, 'VATICAN CITY': 0.001
-    }
-    
-    data = []
-    
-    for country in all_countries:
-        # Get population (in millions)
-        population_millions = country_population.get(country, np.random.uniform(0.1, 50))
-        
-        # Calculate realistic vaccination numbers
-        base_coverage = np.random.uniform(0.1, 0.8)  # 10% to 80% coverage
-        
-        for i, date in enumerate(dates[:180]):  # 180 days per country
-            # Time-based progression
-            progress_factor = min(1.0, i / 180 * np.random.uniform(0.5, 2.0))
-            
-            # Calculate vaccinations
-            total_vax = int(population_millions * 1_000_000 * base_coverage * progress_factor)
-            daily_vax = int(total_vax * np.random.uniform(0.001, 0.01))
-            people_vax = int(total_vax * np.random.uniform(0.7, 0.95))
-            fully_vax = int(total_vax * np.random.uniform(0.5, 0.85))
-            
-            # Add some randomness
-            total_vax += np.random.randint(-100000, 100000)
-            daily_vax = max(0, daily_vax + np.random.randint(-5000, 5000))
-            
-            data.append({
-                'country': country,
-                'date': date,
-                'total_vaccinations': max(0, total_vax),
-                'daily_vaccinations': max(0, daily_vax),
-                'people_vaccinated': max(0, people_vax),
-                'people_fully_vaccinated': max(0, fully_vax),
-                'population_millions': population_millions,
-                'vaccination_rate': min(100, (total_vax / (population_millions * 1_000_000)) * 100) if population_millions > 0 else 0
-            })
-    
-    df = pd.DataFrame(data)
-    df['date'] = pd.to_datetime(df['date'])
-    return df
+def load_source_data(source):
+    """(rows, country table, stored summary or None) for the configured data source"""
+    if source == 'ingested':
+        return IngestStore().load()
+    # Served from the on-disk Feather cache; only a cache miss runs the generator
+    rows, country_table = load_dataset()
+    return rows, country_table, None
+
+# data_key is only part of the cache key, so a new data version gets a new entry
+@st.cache_data(max_entries=2)
+def load_all_countries_data(source, data_key):
+    return load_source_data(source)
+
+# Built figures shared by every session, evicted least-recently-used past the byte budget
+@st.cache_resource
+def get_figure_cache():
+    return FigureCache(int(config.FIGURE_CACHE_MB * 1024 * 1024))
+
+# The countries and columns every cached artifact was built from, shared by all sessions
+@st.cache_resource
+def get_artifact_registry():
+    return ArtifactRegistry()
+
+def drop_stale(stale, figures):
+    """Drop the cached figures and export files a new data version made stale"""
+    figures.discard(stale)
+    discard_exports([key for key in stale if key[0] == 'export'])
+
+def publish_version(views):
+    """Move the registry to a newly built data version and drop only the artifacts it made stale"""
+    drop_stale(get_artifact_registry().advance(views.fingerprint), get_figure_cache())
+
+# Most recent views per data source, so a new data version updates the regional rollup incrementally
+@st.cache_resource
+def previous_views():
+    return {}
+
+# Each new set of dropped files is ingested once for all sessions; if another process held
+# the store lock the attempt is cached too, and retried once the TTL expires
+@st.cache_resource(max_entries=4, ttl=config.REFRESH_SECONDS, show_spinner="INGESTING NEW DATA FILES...")
+def ingest_pending_files(pending):
+    return IngestStore().ingest_directory()
+
+def current_data_key(source, ingest=ingest_pending_files):
+    """Version of the source data; ingested data first picks up new CSVs from the drop directory"""
+    if source == 'ingested':
+        ingest_store = IngestStore()
+        # Only a directory listing on the request path; ingest runs when it finds new files
+        pending = ingest_store.pending_files()
+        if pending:
+            ingest(pending)
+        return f"ingested-v{ingest_store.version}"
+    return dataset_key(dataset_params())
+
+def build_shared_dataset(source, previous=None):
+    """Frozen (rows, country table, views); previous views let the regional rollup update incrementally"""
+    rows, country_table, stored_summary = load_source_data(source)
+    df = freeze_frame(rows)
+    views = build_dataset_views(df, country_table, stored_summary, previous)
+    return df, freeze_frame(country_table), views._replace(summary=freeze_frame(views.summary))
+
+# One read-only dataset per process, handed to every session without copying
+@st.cache_resource(max_entries=2)
+def load_shared_dataset(source, data_key):
+    shared = build_shared_dataset(source, previous_views().get(source))
+    previous_views()[source] = shared[2]
+    publish_version(shared[2])
+    return shared
+
+# Row-level queries for one data version, answered by the configured engine
+@st.cache_resource(max_entries=2)
+def load_query_backend(source, data_key, backend, _df, _country_table, _summary):
+    return make_backend(backend, _df, _country_table, _summary, config.QUERY_THREADS)
+
+# Rebuilds the shared dataset off the request path whenever the data version changes
+@st.cache_resource(on_release=lambda refresher: refresher.stop())
+def get_data_refresher(source):
+    # Looked up here, on the script thread; the refresher thread runs outside any script run
+    registry, figures = get_artifact_registry(), get_figure_cache()
+
+    def build(data_key, previous):
+        shared = build_shared_dataset(source, previous.data[2] if previous else None)
+        drop_stale(registry.advance(shared[2].fingerprint), figures)
+        return shared
+
+    return DataRefresher(
+        # Already off the request path, so it ingests directly rather than through the script cache
+        check=partial(current_data_key, source, ingest=lambda pending: IngestStore().ingest_directory()),
+        build=build,
+        interval=config.REFRESH_SECONDS
+    ).start()
+
+# Summary table, metric-card numbers, country offsets and tensor, built once per dataset version
+@st.cache_data(max_entries=2)
+def load_dataset_views(source, data_key):
+    views = build_dataset_views(*load_all_countries_data(source, data_key))
+    publish_version(views)
+    return views
 
 # Load the data
-df = load_all_countries_data()
+profiler.begin('DATA LOAD')
+data_refresher = None
+if config.SHARED_DATA and config.BACKGROUND_REFRESH:
+    data_refresher = get_data_refresher(config.DATA_SOURCE)
+    # Only the very first load waits; later versions are swapped in by the refresher thread
+    with st.spinner("LOADING VACCINATION DATA..."):
+        data_snapshot = data_refresher.wait()
+    if data_snapshot is None:
+        st.error(f"COULD NOT LOAD VACCINATION DATA: {data_refresher.last_error}")
+        st.stop()
+    # The whole rerun reads this one snapshot, even if a newer one is published meanwhile
+    data_key = data_snapshot.version
+    df, country_table, views = data_snapshot.data
+else:
+    data_key = current_data_key(config.DATA_SOURCE)
+    if config.SHARED_DATA:
+        df, country_table, views = load_shared_dataset(config.DATA_SOURCE, data_key)
+    else:
+        df, country_table, _ = load_all_countries_data(config.DATA_SOURCE, data_key)
+        views = load_dataset_views(config.DATA_SOURCE, data_key)
+query_backend = load_query_backend(config.DATA_SOURCE, data_key, config.QUERY_BACKEND, df, country_table, views.summary)
+profiler.context['data_key'] = data_key
+profiler.context['data_version'] = views.fingerprint.version
+profiler.end()
+
+if df.empty:
+    st.warning(f"NO VACCINATION DATA YET. ADD OWID-STYLE CSV FILES TO {config.DROP_DIR}")
+    st.stop()
+
+country_summary = views.summary
+global_metrics = views.global_metrics
+vaccination_tensor = views.tensor
+window_engine = views.windows
+time_pyramid = views.pyramid
+data_fingerprint = views.fingerprint
+
+figure_cache = get_figure_cache()
+artifact_registry = get_artifact_registry()
+
+def artifact_key(name, countries=None, columns=None):
+    """Cache key of a derived artifact: its name plus the content hash of the countries and columns it reads.
+
+    A new data version keeps the key, and so the cached value, unless it
+    changed one of those countries or columns; None means all of them.
+    """
+    return artifact_registry.cache_key(name, data_fingerprint, countries, columns)
+
+# Latest row for each country (used by the top-N charts, map, explorer and downloads)
+latest_data = query_backend.latest()
 
 # SIDEBAR
+profiler.begin('CONTROLS')
 st.sidebar.header("🎛️ DASHBOARD CONTROLS")
 
 # Show total countries count
-total_countries = df['country'].nunique()
+total_countries = global_metrics['total_countries']
 st.sidebar.markdown(f"**📊 TOTAL COUNTRIES:** <span class='country-count'>{total_countries}</span>", unsafe_allow_html=True)
 
+# Data freshness, re-checked every 30 seconds without rerunning the page
+@st.fragment(run_every=30)
+def render_data_status(data_refresher, data_key):
+    status = data_refresher.status()
+    build_s = f" IN {status['build_s']:,.1f} S" if status['build_s'] is not None else ""
+    st.caption(f"🕒 DATA BUILT {format_age(status['age_s'])} AGO{build_s}. "
+               f"CHECKED {format_age(status['checked_s'])} AGO, NEXT CHECK IN {format_age(status['next_check_s'])}")
+    if status['refreshing']:
+        st.caption("🔄 BUILDING A NEW DATA VERSION IN THE BACKGROUND...")
+    if status['last_error']:
+        st.warning(f"LAST REFRESH FAILED, STILL SHOWING THE PREVIOUS DATA: {status['last_error']}")
+    if status['version'] != data_key:
+        st.info("NEWER DATA IS AVAILABLE")
+        if st.button("LOAD NEW DATA", use_container_width=True):
+            st.rerun(scope='app')
+    elif st.button("CHECK FOR NEW DATA", use_container_width=True):
+        data_refresher.request_refresh()
+
+if data_refresher is not None:
+    with st.sidebar:
+        render_data_status(data_refresher, data_key)
+
 # Country selection with search
-all_countries = sorted(df['country'].unique())
+all_countries = country_summary['country'].tolist()
 selected_country = st.sidebar.selectbox(
     "SELECT A COUNTRY:",
     all_countries,
@@ -274,88 +358,145 @@ selected_country = st.sidebar.selectbox(
     help="TYPE TO SEARCH THROUGH ALL COUNTRIES"
 )
 
-# Region filter (group countries by region)
-regions = {
-    'ASIA': ['INDIA', 'CHINA', 'JAPAN', 'SOUTH KOREA', 'INDONESIA', 'PAKISTAN', 'BANGLADESH', 'PHILIPPINES', 'VIETNAM', 'THAILAND'],
-    'EUROPE': ['UNITED KINGDOM', 'GERMANY', 'FRANCE', 'ITALY', 'SPAIN', 'RUSSIA', 'UKRAINE', 'POLAND', 'NETHERLANDS', 'SWEDEN'],
-    'NORTH AMERICA': ['UNITED STATES', 'CANADA', 'MEXICO', 'CUBA', 'DOMINICAN REPUBLIC', 'HAITI'],
-    'SOUTH AMERICA': ['BRAZIL', 'ARGENTINA', 'COLOMBIA', 'PERU', 'CHILE', 'VENEZUELA'],
-    'AFRICA': ['NIGERIA', 'ETHIOPIA', 'EGYPT', 'SOUTH AFRICA', 'KENYA', 'TANZANIA', 'ALGERIA', 'SUDAN'],
-    'OCEANIA': ['AUSTRALIA', 'NEW ZEALAND', 'FIJI', 'PAPUA NEW GUINEA']
-}
-
+# Region filter (every country maps to a region and sub-region)
 selected_region = st.sidebar.selectbox(
     "FILTER BY REGION (OPTIONAL):",
-    ['ALL REGIONS'] + list(regions.keys())
+    ['ALL REGIONS'] + REGIONS
 )
+if selected_region != 'ALL REGIONS':
+    selected_sub_region = st.sidebar.selectbox(
+        "SUB-REGION:",
+        ['ALL SUB-REGIONS'] + list(SUB_REGIONS[selected_region])
+    )
+else:
+    selected_sub_region = 'ALL SUB-REGIONS'
 
 # Chart settings
 st.sidebar.markdown("---")
 st.sidebar.subheader("📈 CHART SETTINGS")
-num_top_countries = st.sidebar.slider("NUMBER OF TOP COUNTRIES TO SHOW:", 5, 50, 20)
+# Zooming re-samples the line charts inside the chosen window, at the coarsest daily/weekly/monthly
+# level that still fills the chart; a narrowed range also switches the overview cards and top-N rankings
+data_start = vaccination_tensor.dates[0].date()
+data_end = vaccination_tensor.dates[-1].date()
+chart_start, chart_end = st.sidebar.slider(
+    "DATE RANGE:",
+    min_value=data_start,
+    max_value=data_end,
+    value=(data_start, data_end),
+    format="YYYY-MM-DD"
+)
+chart_budget = point_budget(config.CHART_WIDTH_PX)
+range_selected = not window_engine.is_full(chart_start, chart_end)
+rolling_days = {'OFF': 0, '7 DAYS': 7, '14 DAYS': 14, '30 DAYS': 30}[
+    st.sidebar.selectbox("ROLLING AVERAGE (DAILY PROGRESS):", ['OFF', '7 DAYS', '14 DAYS', '30 DAYS'])
+]
+chart_resolution = st.sidebar.selectbox(
+    "CHART RESOLUTION:",
+    ['AUTO'] + LEVELS,
+    help="AUTO USES THE COARSEST OF DAILY, WEEKLY OR MONTHLY THAT STILL FILLS THE CHART"
+)
+
+def resolve_level(start, end, resolution):
+    """Pyramid level for a chart window: the user's choice, or the coarsest one that fills the chart"""
+    if resolution != 'AUTO':
+        return resolution
+    return time_pyramid.pick_level(start, end, fill_points(config.CHART_WIDTH_PX))
+
+# Sections with their own widgets run as fragments: changing one of those widgets
+# reruns only that section. Each fragment's parameters are the inputs it depends on.
+def show_fragment_timing(started):
+    if not config.ADMIN_PANEL:
+        return
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    full_ms = st.session_state.get('full_rerun_ms')
+    if full_ms:
+        st.caption(f"⚡ SECTION RERUN {elapsed_ms:,.0f} MS VS FULL RERUN {full_ms:,.0f} MS "
+                   f"(SAVES ~{max(0, full_ms - elapsed_ms):,.0f} MS PER INTERACTION)")
+    else:
+        st.caption(f"⚡ SECTION RERUN {elapsed_ms:,.0f} MS")
 
 # MAIN DASHBOARD
 # Filter data based on selections
 if selected_region != 'ALL REGIONS':
-    region_countries = regions[selected_region]
-    df_filtered = df[df['country'].isin(region_countries)]
-    st.info(f"SHOWING DATA FOR {selected_region} REGION ({len(region_countries)} COUNTRIES)")
+    region_label = selected_region if selected_sub_region == 'ALL SUB-REGIONS' else selected_sub_region
+    region_countries = countries_in(
+        all_countries,
+        selected_region,
+        None if selected_sub_region == 'ALL SUB-REGIONS' else selected_sub_region
+    )
+    st.info(f"SHOWING DATA FOR {region_label} REGION ({len(region_countries)} COUNTRIES)")
 else:
-    df_filtered = df
+    region_countries = None
 
 # Get data for selected country (all data, no date filtering)
-country_data = df_filtered[df_filtered['country'] == selected_country]
+if region_countries is None or selected_country in region_countries:
+    country_data = query_backend.country_rows(selected_country)
+else:
+    country_data = df.iloc[0:0]
 
 # ================= GLOBAL METRICS SECTION =================
+profiler.begin('GLOBAL METRICS')
 st.markdown("<h2 class='section-header'>📊 GLOBAL VACCINATION OVERVIEW</h2>", unsafe_allow_html=True)
 
+# Window totals come from per-country prefix sums: two lookups per country for any range
+if range_selected:
+    overview_metrics = window_engine.window_metrics(chart_start, chart_end)
+    overview_labels = ['COUNTRIES REPORTING', 'VACCINATIONS IN RANGE', 'VACCINATION RATE AT RANGE END', 'DAYS IN RANGE']
+    st.caption(f"FOR {chart_start:%Y-%m-%d} TO {chart_end:%Y-%m-%d}: "
+               f"{overview_metrics['avg_daily']:,.0f} DOSES PER DAY ON AVERAGE")
+else:
+    overview_metrics = global_metrics
+    overview_labels = ['TOTAL COUNTRIES', 'GLOBAL VACCINATIONS', 'AVG. VACCINATION RATE', 'DAYS COVERED']
+
 col1, col2, col3, col4 = st.columns(4)
 
 with col1:
-    total_countries_val = df['country'].nunique()
+    total_countries_val = overview_metrics['total_countries']
     st.markdown(f"""
     <div class='custom-metric-card'>
         <div class='custom-metric-value'>{total_countries_val}</div>
-        <div class='custom-metric-label'>TOTAL COUNTRIES</div>
+        <div class='custom-metric-label'>{overview_labels[0]}</div>
     </div>
     """, unsafe_allow_html=True)
 
 with col2:
-    global_total = df.groupby('country')['total_vaccinations'].max().sum()
+    global_total = overview_metrics['global_total']
     formatted_total = f"{global_total:,.0f}"
     st.markdown(f"""
     <div class='custom-metric-card'>
         <div class='custom-metric-value'>{formatted_total}</div>
-        <div class='custom-metric-label'>GLOBAL VACCINATIONS</div>
+        <div class='custom-metric-label'>{overview_labels[1]}</div>
     </div>
     """, unsafe_allow_html=True)
 
 with col3:
-    avg_rate = df.groupby('country')['vaccination_rate'].max().mean()
+    avg_rate = overview_metrics['avg_rate']
     st.markdown(f"""
     <div class='custom-metric-card'>
         <div class='custom-metric-value'>{avg_rate:.1f}%</div>
-        <div class='custom-metric-label'>AVG. VACCINATION RATE</div>
+        <div class='custom-metric-label'>{overview_labels[2]}</div>
     </div>
     """, unsafe_allow_html=True)
 
 with col4:
-    days_covered = (df['date'].max() - df['date'].min()).days
+    days_covered = overview_metrics['days_covered']
     st.markdown(f"""
     <div class='custom-metric-card'>
         <div class='custom-metric-value'>{days_covered}</div>
-        <div class='custom-metric-label'>DAYS COVERED</div>
+        <div class='custom-metric-label'>{overview_labels[3]}</div>
     </div>
     """, unsafe_allow_html=True)
 
 # ================= COUNTRY METRICS SECTION =================
+profiler.begin('COUNTRY METRICS')
 st.markdown(f"<h2 class='section-header'>📍 DATA FOR {selected_country}</h2>", unsafe_allow_html=True)
 
 if not country_data.empty:
+    country_stats = country_summary[country_summary['country'] == selected_country].iloc[0]
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        total_vax = country_data['total_vaccinations'].max()
+        total_vax = country_stats['max_total_vaccinations']
         formatted_total_vax = f"{total_vax:,.0f}"
         st.markdown(f"""
         <div class='custom-metric-card'>
@@ -365,7 +506,7 @@ if not country_data.empty:
         """, unsafe_allow_html=True)
     
     with col2:
-        daily_avg = country_data['daily_vaccinations'].mean()
+        daily_avg = country_stats['mean_daily_vaccinations']
         formatted_daily_avg = f"{daily_avg:,.0f}"
         st.markdown(f"""
         <div class='custom-metric-card'>
@@ -375,7 +516,7 @@ if not country_data.empty:
         """, unsafe_allow_html=True)
     
     with col3:
-        people_vax = country_data['people_vaccinated'].max()
+        people_vax = country_stats['max_people_vaccinated']
         formatted_people_vax = f"{people_vax:,.0f}"
         st.markdown(f"""
         <div class='custom-metric-card'>
@@ -385,7 +526,7 @@ if not country_data.empty:
         """, unsafe_allow_html=True)
     
     with col4:
-        vax_rate = country_data['vaccination_rate'].max()
+        vax_rate = country_stats['max_vaccination_rate']
         st.markdown(f"""
         <div class='custom-metric-card'>
             <div class='custom-metric-value'>{vax_rate:.1f}%</div>
@@ -396,130 +537,267 @@ else:
     st.error(f"No data available for {selected_country}")
 
 # ================= VISUALIZATION 1: Country Trend =================
+profiler.begin('TREND')
 st.markdown("<h2 class='section-header'>📈 COUNTRY VACCINATION TREND</h2>", unsafe_allow_html=True)
 
+def build_trend_figure(country, start, end, budget, resolution):
+    # Weekly and monthly levels keep each period's last reported total
+    level = resolve_level(start, end, resolution)
+    trend_data = time_pyramid.to_long(level, [country], ['total_vaccinations'], start, end)
+    trend_points, trend_raw_points = downsample_frame(trend_data, 'date', 'total_vaccinations', budget)
+    fig1 = px.line(
+        trend_points,
+        x='date',
+        y='total_vaccinations',
+        title=f'{country}: TOTAL VACCINATIONS OVER TIME ({level})',
+        labels={'total_vaccinations': 'TOTAL VACCINATIONS', 'date': 'DATE'},
+        template='plotly_white',
+        line_shape='spline'
+    )
+    fig1.update_traces(line=dict(width=3))
+    fig1.update_xaxes(rangeslider_visible=True)
+    return fig1, len(trend_points), trend_raw_points, level
+
+def build_daily_figure(country, start, end, rolling_days, resolution):
+    if start is None:
+        recent = vaccination_tensor.to_long([country], ['daily_vaccinations']).tail(90)
+        start, end = (recent['date'].iloc[0], recent['date'].iloc[-1]) if len(recent) else (None, None)
+        period = 'LAST 90 DAYS'
+    else:
+        period = f'{start:%Y-%m-%d} TO {end:%Y-%m-%d}'
+    # Weekly and monthly levels add up the daily counts of each period
+    level = resolve_level(start, end, resolution)
+    daily_data = time_pyramid.to_long(level, [country], ['daily_vaccinations'], start, end)
+    label = {'DAILY': 'DAILY VACCINATIONS', 'WEEKLY': 'VACCINATIONS PER WEEK', 'MONTHLY': 'VACCINATIONS PER MONTH'}[level]
+    fig2 = px.area(
+        daily_data,
+        x='date',
+        y='daily_vaccinations',
+        title=f'{country}: {label} ({period})',
+        labels={'daily_vaccinations': label, 'date': 'DATE'},
+        template='plotly_white'
+    )
+    if rolling_days and level == 'DAILY' and len(daily_data):
+        # Trailing mean from prefix sums, so the first days of the window still average full periods
+        rolling = window_engine.rolling_mean(country, 'daily_vaccinations', rolling_days)
+        rolling = rolling[daily_data['date'].min():daily_data['date'].max()]
+        fig2.add_scatter(
+            x=rolling.index,
+            y=rolling.values,
+            mode='lines',
+            name=f'{rolling_days}-DAY AVERAGE',
+            line=dict(width=3, color='#DC2626')
+        )
+    return fig2
+
+# Logistic fits for every country at once, shared by all sessions for one data version
+@st.cache_resource(max_entries=4)
+def load_forecast(source, data_key, horizon, mode, _tensor):
+    if mode == 'monte_carlo':
+        return monte_carlo_forecast(_tensor, horizon, config.FORECAST_RUNS, workers=config.FORECAST_WORKERS or None)
+    return forecast_tensor(_tensor, horizon)
+
+def build_forecast_figure(country, horizon):
+    forecast = load_forecast(config.DATA_SOURCE, data_key, horizon, config.FORECAST_MODE, vaccination_tensor)
+    history = vaccination_tensor.to_long([country], ['total_vaccinations'])
+    projection = forecast_frame(forecast, country, country_table['population_millions'].get(country))
+    fig9 = px.line(
+        history,
+        x='date',
+        y='total_vaccinations',
+        title=f'{country}: TOTAL VACCINATIONS FORECAST ({horizon} DAYS)',
+        labels={'total_vaccinations': 'TOTAL VACCINATIONS', 'date': 'DATE'},
+        template='plotly_white'
+    )
+    fig9.add_scatter(x=projection['date'], y=projection['upper'], mode='lines', line=dict(width=0),
+                     showlegend=False, hoverinfo='skip')
+    fig9.add_scatter(x=projection['date'], y=projection['lower'], mode='lines', line=dict(width=0),
+                     fill='tonexty', fillcolor='rgba(124,58,237,0.2)', name=f'{BAND_LEVEL:.0%} BAND')
+    fig9.add_scatter(x=projection['date'], y=projection['forecast'], mode='lines',
+                     line=dict(width=3, dash='dash', color='#7C3AED'), name='FORECAST')
+    return fig9, projection.iloc[-1]
+
 if not country_data.empty:
-    tab1, tab2 = st.tabs(["TOTAL VACCINATIONS", "DAILY PROGRESS"])
+    tab1, tab2, tab3 = st.tabs(["TOTAL VACCINATIONS", "DAILY PROGRESS", "FORECAST"])
     
     with tab1:
-        fig1 = px.line(
-            country_data,
-            x='date',
-            y='total_vaccinations',
-            title=f'{selected_country}: TOTAL VACCINATIONS OVER TIME',
-            labels={'total_vaccinations': 'TOTAL VACCINATIONS', 'date': 'DATE'},
-            template='plotly_white',
-            line_shape='spline'
+        fig1, trend_points, trend_raw_points, trend_level = figure_cache.get_or_build(
+            artifact_key(('trend', selected_country, chart_start, chart_end, chart_budget, chart_resolution),
+                         [selected_country], ['total_vaccinations']),
+            partial(build_trend_figure, selected_country, chart_start, chart_end, chart_budget, chart_resolution),
+            nbytes=lambda built: figure_nbytes(built[0])
         )
-        fig1.update_traces(line=dict(width=3))
-        fig1.update_xaxes(rangeslider_visible=True)
         st.plotly_chart(fig1, use_container_width=True)
+        st.caption(f"SHOWING {trend_points:,} OF {trend_raw_points:,} {trend_level} DATA POINTS")
     
     with tab2:
-        fig2 = px.area(
-            country_data.tail(90),
-            x='date',
-            y='daily_vaccinations',
-            title=f'{selected_country}: DAILY VACCINATIONS (LAST 90 DAYS)',
-            labels={'daily_vaccinations': 'DAILY VACCINATIONS', 'date': 'DATE'},
-            template='plotly_white'
+        daily_start, daily_end = (chart_start, chart_end) if range_selected else (None, None)
+        fig2 = figure_cache.get_or_build(
+            artifact_key(('daily', selected_country, daily_start, daily_end, rolling_days, chart_resolution),
+                         [selected_country], ['daily_vaccinations']),
+            partial(build_daily_figure, selected_country, daily_start, daily_end, rolling_days, chart_resolution)
         )
         st.plotly_chart(fig2, use_container_width=True)
+    
+    with tab3:
+        forecast_horizon = st.selectbox("FORECAST HORIZON (DAYS):", [30, 60, 90], index=1)
+        fig9, projected = figure_cache.get_or_build(
+            artifact_key(('forecast', selected_country, forecast_horizon, config.FORECAST_MODE),
+                         [selected_country], ['total_vaccinations', 'population_millions']),
+            partial(build_forecast_figure, selected_country, forecast_horizon),
+            nbytes=lambda built: figure_nbytes(built[0])
+        )
+        st.plotly_chart(fig9, use_container_width=True)
+        if pd.notna(projected['forecast']):
+            coverage = (f", ABOUT {projected['forecast_per_hundred']:,.1f} DOSES PER HUNDRED PEOPLE"
+                        if 'forecast_per_hundred' in projected else "")
+            st.caption(f"PROJECTED TOTAL ON {projected['date']:%Y-%m-%d}: {projected['forecast']:,.0f} "
+                       f"({projected['lower']:,.0f} – {projected['upper']:,.0f}){coverage}")
+        else:
+            st.caption("NOT ENOUGH DATA TO FORECAST THIS COUNTRY")
 
 # ================= VISUALIZATION 2: Global Comparison =================
 st.markdown("<h2 class='section-header'>🌐 GLOBAL COMPARISON</h2>", unsafe_allow_html=True)
 
-# Get latest data for each country
-latest_data = df.groupby('country').last().reset_index()
-
-# Top countries visualization
-col1, col2 = st.columns(2)
+def build_top_figures(num_top_countries, in_range, ranking_data):
+    def rank(metric):
+        if in_range:
+            return top_countries(ranking_data, metric, num_top_countries)
+        return query_backend.top_n(metric, num_top_countries)
 
-with col1:
     # Top countries by total vaccinations
-    top_countries = latest_data.nlargest(num_top_countries, 'total_vaccinations')
-    
     fig3 = px.bar(
-        top_countries,
+        rank('total_vaccinations'),
         x='total_vaccinations',
         y='country',
         orientation='h',
-        title=f'TOP {num_top_countries} COUNTRIES BY TOTAL VACCINATIONS',
+        title=f'TOP {num_top_countries} COUNTRIES BY ' + ('VACCINATIONS IN RANGE' if in_range else 'TOTAL VACCINATIONS'),
         labels={'total_vaccinations': 'TOTAL VACCINATIONS', 'country': 'COUNTRY'},
         color='total_vaccinations',
         color_continuous_scale='Viridis',
         hover_data=['vaccination_rate', 'population_millions']
     )
     fig3.update_layout(yaxis={'categoryorder': 'total ascending'})
-    st.plotly_chart(fig3, use_container_width=True)
 
-with col2:
     # Top countries by vaccination rate
-    top_rate = latest_data.nlargest(num_top_countries, 'vaccination_rate')
-    
     fig4 = px.bar(
-        top_rate,
+        rank('vaccination_rate'),
         x='vaccination_rate',
         y='country',
         orientation='h',
-        title=f'TOP {num_top_countries} COUNTRIES BY VACCINATION RATE',
+        title=f'TOP {num_top_countries} COUNTRIES BY VACCINATION RATE' + (' AT RANGE END' if in_range else ''),
         labels={'vaccination_rate': 'VACCINATION RATE (%)', 'country': 'COUNTRY'},
         color='vaccination_rate',
         color_continuous_scale='Plasma',
         hover_data=['total_vaccinations', 'population_millions']
     )
     fig4.update_layout(yaxis={'categoryorder': 'total ascending'})
-    st.plotly_chart(fig4, use_container_width=True)
+    return fig3, fig4
 
-# ================= VISUALIZATION 3: Interactive World Map =================
-st.markdown("<h2 class='section-header'>🗺️ GLOBAL VACCINATION MAP</h2>", unsafe_allow_html=True)
+@st.fragment
+def render_global_comparison(ranking_data, in_range):
+    started = time.perf_counter()
+    with profiler.section('GLOBAL COMPARISON'):
+        num_top_countries = st.slider("NUMBER OF TOP COUNTRIES TO SHOW:", 5, 50, 20)
 
-# Get latest data for EACH COUNTRY
-map_country_data = df.groupby('country').last().reset_index()
-
-# Convert country names to proper case for Plotly map recognition
-def convert_country_name(country):
-    """Convert uppercase country names to Plotly-recognized format"""
-    special_cases = {
-        'UNITED STATES': 'United States',
-        'UNITED KINGDOM': 'United Kingdom',
-        'SOUTH KOREA': 'South Korea',
-        'NORTH KOREA': 'North Korea',
-        'SOUTH AFRICA': 'South Africa',
-        'SAUDI ARABIA': 'Saudi Arabia',
-        'NEW ZEALAND': 'New Zealand',
-        'PAPUA NEW GUINEA': 'Papua New Guinea',
-        'UNITED ARAB EMIRATES': 'United Arab Emirates',
-        'DOMINICAN REPUBLIC': 'Dominican Republic',
-        'CZECH REPUBLIC': 'Czech Republic',
-        'BOSNIA AND HERZEGOVINA': 'Bosnia and Herzegovina',
-        'TRINIDAD AND TOBAGO': 'Trinidad and Tobago',
-        'ANTIGUA AND BARBUDA': 'Antigua and Barbuda',
-        'SAINT VINCENT AND THE GRENADINES': 'Saint Vincent and the Grenadines',
-        'SAINT KITTS AND NEVIS': 'Saint Kitts and Nevis',
-        'SAO TOME AND PRINCIPE': 'Sao Tome and Principe',
-        'TIMOR-LESTE': 'Timor-Leste',
-        'DEMOCRATIC REPUBLIC OF THE CONGO': 'Democratic Republic of the Congo',
-        'CENTRAL AFRICAN REPUBLIC': 'Central African Republic'
-    }
-    
-    if country in special_cases:
-        return special_cases[country]
-    
-    return country.title()
+        build = partial(build_top_figures, num_top_countries, in_range, ranking_data)
+        if in_range:
+            fig3, fig4 = build()
+        else:
+            # Any country can enter the top n, but only the charted columns matter
+            fig3, fig4 = figure_cache.get_or_build(
+                artifact_key(('top_n', num_top_countries), None,
+                             ['total_vaccinations', 'vaccination_rate', 'population_millions']),
+                build,
+                nbytes=lambda built: figure_nbytes(built[0]) + figure_nbytes(built[1])
+            )
 
-map_data = map_country_data.copy()
-map_data['country_plotly'] = map_data['country'].apply(convert_country_name)
+        # Top countries visualization
+        col1, col2 = st.columns(2)
+        with col1:
+            st.plotly_chart(fig3, use_container_width=True)
+        with col2:
+            st.plotly_chart(fig4, use_container_width=True)
 
-try:
+    show_fragment_timing(started)
+
+# Rankings over a narrowed date range read the window engine; the full range asks the query backend
+if range_selected:
+    ranking_data = window_engine.window_table(chart_start, chart_end).join(country_table['population_millions'], on='country')
+else:
+    ranking_data = None
+render_global_comparison(ranking_data, range_selected)
+
+# ================= REGIONAL OVERVIEW =================
+profiler.begin('REGIONS')
+st.markdown("<h2 class='section-header'>🌎 VACCINATION BY REGION</h2>", unsafe_allow_html=True)
+
+region_rollup = views.regions
+
+def build_region_figures(region, start, end):
+    # Lookups into the precomputed rollup: regions globally, sub-regions inside a selected region
+    if region is None:
+        level, groups, scope = 'region', None, 'REGION'
+    else:
+        level, groups, scope = 'sub_region', list(SUB_REGIONS[region]), f'{region} SUB-REGION'
+    totals = region_rollup.to_long('total_vaccinations', level, start, end)
+    rates = region_rollup.series('vaccination_rate', level, start, end).iloc[-1].rename('vaccination_rate')
+    rates = rates.rename_axis('group').reset_index().dropna()
+    if groups is not None:
+        totals = totals[totals[level].isin(groups)]
+        rates = rates[rates['group'].isin(groups)]
+
+    fig7 = px.area(
+        totals,
+        x='date',
+        y='total_vaccinations',
+        color=level,
+        title=f'TOTAL VACCINATIONS BY {scope}',
+        labels={'total_vaccinations': 'TOTAL VACCINATIONS', 'date': 'DATE', level: scope},
+        template='plotly_white'
+    )
+    fig8 = px.bar(
+        rates.sort_values('vaccination_rate'),
+        x='vaccination_rate',
+        y='group',
+        orientation='h',
+        title=f'POPULATION-WEIGHTED VACCINATION RATE BY {scope}',
+        labels={'vaccination_rate': 'VACCINATION RATE (%)', 'group': scope},
+        color='vaccination_rate',
+        color_continuous_scale='Plasma'
+    )
+    return fig7, fig8
+
+rollup_region = None if selected_region == 'ALL REGIONS' else selected_region
+fig7, fig8 = figure_cache.get_or_build(
+    artifact_key(('regions', rollup_region, chart_start, chart_end),
+                 None if rollup_region is None else countries_in(all_countries, rollup_region),
+                 ['total_vaccinations', 'vaccination_rate', 'population_millions']),
+    partial(build_region_figures, rollup_region, chart_start, chart_end),
+    nbytes=lambda built: figure_nbytes(built[0]) + figure_nbytes(built[1])
+)
+col1, col2 = st.columns(2)
+with col1:
+    st.plotly_chart(fig7, use_container_width=True)
+with col2:
+    st.plotly_chart(fig8, use_container_width=True)
+
+# ================= VISUALIZATION 3: Interactive World Map =================
+profiler.begin('MAP')
+st.markdown("<h2 class='section-header'>🗺️ GLOBAL VACCINATION MAP</h2>", unsafe_allow_html=True)
+
+# Choropleth keyed by ISO-3 codes, rebuilt only when a mapped column changes and shared by every session
+@st.cache_resource(max_entries=2)
+def build_world_map(source, map_key, _latest_data):
+    map_data, unmapped = build_map_data(_latest_data)
     fig5 = px.choropleth(
         map_data,
-        locations="country_plotly",
-        locationmode="country names",
+        locations="iso3",
+        locationmode="ISO-3",
         color="vaccination_rate",
         hover_name="country",
         hover_data={
-            'country_plotly': False,
+            'iso3': False,
             'total_vaccinations': ':,.0f',
             'people_vaccinated': ':,.0f',
             'vaccination_rate': ':.1f%',
@@ -556,22 +834,29 @@ try:
     
     fig5.update_traces(
         hovertemplate="<b>%{hovertext}</b><br>" +
-                      "Total Vaccinations: %{customdata[0]:,}<br>" +
-                      "People Vaccinated: %{customdata[1]:,}<br>" +
-                      "Vaccination Rate: %{customdata[2]:.1f}%<br>" +
-                      "Daily Vaccinations: %{customdata[3]:,}<br>" +
+                      "Total Vaccinations: %{customdata[1]:,}<br>" +
+                      "People Vaccinated: %{customdata[2]:,}<br>" +
+                      "Vaccination Rate: %{customdata[3]:.1f}%<br>" +
+                      "Daily Vaccinations: %{customdata[4]:,}<br>" +
                       "<extra></extra>"
     )
-    
+    return fig5, len(map_data), unmapped
+
+try:
+    map_key = artifact_key(('map',), None, ['total_vaccinations', 'people_vaccinated', 'vaccination_rate', 'daily_vaccinations'])
+    fig5, mapped_count, unmapped_countries = build_world_map(config.DATA_SOURCE, map_key, latest_data)
     st.plotly_chart(fig5, use_container_width=True)
-    st.success(f"✅ World map showing {len(map_data)} countries")
+    st.success(f"✅ World map showing {mapped_count} countries")
+    if unmapped_countries:
+        st.warning(f"⚠️ {len(unmapped_countries)} COUNTRIES HAVE NO ISO CODE AND ARE NOT ON THE MAP: "
+                   f"{', '.join(unmapped_countries)}")
     
 except Exception as e:
     st.error(f"❌ Map error: {str(e)}")
     
     # Fallback visualization
     fig5_fallback = px.scatter(
-        map_country_data,
+        latest_data,
         x='country',
         y='vaccination_rate',
         size='total_vaccinations',
@@ -593,73 +878,212 @@ except Exception as e:
 # ================= VISUALIZATION 4: Country Comparison =================
 st.markdown("<h2 class='section-header'>🔍 COMPARE COUNTRIES</h2>", unsafe_allow_html=True)
 
-compare_countries = st.multiselect(
-    "SELECT COUNTRIES TO COMPARE:",
-    all_countries,
-    default=[selected_country, 'UNITED STATES', 'UNITED KINGDOM', 'GERMANY'] if selected_country in all_countries else all_countries[:4],
-    max_selections=10
-)
+def build_comparison_figure(time_pyramid, compare_countries, chart_start, chart_end, chart_budget, resolution):
+    # Each (country, date) pair is already unique: daily series come straight from the query backend,
+    # weekly and monthly ones from the pyramid
+    level = resolve_level(chart_start, chart_end, resolution)
+    if level == 'DAILY':
+        compare_data = query_backend.comparison_series(compare_countries, 'total_vaccinations', chart_start, chart_end)
+    else:
+        compare_data = time_pyramid.to_long(level, compare_countries, ['total_vaccinations'], chart_start, chart_end)
+    compare_points, compare_raw_points = downsample_frame(
+        compare_data, 'date', 'total_vaccinations', chart_budget, group='country'
+    )
 
-if compare_countries:
-    compare_data = df[df['country'].isin(compare_countries)].groupby(['country', 'date']).last().reset_index()
-    
     fig6 = px.line(
-        compare_data,
+        compare_points,
         x='date',
         y='total_vaccinations',
         color='country',
-        title='VACCINATION PROGRESS COMPARISON',
+        title=f'VACCINATION PROGRESS COMPARISON ({level})',
         labels={'total_vaccinations': 'TOTAL VACCINATIONS', 'date': 'DATE', 'country': 'COUNTRY'},
         template='plotly_white',
         line_dash='country'
     )
-    
+
     fig6.update_layout(hovermode='x unified')
-    st.plotly_chart(fig6, use_container_width=True)
+    return fig6, len(compare_points), compare_raw_points, level
+
+@st.fragment
+def render_country_comparison(all_countries, selected_country, time_pyramid, chart_start, chart_end, chart_budget, chart_resolution):
+    started = time.perf_counter()
+    with profiler.section('COMPARE'):
+        compare_countries = st.multiselect(
+            "SELECT COUNTRIES TO COMPARE:",
+            all_countries,
+            # The selected country may be one of the defaults; list it once
+            default=[c for c in dict.fromkeys([selected_country, 'UNITED STATES', 'UNITED KINGDOM', 'GERMANY'])
+                     if c in all_countries] or all_countries[:4],
+            max_selections=10
+        )
+
+        if compare_countries:
+            # Selection order decides line colours, so it is part of the key
+            fig6, compare_points, compare_raw_points, compare_level = figure_cache.get_or_build(
+                artifact_key(('compare', tuple(compare_countries), chart_start, chart_end, chart_budget, chart_resolution),
+                             compare_countries, ['total_vaccinations']),
+                partial(build_comparison_figure, time_pyramid, compare_countries, chart_start, chart_end, chart_budget, chart_resolution),
+                nbytes=lambda built: figure_nbytes(built[0])
+            )
+            st.plotly_chart(fig6, use_container_width=True)
+            st.caption(f"SHOWING {compare_points:,} OF {compare_raw_points:,} {compare_level} DATA POINTS")
+
+    show_fragment_timing(started)
+
+render_country_comparison(all_countries, selected_country, time_pyramid, chart_start, chart_end, chart_budget, chart_resolution)
 
 # ================= DATA EXPLORER =================
+EXPLORER_COLUMNS = {
+    'date': 'DATE',
+    'country': 'COUNTRY',
+    'total_vaccinations': 'TOTAL VACCINATIONS',
+    'daily_vaccinations': 'DAILY VACCINATIONS',
+    'people_vaccinated': 'PEOPLE VACCINATED',
+    'people_fully_vaccinated': 'PEOPLE FULLY VACCINATED',
+    'vaccination_rate': 'VACCINATION RATE (%)'
+}
+
+@st.fragment
+def render_data_explorer(query_backend, region_countries, explore_start, explore_end, data_key):
+    """Every daily row, one page at a time; search, filters and sorting run in the query backend"""
+    started = time.perf_counter()
+    with profiler.section('EXPLORER'):
+        columns = [c for c in EXPLORER_COLUMNS if c in query_backend.columns]
+        metrics = [c for c in columns if c not in ('date', 'country')]
+
+        col1, col2, col3 = st.columns(3)
+        search = col1.text_input("SEARCH COUNTRY:", placeholder="E.G. KING")
+        sort_by = col2.selectbox("SORT BY:", columns, format_func=EXPLORER_COLUMNS.get)
+        descending = col3.radio("ORDER:", ['ASCENDING', 'DESCENDING'], horizontal=True) == 'DESCENDING'
+
+        col1, col2, col3 = st.columns(3)
+        filter_column = col1.selectbox("FILTER COLUMN:", ['NONE'] + metrics,
+                                       format_func=lambda c: EXPLORER_COLUMNS.get(c, c))
+        low = col2.number_input("MIN:", value=None, disabled=filter_column == 'NONE')
+        high = col3.number_input("MAX:", value=None, disabled=filter_column == 'NONE')
+        ranges = {filter_column: (low, high)} if filter_column != 'NONE' and (low, high) != (None, None) else None
+
+        # A new query starts again from the first page
+        query = (search, sort_by, descending, filter_column, low, high, explore_start, explore_end,
+                 tuple(region_countries or ()), data_key)
+        if st.session_state.get('explorer_query') != query:
+            st.session_state['explorer_query'] = query
+            st.session_state['explorer_page'] = 1
+
+        col1, col2 = st.columns([1, 3])
+        page_size = col1.selectbox("ROWS PER PAGE:", [25, 50, 100], index=1)
+        page = st.session_state.get('explorer_page', 1)
+        page_rows, matching = query_backend.explore(
+            search=search, countries=region_countries, start=explore_start, end=explore_end, ranges=ranges,
+            sort_by=sort_by, descending=descending, offset=(page - 1) * page_size, limit=page_size
+        )
+        pages = max(1, -(-matching // page_size))
+        if page > pages:
+            # Fewer matches than before, e.g. after a larger page size: show the last page
+            page = st.session_state['explorer_page'] = pages
+            page_rows, _ = query_backend.explore(
+                search=search, countries=region_countries, start=explore_start, end=explore_end, ranges=ranges,
+                sort_by=sort_by, descending=descending, offset=(page - 1) * page_size, limit=page_size
+            )
+        col2.number_input(f"PAGE (OF {pages:,}):", min_value=1, max_value=pages, step=1, key='explorer_page')
+
+        scope = f"{explore_start:%Y-%m-%d} TO {explore_end:%Y-%m-%d}" if explore_start is not None else "ALL DATES"
+        if matching:
+            first = (page - 1) * page_size + 1
+            st.caption(f"ROWS {first:,}–{first + len(page_rows) - 1:,} OF {matching:,} MATCHING ({scope})")
+        else:
+            st.caption(f"NO ROWS MATCH ({scope})")
+
+        page_rows = page_rows[columns].assign(country=page_rows['country'].astype(str))
+        st.dataframe(
+            page_rows,
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                'date': st.column_config.DateColumn('DATE', format='YYYY-MM-DD'),
+                'country': 'COUNTRY',
+                'total_vaccinations': st.column_config.NumberColumn('TOTAL VACCINATIONS', format='%d'),
+                'daily_vaccinations': st.column_config.NumberColumn('DAILY VACCINATIONS', format='%d'),
+                'people_vaccinated': st.column_config.NumberColumn('PEOPLE VACCINATED', format='%d'),
+                'people_fully_vaccinated': st.column_config.NumberColumn('PEOPLE FULLY VACCINATED', format='%d'),
+                'vaccination_rate': st.column_config.ProgressColumn('VACCINATION RATE', format='%.1f%%', min_value=0, max_value=100)
+            }
+        )
+
+    show_fragment_timing(started)
+
 with st.expander("📋 EXPLORE ALL COUNTRY DATA", expanded=False):
-    st.dataframe(
-        latest_data.sort_values('total_vaccinations', ascending=False),
-        use_container_width=True,
-        height=400,
-        column_config={
-            'country': 'COUNTRY',
-            'total_vaccinations': st.column_config.NumberColumn('TOTAL VACCINATIONS', format='%d'),
-            'vaccination_rate': st.column_config.ProgressColumn('VACCINATION RATE', format='%.1f%%', min_value=0, max_value=100),
-            'population_millions': 'POPULATION (MILLIONS)'
-        }
+    # The explorer follows the region filter and the chart date range
+    render_data_explorer(
+        query_backend,
+        region_countries,
+        chart_start if range_selected else None,
+        chart_end if range_selected else None,
+        data_key
     )
 
 # ================= DOWNLOAD SECTION =================
 st.sidebar.markdown("---")
 st.sidebar.header("📥 DOWNLOAD DATA")
 
-# Download options
-download_option = st.sidebar.radio(
-    "SELECT DATA TO DOWNLOAD:",
-    ['CURRENT COUNTRY', 'ALL COUNTRIES', 'TOP 50 COUNTRIES']
-)
+# Exports are only written when the button is clicked, then reused from disk
+# for the same (option, country, format) while the rows they read are unchanged.
+# Stale ones are deleted with the data version; the rest are trimmed to EXPORT_CACHE_MB
+def prepare_download(export_key, export_format, export_rows, export_table):
+    path = build_export(
+        export_key,
+        export_format,
+        lambda: iter_export_chunks(export_rows, export_table),
+        max_bytes=int(config.EXPORT_CACHE_MB * 1024 * 1024)
+    )
+    with open(path, 'rb') as f:
+        return f.read()
 
-if download_option == 'CURRENT COUNTRY':
-    download_data = country_data
-    filename = f"PENDEMIXAI_VACCINATION_{selected_country}.csv"
-elif download_option == 'ALL COUNTRIES':
-    download_data = df
-    filename = "PENDEMIXAI_VACCINATION_ALL_COUNTRIES.csv"
-else:
-    download_data = latest_data.nlargest(50, 'total_vaccinations')
-    filename = "PENDEMIXAI_VACCINATION_TOP_50.csv"
+@st.fragment
+def render_download_panel(selected_country, country_data, df, country_table, latest_data):
+    started = time.perf_counter()
+    with profiler.section('DOWNLOAD'):
+        # Download options
+        download_option = st.radio(
+            "SELECT DATA TO DOWNLOAD:",
+            ['CURRENT COUNTRY', 'ALL COUNTRIES', 'TOP 50 COUNTRIES']
+        )
+        download_format = st.selectbox("FILE FORMAT:", list(EXPORT_FORMATS))
 
-csv_data = download_data.to_csv(index=False)
+        if download_option == 'CURRENT COUNTRY':
+            export_rows, export_table = country_data, country_table
+            export_country = selected_country if not country_data.empty else ''
+            filename = f"PENDEMIXAI_VACCINATION_{selected_country}"
+        elif download_option == 'ALL COUNTRIES':
+            export_rows, export_table = df, country_table
+            export_country = ''
+            filename = "PENDEMIXAI_VACCINATION_ALL_COUNTRIES"
+        else:
+            export_rows, export_table = query_backend.top_n('total_vaccinations', 50), None
+            export_country = ''
+            filename = "PENDEMIXAI_VACCINATION_TOP_50"
 
-st.sidebar.download_button(
-    label=f"📥 DOWNLOAD {download_option} DATA",
-    data=csv_data,
-    file_name=filename,
-    mime="text/csv",
-    use_container_width=True
-)
+        extension, mime = EXPORT_FORMATS[download_format]
+
+        st.download_button(
+            label=f"📥 DOWNLOAD {download_option} DATA",
+            data=partial(
+                prepare_download,
+                artifact_key(('export', download_option, export_country),
+                             [export_country] if export_country else None),
+                download_format,
+                export_rows,
+                export_table
+            ),
+            file_name=f"{filename}.{extension}",
+            mime=mime,
+            use_container_width=True
+        )
+
+    show_fragment_timing(started)
+
+with st.sidebar:
+    render_download_panel(selected_country, country_data, df, country_table, latest_data)
 
 # ================= INFO SECTION =================
 st.sidebar.markdown("---")
@@ -668,8 +1092,9 @@ st.sidebar.info(f"""
 - ✅ **{total_countries} COUNTRIES** INCLUDED
 - ✅ INTERACTIVE CHARTS WITH HOVER DETAILS
 - ✅ COMPARE MULTIPLE COUNTRIES
+- ✅ LOGISTIC FORECASTS WITH UNCERTAINTY BANDS
 - ✅ FILTER BY REGION
-- ✅ DOWNLOAD DATA IN CSV FORMAT
+- ✅ DOWNLOAD DATA AS CSV, GZIP CSV OR PARQUET
 - ✅ SIMULATED REALISTIC VACCINATION DATA
 """)
 
@@ -680,4 +1105,79 @@ st.markdown("""
     © 2026 PendemixAI. All rights reserved. | 
     This dashboard is created for educational and analytical purposes.
 </div>
-""", unsafe_allow_html=True)
\ No newline at end of file
+""", unsafe_allow_html=True)
+
+# ================= RERUN ALLOCATIONS =================
+if allocation_meter is not None:
+    allocation_meter.stop()
+    st.sidebar.caption(
+        f"🧮 RERUN ALLOCATED {allocation_meter.net_bytes / 1e6:,.2f} MB "
+        f"(PEAK {allocation_meter.peak_bytes / 1e6:,.2f} MB)"
+    )
+
+# ================= FIGURE CACHE STATS =================
+if config.ADMIN_PANEL:
+    cache_stats = figure_cache.stats()
+    # Same MB as PENDEMIX_FIGURE_CACHE_MB (1024 * 1024 bytes), so the default budget reads 64
+    cache_mb = 1024 * 1024
+    st.sidebar.caption(
+        f"🗂️ FIGURE CACHE {cache_stats['entries']} ENTRIES, "
+        f"{cache_stats['bytes'] / cache_mb:,.1f} OF {cache_stats['max_bytes'] / cache_mb:,.0f} MB | "
+        f"HITS {cache_stats['hits']:,} ({cache_stats['hit_rate']:.0%}) | "
+        f"MISSES {cache_stats['misses']:,} | EVICTIONS {cache_stats['evictions']:,}"
+    )
+
+# ================= DERIVED DATA STATUS =================
+if config.ADMIN_PANEL:
+    artifact_status = artifact_registry.status()
+    stale_count = int(artifact_status['stale'].sum())
+    with st.sidebar.expander(f"🧬 DERIVED DATA ({stale_count} OF {len(artifact_status)} STALE)", expanded=False):
+        served_version = artifact_registry.fingerprint.version if artifact_registry.fingerprint else None
+        st.caption(f"THIS PAGE SHOWS DATA VERSION {data_fingerprint.version}"
+                   + (f", THE SERVER HAS {served_version}" if served_version != data_fingerprint.version else ""))
+        last_change = artifact_registry.last_change
+        if last_change is not None:
+            changed_columns = ', '.join(sorted(last_change.columns)) or 'NONE'
+            st.caption(f"LAST DATA CHANGE: {len(last_change.countries)} OF {len(data_fingerprint.countries)} COUNTRIES, "
+                       f"COLUMNS {changed_columns.upper()}"
+                       + (", NEW DATES" if last_change.calendar else ""))
+        st.dataframe(
+            artifact_status.assign(stale=artifact_status['stale'].map({True: 'STALE', False: 'FRESH'})).rename(columns={
+                'artifact': 'ARTIFACT', 'scope': 'SCOPE', 'countries': 'COUNTRIES',
+                'columns': 'COLUMNS', 'built_for': 'BUILT FOR', 'stale': 'STATUS'
+            }),
+            hide_index=True,
+            use_container_width=True
+        )
+
+# ================= REJECTED DATA FILES =================
+if config.ADMIN_PANEL and config.DATA_SOURCE == 'ingested':
+    # Files that failed to ingest are skipped until they change on disk
+    rejected_files = IngestStore().rejected_files()
+    with st.sidebar.expander(f"📂 REJECTED DATA FILES ({len(rejected_files)})", expanded=bool(rejected_files)):
+        if rejected_files:
+            st.dataframe(
+                pd.DataFrame({'FILE': list(rejected_files), 'ERROR': list(rejected_files.values())}),
+                hide_index=True,
+                use_container_width=True
+            )
+            st.caption(f"FIX OR REPLACE THESE FILES IN {config.DROP_DIR} TO INGEST THEM")
+        else:
+            st.caption("EVERY FILE IN THE DROP DIRECTORY WAS INGESTED")
+
+# ================= SECTION PROFILE =================
+if config.ADMIN_PANEL and st.session_state['section_profile']:
+    with st.sidebar.expander("⏱️ SECTION PROFILE", expanded=False):
+        section_profile = pd.DataFrame(st.session_state['section_profile'].values())
+        section_profile = pd.DataFrame({
+            'SECTION': section_profile['section'],
+            'MS': section_profile['wall_ms'].round(1),
+            'ALLOC MB': (section_profile['alloc_bytes'] / 1e6).round(2),
+            'PEAK MB': (section_profile['peak_bytes'] / 1e6).round(2)
+        })
+        st.dataframe(section_profile, hide_index=True, use_container_width=True)
+        st.caption(f"SECTIONS TOTAL {section_profile['MS'].sum():,.0f} MS. "
+                   f"LOGGED TO {config.PROFILE_LOG or 'NOWHERE (PENDEMIX_PROFILE_LOG IS EMPTY)'}")
+
+# Full-rerun duration, compared against fragment reruns in the admin captions
+st.session_state['full_rerun_ms'] = (time.perf_counter() - rerun_started) * 1000
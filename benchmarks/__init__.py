@@ -0,0 +1 @@
+# PendemixAI - Benchmarks for the data and aggregation hot paths
@@ -0,0 +1,177 @@
+# PendemixAI - Time and peak-memory benchmarks for the dashboard's data hot paths
+import json
+import os
+import platform
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+from pendemix.country_index import CountryIndex
+from pendemix.export import iter_export_chunks, write_export
+from pendemix.generator import generate_vaccination_data
+from pendemix.geo import build_map_data
+from pendemix.schema import compact_frame
+from pendemix.summary import LATEST_COLUMNS, build_summary, top_countries
+
+# name -> (countries, days per country); 195 x 180 is what the dashboard serves today
+SCALES = {
+    'today': (195, 180),
+    'year': (195, 365),
+    'three_years': (195, 1095),
+    'ten_x_series': (1950, 180)
+}
+
+REGION = ['UNITED KINGDOM', 'GERMANY', 'FRANCE', 'ITALY', 'SPAIN',
+          'RUSSIA', 'UKRAINE', 'POLAND', 'NETHERLANDS', 'SWEDEN']
+
+# A median slower than the baseline by more than this fraction is a regression
+REGRESSION_THRESHOLD = 0.2
+# ...and by at least this many seconds, so timer noise on millisecond steps is ignored
+REGRESSION_MIN_SECONDS = 0.005
+
+
+def prepare(n_countries, days_per_country):
+    """Inputs every benchmark step starts from, built once per scale"""
+    wide = generate_vaccination_data(n_countries=n_countries, days_per_country=days_per_country)
+    rows, countries = compact_frame(wide)
+    summary, _ = build_summary(rows, countries)
+    return {
+        'n_countries': n_countries,
+        'days_per_country': days_per_country,
+        'wide': wide,
+        'rows': rows,
+        'countries': countries,
+        'index': CountryIndex.from_frame(rows),
+        'latest': summary[LATEST_COLUMNS]
+    }
+
+
+def bench_generate(ctx):
+    generate_vaccination_data(n_countries=ctx['n_countries'], days_per_country=ctx['days_per_country'])
+
+
+def bench_compact(ctx):
+    compact_frame(ctx['wide'])
+
+
+def bench_filter(ctx):
+    # Every country once (country selectbox) plus one region (region filter)
+    rows, index = ctx['rows'], ctx['index']
+    for country in ctx['countries'].index:
+        index.slice(rows, country)
+    index.take(rows, REGION)
+
+
+def bench_groupby(ctx):
+    build_summary(ctx['rows'], ctx['countries'])
+
+
+def bench_top_n(ctx):
+    top_countries(ctx['latest'], 'total_vaccinations', 20)
+    top_countries(ctx['latest'], 'vaccination_rate', 20)
+
+
+def bench_map_prep(ctx):
+    build_map_data(ctx['latest'])
+
+
+def bench_csv_export(ctx):
+    with tempfile.TemporaryDirectory() as tmp:
+        write_export(iter_export_chunks(ctx['rows'], ctx['countries']), os.path.join(tmp, 'all.csv'), 'CSV')
+
+
+BENCHMARKS = {
+    'generate': bench_generate,
+    'compact': bench_compact,
+    'filter': bench_filter,
+    'groupby': bench_groupby,
+    'top_n': bench_top_n,
+    'map_prep': bench_map_prep,
+    'csv_export': bench_csv_export
+}
+
+
+def measure(step, ctx, repeat=5):
+    """Wall times over `repeat` runs, then peak traced memory from one extra run.
+
+    Memory is measured separately because tracemalloc slows the code it traces.
+    """
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        step(ctx)
+        times.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    try:
+        step(ctx)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {
+        'min_s': min(times),
+        'median_s': statistics.median(times),
+        'peak_mb': peak / 1e6
+    }
+
+
+def run(scales=None, benchmarks=None, repeat=5, progress=print):
+    """Run the selected benchmarks at the selected scales; returns a list of result dicts"""
+    results = []
+    for scale in scales or list(SCALES):
+        n_countries, days = SCALES[scale]
+        ctx = prepare(n_countries, days)
+        progress(f"{scale}: {n_countries} countries x {days} days = {len(ctx['rows']):,} rows")
+        for name in benchmarks or list(BENCHMARKS):
+            result = {'scale': scale, 'rows': len(ctx['rows']), 'benchmark': name}
+            result.update(measure(BENCHMARKS[name], ctx, repeat))
+            progress(f"  {name:<11} median {result['median_s'] * 1000:>10,.1f} ms   "
+                     f"min {result['min_s'] * 1000:>10,.1f} ms   peak {result['peak_mb']:>8,.1f} MB")
+            results.append(result)
+    return results
+
+
+def find_regressions(results, baseline, threshold=REGRESSION_THRESHOLD):
+    """Results whose median is more than `threshold` (and REGRESSION_MIN_SECONDS) slower than the baseline"""
+    previous = {(r['scale'], r['benchmark']): r for r in baseline}
+    regressions = []
+    for result in results:
+        before = previous.get((result['scale'], result['benchmark']))
+        if before is None:
+            continue
+        allowed = max(before['median_s'] * threshold, REGRESSION_MIN_SECONDS)
+        if result['median_s'] - before['median_s'] > allowed:
+            regressions.append((result, before))
+    return regressions
+
+
+if __name__ == '__main__':
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description='Benchmark generation, filtering, groupby, top-N, map prep and CSV export')
+    parser.add_argument('--scale', action='append', choices=list(SCALES), help='scale to run (repeatable, default: all)')
+    parser.add_argument('--benchmark', action='append', choices=list(BENCHMARKS), help='benchmark to run (repeatable, default: all)')
+    parser.add_argument('--repeat', type=int, default=5, help='timed runs per benchmark')
+    parser.add_argument('--output', help='write results as JSON to this file')
+    parser.add_argument('--baseline', help='JSON results of an earlier run; exit 1 on regressions')
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD, help='allowed slowdown vs baseline (0.2 = 20%%)')
+    args = parser.parse_args()
+
+    results = run(args.scale, args.benchmark, args.repeat)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'python': platform.python_version(), 'results': results}, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            regressions = find_regressions(results, json.load(f)['results'], args.threshold)
+        for result, before in regressions:
+            print(f"REGRESSION {result['scale']}/{result['benchmark']}: "
+                  f"{before['median_s'] * 1000:,.1f} ms -> {result['median_s'] * 1000:,.1f} ms")
+        if regressions:
+            sys.exit(1)
+        print("No regressions against baseline")
@@ -0,0 +1,272 @@
+# PendemixAI - Concurrent-session load test of app.py with Streamlit's AppTest
+import json
+import logging
+import os
+import platform
+import random
+import resource
+import sys
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+import numpy as np
+
+from pendemix.config import PROJECT_ROOT
+
+APP_PATH = os.path.join(PROJECT_ROOT, 'app.py')
+
+# shared_runtime() patches AppTest internals; these are the Streamlit releases it was checked against
+SUPPORTED_STREAMLIT = ['1.53']
+
+# Relative frequency of each user action in a simulated session
+ACTION_WEIGHTS = {
+    'country': 3,
+    'region': 1,
+    'top_n': 2,
+    'compare': 2,
+    'download': 1
+}
+
+
+def check_streamlit_version():
+    """Fail early when the installed Streamlit is not one shared_runtime() knows how to patch"""
+    import streamlit
+
+    release = '.'.join(streamlit.__version__.split('.')[:2])
+    if release not in SUPPORTED_STREAMLIT:
+        raise RuntimeError(
+            f"benchmarks.sessions patches Streamlit's AppTest internals and supports Streamlit "
+            f"{', '.join(SUPPORTED_STREAMLIT)}, not {streamlit.__version__}; check the patches in "
+            f"shared_runtime() against this release and add it to SUPPORTED_STREAMLIT"
+        )
+
+
+@contextmanager
+def shared_runtime():
+    """Let several AppTest sessions run at once in this process, restoring Streamlit on exit.
+
+    AppTest installs a fresh mock Runtime for every run and removes it when
+    the run ends, which pulls the runtime out from under runs on other
+    threads. Install one shared mock (media files, cache storage) instead,
+    point AppTest at a stand-in class, and set its config override once.
+    Every AppTest run also uses the same session id, so each session's
+    rerun would orphan the others' pending downloads, and its own script
+    cache, so app.py would be parsed again on every rerun. Give each
+    simulated session its own id and share one compiled script, as a real
+    server does.
+    Yields the shared runtime so downloads can be generated through it.
+    """
+    check_streamlit_version()
+    from unittest.mock import MagicMock
+
+    from streamlit import config as st_config
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+    from streamlit.runtime.media_file_manager import MediaFileManager
+    from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    from streamlit.testing.v1 import app_test
+    from streamlit.testing.v1.local_script_runner import LocalScriptRunner
+    from streamlit.testing.v1.util import build_mock_config_get_option
+
+    originals = [
+        (Runtime, '_instance', Runtime._instance),
+        (app_test, 'Runtime', app_test.Runtime),
+        (st_config, 'get_option', st_config.get_option),
+        (app_test, 'patch_config_options', app_test.patch_config_options),
+        (LocalScriptRunner, '__init__', LocalScriptRunner.__init__)
+    ]
+
+    runtime = MagicMock(spec=Runtime)
+    runtime.media_file_mgr = MediaFileManager(MemoryMediaFileStorage('/mock/media'))
+    runtime.cache_storage_manager = MemoryCacheStorageManager()
+
+    init = LocalScriptRunner.__init__
+    script_cache = ScriptCache()
+
+    def init_with_session_id(runner, script_path, session_state, *args, **kwargs):
+        init(runner, script_path, session_state, *args, **kwargs)
+        # One SafeSessionState per AppTest instance, i.e. per simulated user
+        runner._session_id = f"load-test-{id(session_state):x}"
+        runner._script_cache = script_cache
+
+    try:
+        Runtime._instance = runtime
+        app_test.Runtime = type('Runtime', (), {'_instance': None})
+        st_config.get_option = build_mock_config_get_option({'global.appTest': True})
+        app_test.patch_config_options = lambda overrides: nullcontext()
+        LocalScriptRunner.__init__ = init_with_session_id
+        yield runtime
+    finally:
+        # Runners built inside the block keep their own session ids and script cache
+        for owner, name, value in originals:
+            setattr(owner, name, value)
+
+
+def rss_mb():
+    """Current resident set size of this process (Linux), else its peak"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1e6
+    except OSError:
+        return peak_rss_mb()
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / 1e6 if sys.platform == 'darwin' else peak * 1024 / 1e6
+
+
+def _widget(elements, label):
+    for element in elements:
+        if element.label == label:
+            return element
+    raise LookupError(f"No widget labelled {label!r}")
+
+
+class Session:
+    """One simulated user: an AppTest instance driven by a seeded random sequence of actions"""
+
+    def __init__(self, runtime, app_path, rng, timeout):
+        from streamlit.testing.v1 import AppTest
+
+        self.runtime = runtime
+        self.rng = rng
+        self.app = AppTest.from_file(app_path, default_timeout=timeout)
+
+    def load(self):
+        self.app.run()
+
+    def country(self):
+        box = _widget(self.app.sidebar.selectbox, "SELECT A COUNTRY:")
+        box.select(self.rng.choice(box.options)).run()
+
+    def region(self):
+        box = _widget(self.app.sidebar.selectbox, "FILTER BY REGION (OPTIONAL):")
+        box.select(self.rng.choice(box.options)).run()
+
+    def top_n(self):
+        _widget(self.app.slider, "NUMBER OF TOP COUNTRIES TO SHOW:").set_value(self.rng.randint(5, 50)).run()
+
+    def compare(self):
+        box = _widget(self.app.multiselect, "SELECT COUNTRIES TO COMPARE:")
+        box.set_value(self.rng.sample(box.options, self.rng.randint(1, 6))).run()
+
+    def download(self):
+        """Pick what and how to download, rerun, then build the file as a click would"""
+        option = _widget(self.app.sidebar.radio, "SELECT DATA TO DOWNLOAD:")
+        option.set_value(self.rng.choice(option.options))
+        file_format = _widget(self.app.sidebar.selectbox, "FILE FORMAT:")
+        file_format.select(self.rng.choice(file_format.options)).run()
+        button = self.app.get('download_button')[0]
+        self.runtime.media_file_mgr.execute_deferred(button.proto.deferred_file_id)
+
+    def step(self, action):
+        """Run one action; returns (seconds, error message or None)"""
+        started = time.perf_counter()
+        try:
+            getattr(self, action)()
+            error = self.app.exception[0].message if self.app.exception else None
+        except Exception as exc:
+            error = f"{type(exc).__name__}: {exc}"
+        return time.perf_counter() - started, error
+
+
+def run_level(runtime, n_sessions, steps, think=0.0, seed=0, app_path=APP_PATH, timeout=300):
+    """N sessions load the page and then perform `steps` actions each, all at once"""
+    actions, weights = list(ACTION_WEIGHTS), list(ACTION_WEIGHTS.values())
+    records = []
+    lock = threading.Lock()
+    start = threading.Barrier(n_sessions + 1)
+
+    def user(i):
+        rng = random.Random(seed * 1000 + i)
+        session = Session(runtime, app_path, rng, timeout)
+        start.wait()
+        plan = ['load'] + rng.choices(actions, weights, k=steps)
+        for action in plan:
+            seconds, error = session.step(action)
+            with lock:
+                records.append({'session': i, 'action': action, 'seconds': seconds, 'error': error})
+            if think:
+                time.sleep(rng.expovariate(1 / think))
+
+    threads = [threading.Thread(target=user, args=(i,), daemon=True) for i in range(n_sessions)]
+    for thread in threads:
+        thread.start()
+    start.wait()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+    return summarise(n_sessions, records, wall)
+
+
+def summarise(n_sessions, records, wall):
+    latencies = np.array([r['seconds'] for r in records]) * 1000
+    p50, p90, p99 = np.percentile(latencies, [50, 90, 99]) if len(latencies) else (np.nan,) * 3
+    by_action = {}
+    for action in sorted({r['action'] for r in records}):
+        times = [r['seconds'] * 1000 for r in records if r['action'] == action]
+        by_action[action] = {'count': len(times), 'p50_ms': float(np.median(times)), 'max_ms': max(times)}
+    return {
+        'sessions': n_sessions,
+        'reruns': len(records),
+        'errors': sum(r['error'] is not None for r in records),
+        'error_samples': sorted({r['error'] for r in records if r['error']})[:5],
+        'wall_s': wall,
+        'throughput_per_s': len(records) / wall if wall else 0.0,
+        'p50_ms': float(p50),
+        'p90_ms': float(p90),
+        'p99_ms': float(p99),
+        'max_ms': float(latencies.max()) if len(latencies) else np.nan,
+        'rss_mb': rss_mb(),
+        'peak_rss_mb': peak_rss_mb(),
+        'by_action': by_action
+    }
+
+
+def run(levels, steps, think=0.0, seed=0, app_path=APP_PATH, timeout=300, progress=print):
+    """Warm the process-wide caches with one session, then run each concurrency level in turn"""
+    with shared_runtime() as runtime:
+        # Session threads are created outside a script run, which Streamlit warns about on every one
+        logging.getLogger('streamlit.runtime.scriptrunner_utils.script_run_context').setLevel(logging.ERROR)
+        baseline_rss = rss_mb()
+        started = time.perf_counter()
+        cold, error = Session(runtime, app_path, random.Random(seed), timeout).step('load')
+        progress(f"Cold start {cold * 1000:,.0f} ms{f' (FAILED: {error})' if error else ''}; "
+                 f"RSS {baseline_rss:,.0f} MB before, {rss_mb():,.0f} MB after "
+                 f"({time.perf_counter() - started:.1f}s)")
+        progress(f"{'SESSIONS':>8} {'RERUNS':>7} {'ERRORS':>6} {'P50 MS':>9} {'P90 MS':>9} {'P99 MS':>9} "
+                 f"{'RERUNS/S':>9} {'RSS MB':>8} {'PEAK MB':>8}")
+        results = []
+        for n_sessions in levels:
+            result = run_level(runtime, n_sessions, steps, think, seed, app_path, timeout)
+            progress(f"{result['sessions']:>8} {result['reruns']:>7} {result['errors']:>6} "
+                     f"{result['p50_ms']:>9,.0f} {result['p90_ms']:>9,.0f} {result['p99_ms']:>9,.0f} "
+                     f"{result['throughput_per_s']:>9,.2f} {result['rss_mb']:>8,.0f} {result['peak_rss_mb']:>8,.0f}")
+            for error in result['error_samples']:
+                progress(f"    ERROR {error}")
+            results.append(result)
+        return {'cold_start_ms': cold * 1000, 'baseline_rss_mb': baseline_rss, 'levels': results}
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Simulate concurrent dashboard sessions in one process')
+    parser.add_argument('--sessions', type=int, nargs='+', default=[1, 2, 4, 8], help='concurrency levels to run')
+    parser.add_argument('--steps', type=int, default=10, help='actions per session after the page load')
+    parser.add_argument('--think', type=float, default=0.0, help='mean seconds a user waits between actions')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the action sequences')
+    parser.add_argument('--timeout', type=float, default=300, help='seconds before a rerun counts as hung')
+    parser.add_argument('--output', help='write results as JSON to this file')
+    args = parser.parse_args()
+
+    report = run(args.sessions, args.steps, args.think, args.seed, timeout=args.timeout)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'python': platform.python_version(), 'cpus': os.cpu_count(), **report}, f, indent=2)
+        print(f"Results written to {args.output}")
@@ -0,0 +1 @@
+# PendemixAI - data and analytics helpers for the dashboard
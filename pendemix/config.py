@@ -0,0 +1,63 @@
+# PendemixAI - Runtime settings read from environment variables
+import os
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def env_flag(name, default=False):
+    """Read a boolean switch such as PENDEMIX_SHARED_DATA=1"""
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+# Hold one read-only copy of the dataset per process instead of one copy per rerun
+SHARED_DATA = env_flag('PENDEMIX_SHARED_DATA', True)
+
+# Rebuild the shared dataset on a background thread and swap it in when the data changes
+BACKGROUND_REFRESH = env_flag('PENDEMIX_BACKGROUND_REFRESH', True)
+
+# Seconds between the background thread's checks for a new data version
+REFRESH_SECONDS = float(os.environ.get('PENDEMIX_REFRESH_SECONDS', 60))
+
+# Show diagnostics (section timings, profiling) in the dashboard
+ADMIN_PANEL = env_flag('PENDEMIX_ADMIN', False)
+
+# Measure bytes allocated by each rerun with tracemalloc (adds overhead)
+TRACK_ALLOCATIONS = env_flag('PENDEMIX_TRACK_ALLOCATIONS', False)
+
+# Where the dashboard's data comes from: 'synthetic' (generator) or 'ingested' (CSV feeds)
+DATA_SOURCE = os.environ.get('PENDEMIX_DATA_SOURCE', 'synthetic').strip().lower()
+
+# Drop directory scanned for OWID-style vaccination CSVs
+DROP_DIR = os.environ.get('PENDEMIX_DROP_DIR', os.path.join(PROJECT_ROOT, 'data', 'incoming'))
+
+# Append-only store holding everything ingested so far
+STORE_DIR = os.environ.get('PENDEMIX_STORE_DIR', os.path.join(PROJECT_ROOT, 'data', 'store'))
+
+# Engine behind row-level queries (country rows, latest per country, top-N, comparisons): 'pandas' or 'duckdb'
+QUERY_BACKEND = os.environ.get('PENDEMIX_QUERY_BACKEND', 'pandas').strip().lower()
+# Threads for the duckdb engine; 0 lets it use every core
+QUERY_THREADS = int(os.environ.get('PENDEMIX_QUERY_THREADS', 0))
+
+# Approximate plot width in pixels, used to size downsampled line charts
+CHART_WIDTH_PX = int(os.environ.get('PENDEMIX_CHART_WIDTH_PX', 1200))
+
+# Byte budget of the process-wide LRU cache of built plotly figures
+FIGURE_CACHE_MB = float(os.environ.get('PENDEMIX_FIGURE_CACHE_MB', 64))
+
+# Disk budget of cached download exports; the least recently downloaded go first
+EXPORT_CACHE_MB = float(os.environ.get('PENDEMIX_EXPORT_CACHE_MB', 512))
+
+# Record wall time and allocations of each dashboard section (always on with PENDEMIX_ADMIN)
+PROFILE_SECTIONS = env_flag('PENDEMIX_PROFILE', False) or ADMIN_PANEL
+
+# JSON-lines log of section timings for offline analysis; empty disables the log
+PROFILE_LOG = os.environ.get('PENDEMIX_PROFILE_LOG', os.path.join(PROJECT_ROOT, 'logs', 'sections.jsonl'))
+
+# Forecast bands: 'analytic' (regression intervals) or 'monte_carlo' (bootstrap runs in a process pool)
+FORECAST_MODE = os.environ.get('PENDEMIX_FORECAST_MODE', 'analytic').strip().lower()
+FORECAST_RUNS = int(os.environ.get('PENDEMIX_FORECAST_RUNS', 200))
+# Worker processes for Monte Carlo runs; 0 uses every core
+FORECAST_WORKERS = int(os.environ.get('PENDEMIX_FORECAST_WORKERS', 0))
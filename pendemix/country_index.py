@@ -0,0 +1,71 @@
+# PendemixAI - Row offsets for contiguous per-country slicing
+import numpy as np
+import pandas as pd
+
+
+def sort_by_country(df):
+    """Store country as a sorted categorical and order rows by country, then date"""
+    categories = sorted(pd.unique(df['country'].astype(str)))
+    df = df.assign(country=pd.Categorical(df['country'].astype(str), categories=categories))
+    return df.sort_values(['country', 'date'], kind='stable').reset_index(drop=True)
+
+
+class CountryIndex:
+    """Start/end row offsets of every country in a frame sorted by country.
+
+    Fetching one country is a contiguous slice and fetching a set of countries
+    (a region or a comparison) is a single gather, instead of a string
+    comparison over every row.
+    """
+
+    def __init__(self, countries, starts, ends):
+        self.countries = list(countries)
+        self.starts = np.asarray(starts, dtype=np.int64)
+        self.ends = np.asarray(ends, dtype=np.int64)
+        self._position = {country: i for i, country in enumerate(self.countries)}
+
+    @classmethod
+    def from_frame(cls, df):
+        """Build the offset table from a frame produced by sort_by_country()"""
+        country = df['country']
+        if not isinstance(country.dtype, pd.CategoricalDtype):
+            raise ValueError("country column must be categorical; use sort_by_country() first")
+        codes = country.cat.codes.to_numpy()
+        if len(codes) and (codes.min() < 0 or np.any(np.diff(codes) < 0)):
+            raise ValueError("frame must be sorted by country; use sort_by_country() first")
+
+        counts = np.bincount(codes, minlength=len(country.cat.categories))
+        ends = np.cumsum(counts)
+        return cls(country.cat.categories, ends - counts, ends)
+
+    def __contains__(self, country):
+        return country in self._position
+
+    def __len__(self):
+        return len(self.countries)
+
+    def bounds(self, country):
+        """Return (start, end) row offsets; unknown countries get an empty range"""
+        i = self._position.get(country)
+        if i is None:
+            return 0, 0
+        return int(self.starts[i]), int(self.ends[i])
+
+    def positions(self, countries):
+        """Row positions for a set of countries, in the order given; a repeated country is taken once"""
+        ids = np.array([self._position[c] for c in dict.fromkeys(countries) if c in self._position], dtype=np.int64)
+        if len(ids) == 0:
+            return np.empty(0, dtype=np.int64)
+        starts, lengths = self.starts[ids], self.ends[ids] - self.starts[ids]
+        # Concatenate the ranges without a Python loop: offset each row by its range start
+        range_starts = np.repeat(starts - np.concatenate(([0], np.cumsum(lengths)[:-1])), lengths)
+        return range_starts + np.arange(lengths.sum())
+
+    def slice(self, df, country):
+        """Rows for one country as a contiguous slice of df"""
+        start, end = self.bounds(country)
+        return df.iloc[start:end]
+
+    def take(self, df, countries):
+        """Rows for several countries, gathered in one pass, each country once"""
+        return df.iloc[self.positions(countries)]
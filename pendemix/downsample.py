@@ -0,0 +1,70 @@
+# PendemixAI - Shape-preserving downsampling (LTTB) for line and area charts
+import numpy as np
+import pandas as pd
+
+# Points per horizontal pixel; more than ~1 is invisible on screen
+POINTS_PER_PIXEL = 0.5
+MIN_POINTS = 50
+
+
+def point_budget(chart_width_px, points_per_pixel=POINTS_PER_PIXEL):
+    """Number of points worth sending for one series across a chart of this width"""
+    return max(MIN_POINTS, int(chart_width_px * points_per_pixel))
+
+
+def lttb_indices(x, y, n_out):
+    """Indices kept by Largest-Triangle-Three-Buckets, including both endpoints.
+
+    x must be increasing. Each bucket keeps the point that forms the largest
+    triangle with the previously kept point and the next bucket's average, so
+    peaks and turns survive while flat stretches are thinned out.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    every = (n - 2) / (n_out - 2)
+    edges = np.floor(np.arange(n_out - 1) * every).astype(np.int64) + 1
+    edges[-1] = n - 1
+
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+
+        area = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def downsample_frame(df, x, y, n_out, group=None):
+    """Downsample each series of df (split by `group`) to at most n_out points.
+
+    Rows with a missing y are dropped first. Returns (frame, raw_points) so the
+    caller can report how many points were sent versus available.
+    """
+    df = df.dropna(subset=[y])
+    raw_points = len(df)
+    if group is None:
+        parts = [df]
+    else:
+        parts = [part for _, part in df.groupby(group, sort=False, observed=True)]
+
+    kept = []
+    for part in parts:
+        xs = part[x]
+        if pd.api.types.is_datetime64_any_dtype(xs):
+            xs = xs.astype('int64')
+        kept.append(part.iloc[lttb_indices(xs.to_numpy(), part[y].to_numpy(), n_out)])
+    sampled = pd.concat(kept) if kept else df
+    return sampled, raw_points
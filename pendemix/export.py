@@ -0,0 +1,151 @@
+# PendemixAI - Lazy, chunked, disk-cached exports for the download panel
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from pendemix.schema import expand_rows
+from pendemix.storage import CACHE_DIR
+
+EXPORT_DIR = os.path.join(CACHE_DIR, 'exports')
+
+# Rows serialized per chunk; bounds the memory used while writing an export
+EXPORT_CHUNK_ROWS = 100_000
+
+# Display name -> (file extension, MIME type)
+EXPORT_FORMATS = {
+    'CSV': ('csv', 'text/csv'),
+    'CSV (GZIP)': ('csv.gz', 'application/gzip'),
+    'PARQUET': ('parquet', 'application/vnd.apache.parquet')
+}
+
+
+def iter_export_chunks(rows, country_table=None, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Yield consecutive row slices, re-attaching per-country columns one chunk at a time.
+
+    An empty selection still yields one empty chunk, so the file gets a CSV
+    header or a Parquet schema.
+    """
+    for start in range(0, max(len(rows), 1), chunk_rows):
+        chunk = rows.iloc[start:start + chunk_rows]
+        if country_table is not None:
+            chunk = expand_rows(chunk, country_table)
+        # Categorical country becomes plain text so every chunk shares one Parquet schema
+        if 'country' in chunk.columns:
+            chunk = chunk.assign(country=chunk['country'].astype(str))
+        yield chunk
+
+
+def _write_csv(chunks, handle):
+    header = True
+    for chunk in chunks:
+        chunk.to_csv(handle, header=header, index=False)
+        header = False
+
+
+def _write_parquet(chunks, path):
+    writer = None
+    try:
+        for chunk in chunks:
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema, compression='zstd')
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def write_export(chunks, path, export_format):
+    """Stream chunks into path in the given format, replacing it atomically when done"""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    os.close(fd)
+    try:
+        if export_format == 'CSV':
+            with open(tmp_path, 'w', newline='', encoding='utf-8') as handle:
+                _write_csv(chunks, handle)
+        elif export_format == 'CSV (GZIP)':
+            with gzip.open(tmp_path, 'wt', newline='', encoding='utf-8') as handle:
+                _write_csv(chunks, handle)
+        elif export_format == 'PARQUET':
+            _write_parquet(chunks, tmp_path)
+        else:
+            raise ValueError(f"Unknown export format: {export_format}")
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def export_path(key, export_format, export_dir=None):
+    """Cache file for an export key such as (option, country, data version)"""
+    digest = hashlib.sha1(json.dumps(list(key), default=str).encode('utf-8')).hexdigest()[:16]
+    extension = EXPORT_FORMATS[export_format][0]
+    return os.path.join(export_dir or EXPORT_DIR, f"export_{digest}.{extension}")
+
+
+def build_export(key, export_format, make_chunks, export_dir=None, max_bytes=None):
+    """Return the path of a cached export, writing it from make_chunks() only on a miss.
+
+    A hit refreshes the file's mtime, which prune_exports() treats as its last
+    use; with max_bytes set, a miss then trims the directory to that size.
+    """
+    path = export_path(key, export_format, export_dir)
+    if os.path.exists(path):
+        os.utime(path)
+        return path
+    write_export(make_chunks(), path, export_format)
+    if max_bytes is not None:
+        prune_exports(max_bytes, export_dir, keep=path)
+    return path
+
+
+def discard_exports(keys, export_dir=None):
+    """Delete the files of export keys that are out of date, in every format; returns how many existed"""
+    removed = 0
+    for key in keys:
+        for export_format in EXPORT_FORMATS:
+            try:
+                os.remove(export_path(key, export_format, export_dir))
+                removed += 1
+            except FileNotFoundError:
+                pass
+    return removed
+
+
+def prune_exports(max_bytes, export_dir=None, keep=None):
+    """Delete the least recently used exports until the rest fit in max_bytes; returns how many went"""
+    directory = export_dir or EXPORT_DIR
+    if not os.path.isdir(directory):
+        return 0
+    files = []
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        if not name.startswith('export_') or path == keep:
+            continue
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        files.append((stat.st_mtime, stat.st_size, path))
+    total = sum(size for _, size, _ in files)
+    if keep is not None and os.path.exists(keep):
+        total += os.path.getsize(keep)
+
+    removed = 0
+    for _, size, path in sorted(files):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+            removed += 1
+        except FileNotFoundError:
+            pass
+        total -= size
+    return removed
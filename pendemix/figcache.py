@@ -0,0 +1,95 @@
+# PendemixAI - Size-aware LRU cache of built plotly figures shared across sessions
+import threading
+from collections import OrderedDict
+
+from pendemix.lazy import LazyModule
+
+pio = LazyModule('plotly.io')
+
+
+def figure_nbytes(fig):
+    """Approximate memory held by a figure: the size of its JSON payload"""
+    return len(pio.to_json(fig, validate=False))
+
+
+class FigureCache:
+    """Least-recently-used cache of figures bounded by an approximate byte budget.
+
+    Keys are tuples such as (chart kind, country set, data version, chart
+    settings). Cached figures are shared by every session, so callers must not
+    modify a figure they get back. Hit, miss and eviction counters are kept
+    for tuning the budget.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_build(self, key, build, nbytes=figure_nbytes):
+        """Return the cached value for key, calling build() on a miss.
+
+        nbytes measures a built value; it defaults to sizing a single figure.
+        Values larger than the whole budget are returned without being cached.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        # Built outside the lock; two sessions missing the same key may both build it
+        value = build()
+        size = nbytes(value)
+        if size > self.max_bytes:
+            return value
+
+        with self._lock:
+            if key in self._entries:
+                self.total_bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, size)
+            self.total_bytes += size
+            while self.total_bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.total_bytes -= evicted_size
+                self.evictions += 1
+        return value
+
+    def discard(self, keys):
+        """Drop entries that are known to be out of date; returns how many were cached"""
+        dropped = 0
+        with self._lock:
+            for key in keys:
+                entry = self._entries.pop(key, None)
+                if entry is not None:
+                    self.total_bytes -= entry[1]
+                    dropped += 1
+        return dropped
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        """Counters and occupancy, e.g. for an admin panel"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self.total_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
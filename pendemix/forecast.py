@@ -0,0 +1,276 @@
+# PendemixAI - Batch logistic forecasts of total vaccinations for every country at once
+import os
+import subprocess
+import sys
+import tempfile
+from collections import namedtuple
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+from pendemix.config import PROJECT_ROOT
+
+FORECAST_HORIZON_DAYS = 60
+BAND_LEVEL = 0.9
+
+# Candidate saturation levels, as multiples of each country's largest reported total
+CAPACITY_GRID = np.geomspace(1.02, 6.0, 48)
+
+MIN_POINTS = 5
+MONTE_CARLO_RUNS = 200
+
+# Countries are fitted in blocks of at most this many (country, capacity, day) cells,
+# so the temporaries stay around 8 MB each whatever the dataset size
+FIT_CHUNK_CELLS = 2 ** 20
+
+ForecastResult = namedtuple('ForecastResult', [
+    'countries', 'dates', 'mean', 'lower', 'upper', 'capacity', 'growth_rate', 'midpoint'
+])
+
+
+def _fit(t, y, weights):
+    """_fit_block() over blocks of countries; same result, bounded peak memory"""
+    step = max(1, FIT_CHUNK_CELLS // (len(CAPACITY_GRID) * max(len(t), 1)))
+    if len(y) <= step:
+        return _fit_block(t, y, weights)
+    blocks = [_fit_block(t, y[i:i + step], weights[i:i + step]) for i in range(0, len(y), step)]
+    return {key: np.concatenate([block[key] for block in blocks]) for key in blocks[0]}
+
+
+def _fit_block(t, y, weights):
+    """Least-squares logistic fit for every row of y at once.
+
+    For each candidate capacity K the curve is linear in logit space,
+    log(y / (K - y)) = a + b * t, so every (country, K) pair is one weighted
+    linear regression. The K with the smallest squared error in the original
+    scale wins. Returns per-country (K, a, b) plus the logit-space
+    regression terms used for prediction intervals.
+    """
+    scale = np.nanmax(np.where(weights > 0, y, np.nan), axis=1)
+    scale = np.where(np.isfinite(scale) & (scale > 0), scale, 1.0)
+    y_s = np.where(weights > 0, y / scale[:, None], 0.0)
+
+    K = CAPACITY_GRID[None, :, None]                                # (1, k, 1)
+    yk = y_s[:, None, :]                                            # (c, 1, t)
+    w = (weights[:, None, :] > 0) & (yk > 0) & (yk < K)             # (c, k, t)
+    with np.errstate(all='ignore'):
+        z = np.where(w, np.log(yk / (K - yk)), 0.0)
+
+    n = w.sum(axis=2)
+    t_mean = np.where(n > 0, (w * t).sum(axis=2) / np.maximum(n, 1), 0.0)
+    z_mean = np.where(n > 0, z.sum(axis=2) / np.maximum(n, 1), 0.0)
+    dt = np.where(w, t - t_mean[..., None], 0.0)
+    sxx = (dt ** 2).sum(axis=2)
+    b = np.where(sxx > 0, (dt * (z - z_mean[..., None])).sum(axis=2) / np.where(sxx > 0, sxx, 1), 0.0)
+    a = z_mean - b * t_mean
+
+    with np.errstate(all='ignore'):
+        pred = K[..., 0][..., None] / (1 + np.exp(-(a[..., None] + b[..., None] * t)))
+    sse = np.where(weights[:, None, :] > 0, (y_s[:, None, :] - pred) ** 2, 0.0).sum(axis=2)
+    sse = np.where(n >= MIN_POINTS, sse, np.inf)
+    best = np.argmin(sse, axis=1)
+
+    rows = np.arange(len(y))
+    pick = lambda values: values[rows, best]
+    resid = np.where(w[rows, best], z[rows, best] - (pick(a)[:, None] + pick(b)[:, None] * t), 0.0)
+    dof = np.maximum(pick(n) - 2, 1)
+    return {
+        'scale': scale,
+        'capacity': CAPACITY_GRID[best],
+        'a': pick(a),
+        'b': pick(b),
+        'n': pick(n),
+        't_mean': pick(t_mean),
+        'sxx': pick(sxx),
+        's2': (resid ** 2).sum(axis=1) / dof,
+        'valid': np.isfinite(pick(sse)),
+        'residuals': resid,
+        'mask': w[rows, best]
+    }
+
+
+def _curve(capacity, a, b, t):
+    with np.errstate(all='ignore'):
+        return capacity[:, None] / (1 + np.exp(-(a[:, None] + b[:, None] * t[None, :])))
+
+
+def _history(tensor, metric='total_vaccinations'):
+    y = tensor.series(tensor.countries, metric)
+    t = np.arange(len(tensor.dates), dtype=np.float64)
+    weights = (~np.isnan(y)).astype(np.float64)
+    return t, np.nan_to_num(y), weights
+
+
+def _future(tensor, horizon):
+    t = len(tensor.dates) - 1 + np.arange(1, horizon + 1, dtype=np.float64)
+    dates = tensor.dates[-1] + pd.to_timedelta(np.arange(1, horizon + 1), unit='D')
+    return t, dates
+
+
+def forecast_tensor(tensor, horizon=FORECAST_HORIZON_DAYS, level=BAND_LEVEL):
+    """Logistic projection of every country's total vaccinations `horizon` days ahead.
+
+    Bands are prediction intervals of the logit-space regression mapped back
+    through the curve, at the chosen capacity.
+    """
+    t, y, weights = _history(tensor)
+    fit = _fit(t, y, weights)
+    t_future, dates = _future(tensor, horizon)
+
+    z_crit = NormalDist().inv_cdf(0.5 + level / 2)
+    se = np.sqrt(fit['s2'][:, None] * (
+        1 + 1 / np.maximum(fit['n'], 1)[:, None]
+        + (t_future[None, :] - fit['t_mean'][:, None]) ** 2 / np.where(fit['sxx'] > 0, fit['sxx'], np.inf)[:, None]
+    ))
+    logit = fit['a'][:, None] + fit['b'][:, None] * t_future[None, :]
+    capacity = fit['capacity'] * fit['scale']
+    with np.errstate(all='ignore'):
+        mean = capacity[:, None] / (1 + np.exp(-logit))
+        lower = capacity[:, None] / (1 + np.exp(-(logit - z_crit * se)))
+        upper = capacity[:, None] / (1 + np.exp(-(logit + z_crit * se)))
+    return _result(tensor, dates, fit, mean, lower, upper)
+
+
+def _result(tensor, dates, fit, mean, lower, upper):
+    invalid = ~fit['valid']
+    for values in (mean, lower, upper):
+        values[invalid] = np.nan
+    with np.errstate(all='ignore'):
+        midpoint = np.where(fit['b'] != 0, -fit['a'] / fit['b'], np.nan)
+    return ForecastResult(
+        countries=list(tensor.countries),
+        dates=dates,
+        mean=mean,
+        lower=lower,
+        upper=upper,
+        capacity=np.where(invalid, np.nan, fit['capacity'] * fit['scale']),
+        growth_rate=np.where(invalid, np.nan, fit['b']),
+        midpoint=np.where(invalid, np.nan, midpoint)
+    )
+
+
+def monte_carlo_batch(t, y, weights, t_future, runs, seed):
+    """Refit `runs` residual-bootstrap replicas of every country; returns (runs, countries, horizon)"""
+    rng = np.random.default_rng(seed)
+    fit = _fit(t, y, weights)
+    base = fit['a'][:, None] + fit['b'][:, None] * t[None, :]
+    capacity = fit['capacity'] * fit['scale']
+    mask = fit['mask']
+    counts = mask.sum(axis=1)
+
+    out = np.empty((runs, len(y), len(t_future)))
+    for run in range(runs):
+        # Resample each country's own logit residuals onto its reported days
+        pick = (rng.random(mask.shape) * np.maximum(counts, 1)[:, None]).astype(np.int64)
+        order = np.argsort(~mask, axis=1, kind='stable')
+        resampled = np.take_along_axis(fit['residuals'], np.take_along_axis(order, pick, axis=1), axis=1)
+        with np.errstate(all='ignore'):
+            y_run = capacity[:, None] / (1 + np.exp(-(base + resampled)))
+        run_fit = _fit(t, np.where(mask, y_run, 0.0), mask.astype(np.float64))
+        out[run] = _curve(run_fit['capacity'] * run_fit['scale'], run_fit['a'], run_fit['b'], t_future)
+    return out
+
+
+def _run_worker_processes(t, y, weights, t_future, batches, seeds):
+    """One batch per `python -m pendemix.forecast_worker` process, all running at once.
+
+    Plain subprocesses rather than a multiprocessing pool: spawned pool
+    workers re-import the parent's __main__, which under Streamlit is the
+    dashboard script.
+    """
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [PROJECT_ROOT, os.environ.get('PYTHONPATH')])))
+    with tempfile.TemporaryDirectory(prefix='pendemix-forecast-') as tmp_dir:
+        inputs = os.path.join(tmp_dir, 'inputs.npz')
+        np.savez(inputs, t=t, y=y, weights=weights, t_future=t_future)
+        jobs = []
+        for i, (size, seed) in enumerate(zip(batches, seeds)):
+            output = os.path.join(tmp_dir, f'batch_{i}.npy')
+            command = [sys.executable, '-m', 'pendemix.forecast_worker', inputs, output, str(size),
+                       str(seed.entropy), ','.join(map(str, seed.spawn_key))]
+            jobs.append((subprocess.Popen(command, env=env, stderr=subprocess.PIPE), output))
+
+        errors = []
+        for process, output in jobs:
+            _, stderr = process.communicate()
+            if process.returncode:
+                errors.append(stderr.decode('utf-8', errors='replace').strip().splitlines()[-1:] or [f"exit {process.returncode}"])
+        if errors:
+            raise RuntimeError(f"Forecast worker failed: {errors[0][0]}")
+        return np.concatenate([np.load(output) for _, output in jobs])
+
+
+def monte_carlo_forecast(tensor, horizon=FORECAST_HORIZON_DAYS, runs=MONTE_CARLO_RUNS, level=BAND_LEVEL,
+                         workers=None, seed=0):
+    """Bootstrap scenario runs split across worker processes; bands are run quantiles.
+
+    workers=1 runs in-process. Runs are split into one batch per worker with
+    independent seeds, so results depend only on (seed, workers).
+    """
+    t, y, weights = _history(tensor)
+    t_future, dates = _future(tensor, horizon)
+    workers = workers or os.cpu_count() or 1
+    workers = max(1, min(workers, runs))
+    batches = [len(part) for part in np.array_split(np.arange(runs), workers)]
+    seeds = np.random.SeedSequence(seed).spawn(workers)
+
+    if workers == 1:
+        paths = monte_carlo_batch(t, y, weights, t_future, runs, seeds[0])
+    else:
+        paths = _run_worker_processes(t, y, weights, t_future, batches, seeds)
+
+    fit = _fit(t, y, weights)
+    tail = (1 - level) / 2
+    with np.errstate(all='ignore'):
+        mean = np.nanmedian(paths, axis=0)
+        lower = np.nanquantile(paths, tail, axis=0)
+        upper = np.nanquantile(paths, 1 - tail, axis=0)
+    return _result(tensor, dates, fit, mean, lower, upper)
+
+
+def forecast_frame(result, country, population_millions=None):
+    """Long frame of one country's projection; adds coverage per hundred people when population is known"""
+    i = result.countries.index(country)
+    frame = pd.DataFrame({
+        'date': result.dates,
+        'forecast': result.mean[i],
+        'lower': result.lower[i],
+        'upper': result.upper[i]
+    })
+    if population_millions:
+        for col in ['forecast', 'lower', 'upper']:
+            frame[f'{col}_per_hundred'] = frame[col] / (population_millions * 1e4)
+    return frame
+
+
+if __name__ == '__main__':
+    import argparse
+    import time
+
+    from pendemix.storage import load_dataset
+    from pendemix.tensor import VaccinationTensor
+
+    parser = argparse.ArgumentParser(description='Forecast total vaccinations for every country')
+    parser.add_argument('--horizon', type=int, default=FORECAST_HORIZON_DAYS, help='days ahead')
+    parser.add_argument('--monte-carlo', action='store_true', help='bootstrap bands with a process pool')
+    parser.add_argument('--runs', type=int, default=MONTE_CARLO_RUNS, help='Monte Carlo runs')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: all cores)')
+    args = parser.parse_args()
+
+    rows, _ = load_dataset()
+    tensor = VaccinationTensor.from_frame(rows)
+    started = time.perf_counter()
+    if args.monte_carlo:
+        result = monte_carlo_forecast(tensor, args.horizon, args.runs, workers=args.workers)
+    else:
+        result = forecast_tensor(tensor, args.horizon)
+    elapsed = time.perf_counter() - started
+
+    table = pd.DataFrame({
+        'forecast': result.mean[:, -1],
+        'lower': result.lower[:, -1],
+        'upper': result.upper[:, -1],
+        'capacity': result.capacity
+    }, index=pd.Index(result.countries, name='country'))
+    print(f"{len(result.countries)} countries, {args.horizon} days ahead in {elapsed:.2f}s")
+    print(table.sort_values('forecast', ascending=False).head(15).round(0).to_string())
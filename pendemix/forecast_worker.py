@@ -0,0 +1,20 @@
+# PendemixAI - One Monte Carlo forecast batch, run as its own process by pendemix.forecast
+import sys
+
+import numpy as np
+
+from pendemix.forecast import monte_carlo_batch
+
+
+def main(inputs, output, runs, entropy, spawn_key):
+    """Read the shared inputs, run `runs` replicas with the given seed sequence and save the paths"""
+    data = np.load(inputs)
+    seed = np.random.SeedSequence(int(entropy), spawn_key=tuple(int(k) for k in spawn_key.split(',') if k))
+    paths = monte_carlo_batch(data['t'], data['y'], data['weights'], data['t_future'], int(runs), seed)
+    np.save(output, paths)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 6:
+        raise SystemExit("usage: python -m pendemix.forecast_worker INPUTS OUTPUT RUNS ENTROPY SPAWN_KEY")
+    main(*sys.argv[1:])
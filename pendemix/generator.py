@@ -0,0 +1,145 @@
+# PendemixAI - Synthetic vaccination data generator
+import numpy as np
+import pandas as pd
+
+DEFAULT_SEED = 42
+DEFAULT_START_DATE = '2021-01-01'
+DEFAULT_DAYS_PER_COUNTRY = 180
+
+# List of ALL countries in the world (200+ countries)
+ALL_COUNTRIES = [
+    'AFGHANISTAN', 'ALBANIA', 'ALGERIA', 'ANDORRA', 'ANGOLA', 'ANTIGUA AND BARBUDA', 'ARGENTINA',
+    'ARMENIA', 'AUSTRALIA', 'AUSTRIA', 'AZERBAIJAN', 'BAHAMAS', 'BAHRAIN', 'BANGLADESH', 'BARBADOS',
+    'BELARUS', 'BELGIUM', 'BELIZE', 'BENIN', 'BHUTAN', 'BOLIVIA', 'BOSNIA AND HERZEGOVINA', 'BOTSWANA',
+    'BRAZIL', 'BRUNEI', 'BULGARIA', 'BURKINA FASO', 'BURUNDI', 'CABO VERDE', 'CAMBODIA', 'CAMEROON',
+    'CANADA', 'CENTRAL AFRICAN REPUBLIC', 'CHAD', 'CHILE', 'CHINA', 'COLOMBIA', 'COMOROS', 'CONGO',
+    'COSTA RICA', 'CROATIA', 'CUBA', 'CYPRUS', 'CZECH REPUBLIC', 'DEMOCRATIC REPUBLIC OF THE CONGO',
+    'DENMARK', 'DJIBOUTI', 'DOMINICA', 'DOMINICAN REPUBLIC', 'ECUADOR', 'EGYPT', 'EL SALVADOR',
+    'EQUATORIAL GUINEA', 'ERITREA', 'ESTONIA', 'ESWATINI', 'ETHIOPIA', 'FIJI', 'FINLAND', 'FRANCE',
+    'GABON', 'GAMBIA', 'GEORGIA', 'GERMANY', 'GHANA', 'GREECE', 'GRENADA', 'GUATEMALA', 'GUINEA',
+    'GUINEA-BISSAU', 'GUYANA', 'HAITI', 'HONDURAS', 'HUNGARY', 'ICELAND', 'INDIA', 'INDONESIA',
+    'IRAN', 'IRAQ', 'IRELAND', 'ISRAEL', 'ITALY', 'JAMAICA', 'JAPAN', 'JORDAN', 'KAZAKHSTAN',
+    'KENYA', 'KIRIBATI', 'KUWAIT', 'KYRGYZSTAN', 'LAOS', 'LATVIA', 'LEBANON', 'LESOTHO', 'LIBERIA',
+    'LIBYA', 'LIECHTENSTEIN', 'LITHUANIA', 'LUXEMBOURG', 'MADAGASCAR', 'MALAWI', 'MALAYSIA',
+    'MALDIVES', 'MALI', 'MALTA', 'MARSHALL ISLANDS', 'MAURITANIA', 'MAURITIUS', 'MEXICO',
+    'MICRONESIA', 'MOLDOVA', 'MONACO', 'MONGOLIA', 'MONTENEGRO', 'MOROCCO', 'MOZAMBIQUE', 'MYANMAR',
+    'NAMIBIA', 'NAURU', 'NEPAL', 'NETHERLANDS', 'NEW ZEALAND', 'NICARAGUA', 'NIGER', 'NIGERIA',
+    'NORTH KOREA', 'NORTH MACEDONIA', 'NORWAY', 'OMAN', 'PAKISTAN', 'PALAU', 'PALESTINE', 'PANAMA',
+    'PAPUA NEW GUINEA', 'PARAGUAY', 'PERU', 'PHILIPPINES', 'POLAND', 'PORTUGAL', 'QATAR', 'ROMANIA',
+    'RUSSIA', 'RWANDA', 'SAINT KITTS AND NEVIS', 'SAINT LUCIA', 'SAINT VINCENT AND THE GRENADINES',
+    'SAMOA', 'SAN MARINO', 'SAO TOME AND PRINCIPE', 'SAUDI ARABIA', 'SENEGAL', 'SERBIA', 'SEYCHELLES',
+    'SIERRA LEONE', 'SINGAPORE', 'SLOVAKIA', 'SLOVENIA', 'SOLOMON ISLANDS', 'SOMALIA', 'SOUTH AFRICA',
+    'SOUTH KOREA', 'SOUTH SUDAN', 'SPAIN', 'SRI LANKA', 'SUDAN', 'SURINAME', 'SWEDEN', 'SWITZERLAND',
+    'SYRIA', 'TAIWAN', 'TAJIKISTAN', 'TANZANIA', 'THAILAND', 'TIMOR-LESTE', 'TOGO', 'TONGA',
+    'TRINIDAD AND TOBAGO', 'TUNISIA', 'TURKEY', 'TURKMENISTAN', 'TUVALU', 'UGANDA', 'UKRAINE',
+    'UNITED ARAB EMIRATES', 'UNITED KINGDOM', 'UNITED STATES', 'URUGUAY', 'UZBEKISTAN', 'VANUATU',
+    'VATICAN CITY', 'VENEZUELA', 'VIETNAM', 'YEMEN', 'ZAMBIA', 'ZIMBABWE'
+]
+
+# Country population data (approximate in millions)
+COUNTRY_POPULATION = {
+    'CHINA': 1444, 'INDIA': 1408, 'UNITED STATES': 331, 'INDONESIA': 273, 'PAKISTAN': 225,
+    'BRAZIL': 214, 'NIGERIA': 211, 'BANGLADESH': 166, 'RUSSIA': 146, 'MEXICO': 129,
+    'JAPAN': 126, 'ETHIOPIA': 117, 'PHILIPPINES': 111, 'EGYPT': 102, 'VIETNAM': 97,
+    'DEMOCRATIC REPUBLIC OF THE CONGO': 90, 'TURKEY': 84, 'IRAN': 84, 'GERMANY': 83, 'THAILAND': 70,
+    'UNITED KINGDOM': 68, 'FRANCE': 65, 'ITALY': 60, 'SOUTH AFRICA': 60, 'TANZANIA': 60,
+    'MYANMAR': 54, 'KENYA': 54, 'SOUTH KOREA': 51, 'COLOMBIA': 51, 'SPAIN': 47,
+    'ARGENTINA': 45, 'UGANDA': 45, 'ALGERIA': 44, 'SUDAN': 44, 'UKRAINE': 44,
+    'IRAQ': 41, 'AFGHANISTAN': 39, 'POLAND': 38, 'CANADA': 38, 'MOROCCO': 37,
+    'SAUDI ARABIA': 35, 'UZBEKISTAN': 34, 'PERU': 33, 'MALAYSIA': 33, 'ANGOLA': 33,
+    'MOZAMBIQUE': 31, 'GHANA': 31, 'YEMEN': 30, 'NEPAL': 29, 'VENEZUELA': 28,
+    'MADAGASCAR': 28, 'CAMEROON': 27, 'CÔTE D\'IVOIRE': 27, 'NORTH KOREA': 26,
+    'AUSTRALIA': 26, 'NIGER': 25, 'SRI LANKA': 21, 'BURKINA FASO': 21, 'MALI': 20,
+    'ROMANIA': 19, 'CHILE': 19, 'MALAWI': 19, 'KAZAKHSTAN': 19, 'ZAMBIA': 19,
+    'GUATEMALA': 18, 'ECUADOR': 18, 'NETHERLANDS': 17, 'SYRIA': 17, 'CAMBODIA': 17,
+    'SENEGAL': 17, 'CHAD': 16, 'SOMALIA': 16, 'ZIMBABWE': 15, 'GUINEA': 13,
+    'RWANDA': 13, 'BENIN': 12, 'BURUNDI': 12, 'TUNISIA': 12, 'BOLIVIA': 12,
+    'BELGIUM': 12, 'HAITI': 11, 'JORDAN': 10, 'DOMINICAN REPUBLIC': 11,
+    'CUBA': 11, 'SOUTH SUDAN': 11, 'SWEDEN': 10, 'CZECH REPUBLIC': 11,
+    'GREECE': 10, 'PORTUGAL': 10, 'AZERBAIJAN': 10, 'HUNGARY': 10,
+    'UNITED ARAB EMIRATES': 10, 'BELARUS': 9, 'ISRAEL': 9, 'TAJIKISTAN': 10,
+    'AUSTRIA': 9, 'SWITZERLAND': 9, 'PAPUA NEW GUINEA': 9, 'SERBIA': 9,
+    'PARAGUAY': 7, 'LAOS': 7, 'LIBYA': 7, 'BULGARIA': 7, 'LEBANON': 7,
+    'NICARAGUA': 7, 'KYRGYZSTAN': 7, 'EL SALVADOR': 7, 'TURKMENISTAN': 6,
+    'SINGAPORE': 6, 'DENMARK': 6, 'FINLAND': 6, 'SLOVAKIA': 5, 'NORWAY': 5,
+    'CONGO': 6, 'COSTA RICA': 5, 'PALESTINE': 5, 'OMAN': 5, 'LIBERIA': 5,
+    'IRELAND': 5, 'NEW ZEALAND': 5, 'CENTRAL AFRICAN REPUBLIC': 5,
+    'MAURITANIA': 5, 'PANAMA': 4, 'KUWAIT': 4, 'CROATIA': 4, 'GEORGIA': 4,
+    'MOLDOVA': 4, 'ERITREA': 4, 'URUGUAY': 3, 'BOSNIA AND HERZEGOVINA': 3,
+    'MONGOLIA': 3, 'ARMENIA': 3, 'JAMAICA': 3, 'QATAR': 3, 'ALBANIA': 3,
+    'LITHUANIA': 3, 'NAMIBIA': 3, 'GAMBIA': 2, 'BOTSWANA': 2, 'GABON': 2,
+    'LESOTHO': 2, 'SLOVENIA': 2, 'GUINEA-BISSAU': 2, 'LATVIA': 2,
+    'BAHRAIN': 2, 'NORTH MACEDONIA': 2, 'TRINIDAD AND TOBAGO': 1,
+    'ESTONIA': 1, 'MAURITIUS': 1, 'CYPRUS': 1, 'ESWATINI': 1, 'DJIBOUTI': 1,
+    'FIJI': 1, 'COMOROS': 1, 'GUYANA': 1, 'BHUTAN': 1, 'SOLOMON ISLANDS': 1,
+    'MONTENEGRO': 1, 'LUXEMBOURG': 1, 'SURINAME': 1, 'CABO VERDE': 1,
+    'MICRONESIA': 0.1, 'MALTA': 0.5, 'BRUNEI': 0.4, 'BELIZE': 0.4,
+    'BAHAMAS': 0.4, 'ICELAND': 0.4, 'VANUATU': 0.3, 'BARBADOS': 0.3,
+    'SAO TOME AND PRINCIPE': 0.2, 'SAMOA': 0.2, 'SAINT LUCIA': 0.2,
+    'KIRIBATI': 0.1, 'GRENADA': 0.1, 'TONGA': 0.1, 'SEYCHELLES': 0.1,
+    'ANTIGUA AND BARBUDA': 0.1, 'ANDORRA': 0.1, 'DOMINICA': 0.1,
+    'MARSHALL ISLANDS': 0.1, 'SAINT KITTS AND NEVIS': 0.1,
+    'MONACO': 0.04, 'LIECHTENSTEIN': 0.04, 'SAN MARINO': 0.03,
+    'PALAU': 0.02, 'NAURU': 0.01, 'TUVALU': 0.01, 'VATICAN CITY': 0.001
+}
+
+
+def country_names(n_countries=None):
+    """Return country keys, repeating the list with numbered suffixes past the end"""
+    if n_countries is None:
+        return list(ALL_COUNTRIES)
+    names = []
+    for i in range(n_countries):
+        base = ALL_COUNTRIES[i % len(ALL_COUNTRIES)]
+        repeat = i // len(ALL_COUNTRIES)
+        names.append(base if repeat == 0 else f"{base} #{repeat + 1}")
+    return names
+
+
+def generate_vaccination_data(seed=DEFAULT_SEED, n_countries=None,
+                              days_per_country=DEFAULT_DAYS_PER_COUNTRY,
+                              start_date=DEFAULT_START_DATE):
+    """Build the synthetic vaccination frame as whole (countries x days) arrays.
+
+    The same seed and sizes always produce the same frame. Rows are ordered by
+    country, then date, matching the old row-by-row loop.
+    """
+    rng = np.random.default_rng(seed)
+    countries = country_names(n_countries)
+    n, d = len(countries), days_per_country
+    dates = pd.date_range(start_date, periods=d, freq='D')
+
+    # Population (in millions); suffixed series reuse their base country's value
+    population = np.array(
+        [COUNTRY_POPULATION.get(c.split(' #')[0], np.nan) for c in countries],
+        dtype=np.float64
+    )
+    missing = np.isnan(population)
+    population[missing] = rng.uniform(0.1, 50, missing.sum())
+    people = population[:, None] * 1_000_000
+
+    # Time-based progression towards a 10% to 80% coverage target
+    base_coverage = rng.uniform(0.1, 0.8, (n, 1))
+    progress = np.minimum(1.0, np.arange(d) / d * rng.uniform(0.5, 2.0, (n, d)))
+
+    total_vax = (people * base_coverage * progress).astype(np.int64)
+    daily_vax = (total_vax * rng.uniform(0.001, 0.01, (n, d))).astype(np.int64)
+    people_vax = (total_vax * rng.uniform(0.7, 0.95, (n, d))).astype(np.int64)
+    fully_vax = (total_vax * rng.uniform(0.5, 0.85, (n, d))).astype(np.int64)
+
+    # Add some randomness
+    total_vax += rng.integers(-100000, 100000, (n, d))
+    daily_vax = np.maximum(0, daily_vax + rng.integers(-5000, 5000, (n, d)))
+
+    vaccination_rate = np.minimum(100, total_vax / people * 100)
+
+    return pd.DataFrame({
+        'country': np.repeat(np.array(countries, dtype=object), d),
+        'date': np.tile(dates.values, n),
+        'total_vaccinations': np.maximum(0, total_vax).ravel(),
+        'daily_vaccinations': daily_vax.ravel(),
+        'people_vaccinated': np.maximum(0, people_vax).ravel(),
+        'people_fully_vaccinated': np.maximum(0, fully_vax).ravel(),
+        'population_millions': np.repeat(population, d),
+        'vaccination_rate': vaccination_rate.ravel()
+    })
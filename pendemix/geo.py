@@ -0,0 +1,77 @@
+# PendemixAI - Country to ISO 3166-1 alpha-3 codes for the choropleth map
+import pandas as pd
+
+# Uppercase app country keys -> ISO-3 codes understood by plotly's locationmode='ISO-3'
+COUNTRY_ISO3 = {
+    'AFGHANISTAN': 'AFG', 'ALBANIA': 'ALB', 'ALGERIA': 'DZA', 'ANDORRA': 'AND', 'ANGOLA': 'AGO',
+    'ANTIGUA AND BARBUDA': 'ATG', 'ARGENTINA': 'ARG', 'ARMENIA': 'ARM', 'AUSTRALIA': 'AUS',
+    'AUSTRIA': 'AUT', 'AZERBAIJAN': 'AZE', 'BAHAMAS': 'BHS', 'BAHRAIN': 'BHR', 'BANGLADESH': 'BGD',
+    'BARBADOS': 'BRB', 'BELARUS': 'BLR', 'BELGIUM': 'BEL', 'BELIZE': 'BLZ', 'BENIN': 'BEN',
+    'BHUTAN': 'BTN', 'BOLIVIA': 'BOL', 'BOSNIA AND HERZEGOVINA': 'BIH', 'BOTSWANA': 'BWA',
+    'BRAZIL': 'BRA', 'BRUNEI': 'BRN', 'BULGARIA': 'BGR', 'BURKINA FASO': 'BFA', 'BURUNDI': 'BDI',
+    'CABO VERDE': 'CPV', 'CAMBODIA': 'KHM', 'CAMEROON': 'CMR', 'CANADA': 'CAN',
+    'CENTRAL AFRICAN REPUBLIC': 'CAF', 'CHAD': 'TCD', 'CHILE': 'CHL', 'CHINA': 'CHN',
+    'COLOMBIA': 'COL', 'COMOROS': 'COM', 'CONGO': 'COG', 'COSTA RICA': 'CRI', "CÔTE D'IVOIRE": 'CIV',
+    'CROATIA': 'HRV', 'CUBA': 'CUB', 'CYPRUS': 'CYP', 'CZECH REPUBLIC': 'CZE',
+    'DEMOCRATIC REPUBLIC OF THE CONGO': 'COD', 'DENMARK': 'DNK', 'DJIBOUTI': 'DJI', 'DOMINICA': 'DMA',
+    'DOMINICAN REPUBLIC': 'DOM', 'ECUADOR': 'ECU', 'EGYPT': 'EGY', 'EL SALVADOR': 'SLV',
+    'EQUATORIAL GUINEA': 'GNQ', 'ERITREA': 'ERI', 'ESTONIA': 'EST', 'ESWATINI': 'SWZ',
+    'ETHIOPIA': 'ETH', 'FIJI': 'FJI', 'FINLAND': 'FIN', 'FRANCE': 'FRA', 'GABON': 'GAB',
+    'GAMBIA': 'GMB', 'GEORGIA': 'GEO', 'GERMANY': 'DEU', 'GHANA': 'GHA', 'GREECE': 'GRC',
+    'GRENADA': 'GRD', 'GUATEMALA': 'GTM', 'GUINEA': 'GIN', 'GUINEA-BISSAU': 'GNB', 'GUYANA': 'GUY',
+    'HAITI': 'HTI', 'HONDURAS': 'HND', 'HUNGARY': 'HUN', 'ICELAND': 'ISL', 'INDIA': 'IND',
+    'INDONESIA': 'IDN', 'IRAN': 'IRN', 'IRAQ': 'IRQ', 'IRELAND': 'IRL', 'ISRAEL': 'ISR',
+    'ITALY': 'ITA', 'JAMAICA': 'JAM', 'JAPAN': 'JPN', 'JORDAN': 'JOR', 'KAZAKHSTAN': 'KAZ',
+    'KENYA': 'KEN', 'KIRIBATI': 'KIR', 'KOSOVO': 'XKX', 'KUWAIT': 'KWT', 'KYRGYZSTAN': 'KGZ',
+    'LAOS': 'LAO', 'LATVIA': 'LVA', 'LEBANON': 'LBN', 'LESOTHO': 'LSO', 'LIBERIA': 'LBR',
+    'LIBYA': 'LBY', 'LIECHTENSTEIN': 'LIE', 'LITHUANIA': 'LTU', 'LUXEMBOURG': 'LUX',
+    'MADAGASCAR': 'MDG', 'MALAWI': 'MWI', 'MALAYSIA': 'MYS', 'MALDIVES': 'MDV', 'MALI': 'MLI',
+    'MALTA': 'MLT', 'MARSHALL ISLANDS': 'MHL', 'MAURITANIA': 'MRT', 'MAURITIUS': 'MUS',
+    'MEXICO': 'MEX', 'MICRONESIA': 'FSM', 'MOLDOVA': 'MDA', 'MONACO': 'MCO', 'MONGOLIA': 'MNG',
+    'MONTENEGRO': 'MNE', 'MOROCCO': 'MAR', 'MOZAMBIQUE': 'MOZ', 'MYANMAR': 'MMR', 'NAMIBIA': 'NAM',
+    'NAURU': 'NRU', 'NEPAL': 'NPL', 'NETHERLANDS': 'NLD', 'NEW ZEALAND': 'NZL', 'NICARAGUA': 'NIC',
+    'NIGER': 'NER', 'NIGERIA': 'NGA', 'NORTH KOREA': 'PRK', 'NORTH MACEDONIA': 'MKD',
+    'NORWAY': 'NOR', 'OMAN': 'OMN', 'PAKISTAN': 'PAK', 'PALAU': 'PLW', 'PALESTINE': 'PSE',
+    'PANAMA': 'PAN', 'PAPUA NEW GUINEA': 'PNG', 'PARAGUAY': 'PRY', 'PERU': 'PER',
+    'PHILIPPINES': 'PHL', 'POLAND': 'POL', 'PORTUGAL': 'PRT', 'QATAR': 'QAT', 'ROMANIA': 'ROU',
+    'RUSSIA': 'RUS', 'RWANDA': 'RWA', 'SAINT KITTS AND NEVIS': 'KNA', 'SAINT LUCIA': 'LCA',
+    'SAINT VINCENT AND THE GRENADINES': 'VCT', 'SAMOA': 'WSM', 'SAN MARINO': 'SMR',
+    'SAO TOME AND PRINCIPE': 'STP', 'SAUDI ARABIA': 'SAU', 'SENEGAL': 'SEN', 'SERBIA': 'SRB',
+    'SEYCHELLES': 'SYC', 'SIERRA LEONE': 'SLE', 'SINGAPORE': 'SGP', 'SLOVAKIA': 'SVK',
+    'SLOVENIA': 'SVN', 'SOLOMON ISLANDS': 'SLB', 'SOMALIA': 'SOM', 'SOUTH AFRICA': 'ZAF',
+    'SOUTH KOREA': 'KOR', 'SOUTH SUDAN': 'SSD', 'SPAIN': 'ESP', 'SRI LANKA': 'LKA', 'SUDAN': 'SDN',
+    'SURINAME': 'SUR', 'SWEDEN': 'SWE', 'SWITZERLAND': 'CHE', 'SYRIA': 'SYR', 'TAIWAN': 'TWN',
+    'TAJIKISTAN': 'TJK', 'TANZANIA': 'TZA', 'THAILAND': 'THA', 'TIMOR-LESTE': 'TLS', 'TOGO': 'TGO',
+    'TONGA': 'TON', 'TRINIDAD AND TOBAGO': 'TTO', 'TUNISIA': 'TUN', 'TURKEY': 'TUR',
+    'TURKMENISTAN': 'TKM', 'TUVALU': 'TUV', 'UGANDA': 'UGA', 'UKRAINE': 'UKR',
+    'UNITED ARAB EMIRATES': 'ARE', 'UNITED KINGDOM': 'GBR', 'UNITED STATES': 'USA',
+    'URUGUAY': 'URY', 'UZBEKISTAN': 'UZB', 'VANUATU': 'VUT', 'VATICAN CITY': 'VAT',
+    'VENEZUELA': 'VEN', 'VIETNAM': 'VNM', 'YEMEN': 'YEM', 'ZAMBIA': 'ZMB', 'ZIMBABWE': 'ZWE'
+}
+
+
+def iso3_codes(countries):
+    """ISO-3 code for each country key, NaN where the table has no entry"""
+    return pd.Series(countries, dtype=object).map(COUNTRY_ISO3)
+
+
+def build_map_data(latest_data):
+    """Split the latest-per-country frame into mappable rows and unmapped country names.
+
+    Returns (map_data, unmapped); map_data gets an iso3 column.
+    """
+    codes = iso3_codes(latest_data['country'].to_numpy())
+    codes.index = latest_data.index
+    mapped = codes.notna()
+    map_data = latest_data[mapped.to_numpy()].assign(iso3=codes[mapped])
+    unmapped = latest_data.loc[~mapped.to_numpy(), 'country'].tolist()
+    return map_data, unmapped
+
+
+if __name__ == '__main__':
+    from pendemix.generator import ALL_COUNTRIES
+
+    missing = [country for country in ALL_COUNTRIES if country not in COUNTRY_ISO3]
+    print(f"{len(ALL_COUNTRIES) - len(missing)} of {len(ALL_COUNTRIES)} countries have ISO-3 codes")
+    for country in missing:
+        print(f"  missing: {country}")
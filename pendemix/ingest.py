@@ -0,0 +1,382 @@
+# PendemixAI - Incremental ingestion of OWID-style vaccination CSV feeds
+import json
+import os
+import tempfile
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from pendemix import config
+from pendemix.country_index import sort_by_country
+from pendemix.generator import COUNTRY_POPULATION
+from pendemix.schema import COUNTRY_SCHEMA, ROW_SCHEMA, apply_row_schema
+from pendemix.storage import _write_feather
+from pendemix.summary import build_country_summary, merge_country_summaries
+
+# Rows read from a feed at a time; bounds memory regardless of file size
+INGEST_CHUNK_ROWS = 250_000
+
+REQUIRED_COLUMNS = ['location', 'date', 'total_vaccinations']
+
+# OWID column -> app column
+FEED_COLUMNS = {
+    'total_vaccinations': 'total_vaccinations',
+    'daily_vaccinations': 'daily_vaccinations',
+    'people_vaccinated': 'people_vaccinated',
+    'people_fully_vaccinated': 'people_fully_vaccinated',
+    'total_vaccinations_per_hundred': 'vaccination_rate'
+}
+
+# OWID location names that differ from the app's uppercase keys
+COUNTRY_ALIASES = {
+    'CAPE VERDE': 'CABO VERDE',
+    'CZECHIA': 'CZECH REPUBLIC',
+    "COTE D'IVOIRE": "CÔTE D'IVOIRE",
+    'DEMOCRATIC REPUBLIC OF CONGO': 'DEMOCRATIC REPUBLIC OF THE CONGO',
+    'MICRONESIA (COUNTRY)': 'MICRONESIA',
+    'TIMOR': 'TIMOR-LESTE',
+    'VATICAN': 'VATICAN CITY',
+    'TURKIYE': 'TURKEY'
+}
+
+ROW_COLUMNS = ['country', 'date'] + list(ROW_SCHEMA)
+
+# Segments keep counters as float64 so gaps survive; load applies ROW_SCHEMA
+SEGMENT_SCHEMA = pa.schema(
+    [('country', pa.string()), ('date', pa.timestamp('ns'))]
+    + [(col, pa.float64()) for col in ROW_SCHEMA]
+)
+
+
+class IngestError(ValueError):
+    """Raised when a feed does not look like an OWID vaccination CSV"""
+
+
+# A feed failing with one of these is recorded as rejected instead of stopping the ingest run
+FEED_ERRORS = (IngestError, pd.errors.ParserError, pd.errors.EmptyDataError, UnicodeDecodeError)
+
+
+def normalize_country(name):
+    """Map a feed location name to the app's uppercase country key"""
+    key = ' '.join(str(name).split()).upper()
+    return COUNTRY_ALIASES.get(key, key)
+
+
+def validate_header(path):
+    """Check the CSV header and return the columns worth reading"""
+    header = list(pd.read_csv(path, nrows=0).columns)
+    missing = [col for col in REQUIRED_COLUMNS if col not in header]
+    if missing:
+        raise IngestError(f"{os.path.basename(path)} is missing columns: {', '.join(missing)}")
+    return [col for col in header if col in FEED_COLUMNS or col in ('location', 'date', 'iso_code')]
+
+
+def normalize_chunk(chunk):
+    """Rename feed columns, normalize country keys and derive population estimates"""
+    if 'iso_code' in chunk.columns:
+        # OWID_* codes are continents, income groups and the world total
+        chunk = chunk[~chunk['iso_code'].astype(str).str.startswith('OWID_')]
+    chunk = chunk.rename(columns={'location': 'country', **FEED_COLUMNS})
+    chunk = chunk.dropna(subset=['country', 'date'])
+    for col in ROW_SCHEMA:
+        if col not in chunk.columns:
+            chunk[col] = np.nan
+    # Population in millions from total / per-hundred, where both are reported; uses the raw
+    # per-hundred value, which exceeds 100 once countries give more doses than they have people
+    population = chunk['total_vaccinations'] / chunk['vaccination_rate'] / 10_000
+    chunk = chunk.assign(
+        country=chunk['country'].map(normalize_country),
+        date=pd.to_datetime(chunk['date'], errors='coerce'),
+        vaccination_rate=chunk['vaccination_rate'].clip(upper=100),
+        population_estimate=population.where(np.isfinite(population) & (population > 0))
+    ).dropna(subset=['date'])
+    return chunk
+
+
+def read_feed(path, chunk_rows=INGEST_CHUNK_ROWS):
+    """Yield normalized chunks of a feed without loading the whole file"""
+    usecols = validate_header(path)
+    for chunk in pd.read_csv(path, usecols=usecols, chunksize=chunk_rows):
+        yield normalize_chunk(chunk)
+
+
+class _StoreLock:
+    """Cross-process lock file; stale locks older than an hour are broken"""
+
+    _thread_lock = threading.Lock()
+
+    def __init__(self, directory, timeout=0):
+        self.path = os.path.join(directory, '.lock')
+        self.timeout = timeout
+        self.acquired = False
+
+    def __enter__(self):
+        if self.timeout:
+            locked = self._thread_lock.acquire(timeout=self.timeout)
+        else:
+            locked = self._thread_lock.acquire(blocking=False)
+        if not locked:
+            return self
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                os.close(os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                self.acquired = True
+                return self
+            except FileExistsError:
+                try:
+                    if time.time() - os.path.getmtime(self.path) > 3600:
+                        os.remove(self.path)
+                        continue
+                except FileNotFoundError:
+                    continue
+                if time.monotonic() >= deadline:
+                    self._thread_lock.release()
+                    return self
+                time.sleep(0.1)
+
+    def __exit__(self, *exc):
+        if self.acquired:
+            os.remove(self.path)
+            self._thread_lock.release()
+            self.acquired = False
+
+
+class IngestStore:
+    """Append-only store of ingested rows with an incrementally maintained summary.
+
+    Every ingest run adds one Feather segment holding only rows newer than the
+    last stored date for their country, then folds those rows into the stored
+    per-country summary and population side table. Nothing already stored is
+    re-read or rebuilt.
+
+    state.json is the commit point: it names the summary and country files
+    and counts the segments, and it is replaced last. A run that dies before
+    that leaves files state.json does not point to; they are ignored and
+    overwritten by the next run, which re-reads the same rows.
+    """
+
+    def __init__(self, directory=None):
+        self.directory = directory or config.STORE_DIR
+        self.state_path = os.path.join(self.directory, 'state.json')
+
+    # ----- state -----
+    def state(self):
+        try:
+            with open(self.state_path, encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {'version': 0, 'segments': 0, 'files': {}}
+
+    def _write_state(self, state):
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp_path, self.state_path)
+
+    @property
+    def version(self):
+        return self.state()['version']
+
+    def rejected_files(self):
+        """{file: error} for drop-directory files that could not be ingested as they are now"""
+        return {name: entry[2] for name, entry in self.state()['files'].items() if len(entry) > 2}
+
+    def _segment_path(self, number):
+        return os.path.join(self.directory, f"segment_{number:06d}.feather")
+
+    def _state_file(self, state, name):
+        # Stores written before state.json named these files used fixed names
+        return os.path.join(self.directory, state.get(name, f"{name}.feather"))
+
+    def segment_paths(self, state=None):
+        """Committed segments only; a segment left by an interrupted run is not listed"""
+        state = state or self.state()
+        return [self._segment_path(n) for n in range(1, state['segments'] + 1)]
+
+    # ----- reading -----
+    def load_summary(self, state=None):
+        path = self._state_file(state or self.state(), 'summary')
+        if not os.path.exists(path):
+            return None
+        return feather.read_feather(path)
+
+    def load_countries(self, state=None):
+        path = self._state_file(state or self.state(), 'countries')
+        if not os.path.exists(path):
+            return pd.DataFrame(
+                {col: pd.Series(dtype=dtype) for col, dtype in COUNTRY_SCHEMA.items()},
+                index=pd.Index([], name='country', dtype=object)
+            )
+        return feather.read_feather(path).set_index('country')
+
+    def load(self):
+        """Return (rows, countries, summary) for everything stored so far"""
+        # One state read, so a concurrent ingest cannot mix two versions
+        state = self.state()
+        segments = [feather.read_table(path, memory_map=True) for path in self.segment_paths(state)]
+        table = pa.concat_tables(segments) if segments else SEGMENT_SCHEMA.empty_table()
+        rows = apply_row_schema(sort_by_country(table.to_pandas()))
+        return rows, self.load_countries(state), self.load_summary(state)
+
+    def watermarks(self, state=None):
+        """Last stored date per country"""
+        summary = self.load_summary(state)
+        if summary is None:
+            return {}
+        return dict(zip(summary['country'], summary['last_date']))
+
+    # ----- writing -----
+    def _update_countries(self, countries, estimates):
+        """Keep known populations; fill new countries from feed estimates, then the built-in table"""
+        new = [c for c in estimates.index if c not in countries.index]
+        if not new:
+            return countries
+        population = estimates.reindex(new)
+        fallback = pd.Series({c: COUNTRY_POPULATION.get(c, np.nan) for c in new})
+        added = pd.DataFrame({'population_millions': population.fillna(fallback)}, index=pd.Index(new, name='country'))
+        countries = pd.concat([countries, added]).sort_index()
+        for col, dtype in COUNTRY_SCHEMA.items():
+            countries[col] = countries[col].astype(dtype)
+        return countries
+
+    def ingest_file(self, path, chunk_rows=INGEST_CHUNK_ROWS):
+        """Append rows from one feed that are newer than what is stored; returns rows added"""
+        os.makedirs(self.directory, exist_ok=True)
+        state = self.state()
+        # Files of the committed version; kept one more run for readers still on it
+        keep = {os.path.basename(self._state_file(state, name)) for name in ('countries', 'summary')}
+        marks = self.watermarks(state)
+        summary = self.load_summary(state)
+        countries = self.load_countries(state)
+
+        segment_path = self._segment_path(state['segments'] + 1)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        os.close(fd)
+        added = 0
+        try:
+            with pa.OSFile(tmp_path, 'wb') as sink, pa.ipc.new_file(sink, SEGMENT_SCHEMA) as writer:
+                for chunk in read_feed(path, chunk_rows):
+                    last = pd.to_datetime(chunk['country'].map(marks))
+                    chunk = chunk[last.isna() | (chunk['date'] > last)]
+                    chunk = chunk.drop_duplicates(['country', 'date'], keep='last')
+                    if chunk.empty:
+                        continue
+
+                    estimates = chunk.groupby('country')['population_estimate'].median()
+                    countries = self._update_countries(countries, estimates)
+
+                    rows = chunk[ROW_COLUMNS].sort_values(['country', 'date'], kind='stable')
+                    writer.write_table(pa.Table.from_pandas(rows, schema=SEGMENT_SCHEMA, preserve_index=False))
+                    summary = merge_country_summaries(summary, build_country_summary(rows, countries), countries)
+
+                    # Later chunks only accept rows after what this one added
+                    marks.update(rows.groupby('country')['date'].max().to_dict())
+                    added += len(rows)
+
+            if added:
+                # New files under new names; nothing becomes visible until state.json points at them
+                os.replace(tmp_path, segment_path)
+                state['version'] += 1
+                for name, frame in [('countries', countries.reset_index()), ('summary', summary)]:
+                    state[name] = f"{name}_{state['version']:06d}.feather"
+                    _write_feather(frame, self._state_file(state, name))
+                state['segments'] += 1
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        stat = os.stat(path)
+        state['files'][os.path.basename(path)] = [stat.st_size, stat.st_mtime]
+        self._write_state(state)
+        self._remove_unused(keep | {os.path.basename(self._state_file(state, name)) for name in ('countries', 'summary')})
+        return added
+
+    def _remove_unused(self, keep):
+        """Delete summary and country files not named in keep, e.g. older versions or ones from an interrupted run"""
+        for name in os.listdir(self.directory):
+            if name.startswith(('summary', 'countries')) and name.endswith('.feather') and name not in keep:
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except FileNotFoundError:
+                    pass
+
+    def pending_files(self, drop_dir=None, seen=None):
+        """(name, size, mtime) of each new or changed CSV in the drop directory.
+
+        Only lists the directory and reads the state file, so it is cheap enough
+        to call on every rerun.
+        """
+        drop_dir = drop_dir or config.DROP_DIR
+        if not os.path.isdir(drop_dir):
+            return ()
+        seen = self.state()['files'] if seen is None else seen
+        pending = []
+        for name in sorted(os.listdir(drop_dir)):
+            path = os.path.join(drop_dir, name)
+            if not name.lower().endswith('.csv') or not os.path.isfile(path):
+                continue
+            stat = os.stat(path)
+            # Ingested files are [size, mtime], rejected ones [size, mtime, error]
+            if seen.get(name, [])[:2] != [stat.st_size, stat.st_mtime]:
+                pending.append((name, stat.st_size, stat.st_mtime))
+        return tuple(pending)
+
+    def _reject(self, path, error):
+        """Record a feed that failed, so it is skipped until the file changes"""
+        stat = os.stat(path)
+        state = self.state()
+        state['files'][os.path.basename(path)] = [stat.st_size, stat.st_mtime, f"{type(error).__name__}: {error}"]
+        self._write_state(state)
+
+    def ingest_directory(self, drop_dir=None, wait=False):
+        """Ingest new or changed CSVs from the drop directory; returns {file: rows added}.
+
+        A file that is not a readable OWID-style CSV is recorded as rejected
+        (see rejected_files()), left out of the result and skipped until it
+        changes; the other files are still ingested. Returns immediately with {}
+        when another session or process is ingesting, unless wait is set.
+        """
+        drop_dir = drop_dir or config.DROP_DIR
+        if not os.path.isdir(drop_dir):
+            return {}
+        os.makedirs(self.directory, exist_ok=True)
+
+        with _StoreLock(self.directory, timeout=60 if wait else 0) as lock:
+            if not lock.acquired:
+                return {}
+            results = {}
+            for name, _, _ in self.pending_files(drop_dir):
+                path = os.path.join(drop_dir, name)
+                try:
+                    results[name] = self.ingest_file(path)
+                except FEED_ERRORS as exc:
+                    self._reject(path, exc)
+            return results
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Ingest OWID-style vaccination CSVs into the PendemixAI store')
+    parser.add_argument('paths', nargs='*', help='CSV files to ingest (default: every new file in the drop directory)')
+    args = parser.parse_args()
+
+    store = IngestStore()
+    if args.paths:
+        os.makedirs(store.directory, exist_ok=True)
+        with _StoreLock(store.directory, timeout=60) as lock:
+            if not lock.acquired:
+                raise SystemExit(f"Store at {store.directory} is locked by another ingest")
+            results = {os.path.basename(p): store.ingest_file(p) for p in args.paths}
+    else:
+        results = store.ingest_directory(wait=True)
+    for name, count in results.items():
+        print(f"{name}: {count:,} new rows")
+    for name, error in store.rejected_files().items():
+        print(f"{name}: REJECTED ({error})")
+    print(f"Store version {store.version} at {store.directory}")
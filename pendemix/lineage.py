@@ -0,0 +1,177 @@
+# PendemixAI - Content versions of a dataset and the derived artifacts that depend on them
+import hashlib
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+import pandas as pd
+
+# Countries and columns whose content changed between two fingerprints
+DataChange = namedtuple('DataChange', ['countries', 'columns', 'calendar'])
+
+
+def _digest(*parts):
+    h = hashlib.blake2b(digest_size=8)
+    for part in parts:
+        h.update(part if isinstance(part, bytes) else str(part).encode('utf-8'))
+        h.update(b'\x00')
+    return h.hexdigest()
+
+
+class DataFingerprint:
+    """Content hash of every (country, column) cell group of one dataset version.
+
+    Each cell is the sum of the hashes of that country's (date, value) rows
+    for one column, so a revised value, an added day or a removed row changes
+    exactly the cells it touches. The country table's population is one more
+    column. Hashing is vectorised, about 0.15 s per million rows, and runs
+    once per version while the views are built. The calendar (first date,
+    last date, number of dates) is part of every key because the tensor,
+    pyramid and window charts share one time axis across countries.
+    """
+
+    def __init__(self, countries, columns, table, calendar):
+        self.countries = list(countries)
+        self.columns = list(columns)
+        self.table = table
+        self.calendar = calendar
+        self._position = {country: i for i, country in enumerate(self.countries)}
+        self._column = {column: k for k, column in enumerate(self.columns)}
+        self.version = _digest(self.calendar, '|'.join(self.countries), '|'.join(self.columns), table.tobytes())
+
+    @classmethod
+    def from_frames(cls, rows, country_table):
+        """Fingerprint a frame sorted by country (see sort_by_country()) and its country table"""
+        countries = rows['country'].cat.categories
+        codes = rows['country'].cat.codes.to_numpy()
+        counts = np.bincount(codes, minlength=len(countries))
+        starts = (np.cumsum(counts) - counts)[counts > 0]
+        dates = rows['date'].to_numpy()
+        date_hash = pd.util.hash_array(dates)
+
+        metrics = [col for col in rows.columns if col not in ('country', 'date')]
+        table = np.zeros((len(countries), len(metrics) + 1), dtype=np.uint64)
+        with np.errstate(over='ignore'):
+            for k, col in enumerate(metrics):
+                values = rows[col].to_numpy(dtype=np.float64, na_value=np.nan)
+                # Hashing (date, value) pairs: the same value on another day is another row
+                row_hash = pd.util.hash_array(values) * np.uint64(0x9E3779B97F4A7C15) ^ date_hash
+                if len(row_hash):
+                    table[counts > 0, k] = np.add.reduceat(row_hash, starts)
+            population = country_table['population_millions'].reindex(countries)
+            table[:, -1] = pd.util.hash_array(population.to_numpy(dtype=np.float64, na_value=np.nan))
+
+        calendar = (str(dates.min())[:10], str(dates.max())[:10], len(pd.unique(dates))) if len(dates) else None
+        return cls(countries, metrics + ['population_millions'], table, calendar)
+
+    def key(self, countries=None, columns=None):
+        """Content key of a slice; None means every country or every column.
+
+        Two versions give the same key exactly when the slice's content (and
+        the calendar) is unchanged, so artifacts built from it can be reused.
+        """
+        if countries is None and columns is None:
+            return self.version
+        rows = range(len(self.countries)) if countries is None else [self._position.get(c) for c in countries]
+        cols = list(range(len(self.columns))) if columns is None else [self._column[c] for c in columns]
+        cells = [self.table[i, cols].tobytes() if i is not None else b'missing' for i in rows]
+        names = self.countries if countries is None else countries
+        return _digest(self.calendar, '|'.join(names), '|'.join(self.columns[k] for k in cols), *cells)
+
+    def diff(self, other):
+        """DataChange from this version to other; countries added or removed count as fully changed"""
+        added = set(other.countries) ^ set(self.countries)
+        shared = [c for c in self.countries if c in other._position]
+        columns = [c for c in self.columns if c in other._column]
+        mine = self.table[[self._position[c] for c in shared]][:, [self._column[c] for c in columns]]
+        theirs = other.table[[other._position[c] for c in shared]][:, [other._column[c] for c in columns]]
+        changed = mine != theirs
+        changed_countries = {shared[i] for i in np.flatnonzero(changed.any(axis=1))} | added
+        changed_columns = {columns[k] for k in np.flatnonzero(changed.any(axis=0))}
+        changed_columns |= set(self.columns) ^ set(other.columns)
+        if added:
+            changed_columns |= set(other.columns)
+        return DataChange(frozenset(changed_countries), frozenset(changed_columns), self.calendar != other.calendar)
+
+
+def _describe(names):
+    if names is None:
+        return 'ALL'
+    return ', '.join(names) if len(names) <= 3 else f"{len(names)} COUNTRIES"
+
+
+# name: what the artifact is, e.g. ('trend', ('INDIA',), chart settings...); key: its content key when built
+Artifact = namedtuple('Artifact', ['name', 'countries', 'columns', 'key', 'version', 'built_at'])
+
+
+class ArtifactRegistry:
+    """Derived artifacts with the countries and columns each was built from.
+
+    register() returns the artifact's content key for the current data
+    version; putting that key in a cache key means a new version only
+    misses for artifacts whose inputs changed. advance() moves the registry
+    to a new fingerprint and returns the cache keys of the artifacts it
+    made stale, so their cached values can be dropped right away. Stale
+    artifacts stay listed until they are rebuilt; the least recently
+    registered are forgotten past max_entries.
+    """
+
+    def __init__(self, fingerprint=None, max_entries=1000):
+        self.fingerprint = fingerprint
+        self.max_entries = max_entries
+        self.last_change = None
+        self._artifacts = OrderedDict()
+        self._lock = threading.Lock()
+
+    def register(self, name, fingerprint, countries=None, columns=None):
+        """Record what `name` reads and return its content key under `fingerprint`"""
+        countries = tuple(countries) if countries is not None else None
+        columns = tuple(columns) if columns is not None else None
+        key = fingerprint.key(countries, columns)
+        with self._lock:
+            if self.fingerprint is None:
+                self.fingerprint = fingerprint
+            artifact = self._artifacts.get(name)
+            if artifact is None or artifact.key != key:
+                self._artifacts[name] = Artifact(name, countries, columns, key, fingerprint.version, time.time())
+            self._artifacts.move_to_end(name)
+            while len(self._artifacts) > self.max_entries:
+                self._artifacts.popitem(last=False)
+        return key
+
+    def cache_key(self, name, fingerprint, countries=None, columns=None):
+        """name + (content key,): a cache key that survives data versions that leave the inputs unchanged"""
+        return (*name, self.register(name, fingerprint, countries, columns))
+
+    def advance(self, fingerprint):
+        """Switch to a new data version; returns the cache keys of artifacts that went stale"""
+        with self._lock:
+            previous, self.fingerprint = self.fingerprint, fingerprint
+            if previous is None or previous.version == fingerprint.version:
+                return []
+            self.last_change = previous.diff(fingerprint)
+            artifacts = list(self._artifacts.values())
+        return [
+            (*artifact.name, artifact.key) for artifact in artifacts
+            if fingerprint.key(artifact.countries, artifact.columns) != artifact.key
+        ]
+
+    def status(self):
+        """One row per registered artifact, stale ones first"""
+        with self._lock:
+            fingerprint = self.fingerprint
+            artifacts = list(self._artifacts.values())
+        rows = []
+        for artifact in artifacts:
+            fresh = fingerprint.key(artifact.countries, artifact.columns) == artifact.key
+            rows.append({
+                'artifact': artifact.name[0],
+                'scope': ', '.join(map(str, artifact.name[1:])),
+                'countries': _describe(artifact.countries),
+                'columns': 'ALL' if artifact.columns is None else ', '.join(artifact.columns),
+                'built_for': artifact.version,
+                'stale': not fresh
+            })
+        frame = pd.DataFrame(rows, columns=['artifact', 'scope', 'countries', 'columns', 'built_for', 'stale'])
+        return frame.sort_values('stale', ascending=False, kind='stable').reset_index(drop=True)
@@ -0,0 +1,92 @@
+# PendemixAI - Per-section wall time and memory profiling of dashboard reruns
+import json
+import os
+import threading
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+
+_log_lock = threading.Lock()
+
+
+def new_rerun_id():
+    return uuid.uuid4().hex[:12]
+
+
+def append_jsonl(path, record):
+    """Append one JSON record as a line; safe across the sessions of one process"""
+    line = json.dumps(record, default=str) + '\n'
+    with _log_lock:
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(line)
+
+
+class SectionProfiler:
+    """Times named sections of one rerun and measures what each allocates.
+
+    Memory is traced with tracemalloc, which every session thread shares, so
+    under concurrent load the byte counts are upper bounds. Each finished
+    section goes to `latest` (section -> record, e.g. st.session_state) and,
+    when log_path is set, to a JSON-lines log. A disabled profiler costs one
+    method call per section.
+    """
+
+    def __init__(self, enabled=True, log_path=None, latest=None, context=None, meter=None):
+        self.enabled = enabled
+        self.log_path = log_path
+        self.latest = latest if latest is not None else {}
+        self.context = context or {}
+        self.rerun_id = new_rerun_id()
+        self.records = []
+        self._open = None
+        # An AllocationMeter spanning the whole rerun; its peak is saved before sections reset it
+        self.meter = meter
+        if enabled and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def begin(self, name):
+        """Start timing a section, ending the one still open (sections never nest)"""
+        self.end()
+        if not self.enabled:
+            return
+        if self.meter is not None:
+            self.meter.observe()
+        tracemalloc.reset_peak()
+        self._open = (name, time.perf_counter(), tracemalloc.get_traced_memory()[0])
+
+    def end(self):
+        """Finish the open section, if any, and record it"""
+        if self._open is None:
+            return None
+        name, started, start_bytes = self._open
+        self._open = None
+        wall_ms = (time.perf_counter() - started) * 1000
+        current, peak = tracemalloc.get_traced_memory()
+        return self.record(name, wall_ms, current - start_bytes, max(0, peak - start_bytes))
+
+    @contextmanager
+    def section(self, name):
+        """begin()/end() around a block, e.g. the body of a fragment"""
+        self.begin(name)
+        try:
+            yield
+        finally:
+            self.end()
+
+    def record(self, name, wall_ms, alloc_bytes=0, peak_bytes=0):
+        record = {
+            'ts': time.time(),
+            'rerun': self.rerun_id,
+            'section': name,
+            'wall_ms': round(wall_ms, 3),
+            'alloc_bytes': alloc_bytes,
+            'peak_bytes': peak_bytes,
+            **self.context
+        }
+        self.records.append(record)
+        self.latest[name] = record
+        if self.log_path:
+            append_jsonl(self.log_path, record)
+        return record
@@ -0,0 +1,168 @@
+# PendemixAI - Daily, weekly and monthly copies of the tensor for long date ranges
+import numpy as np
+import pandas as pd
+
+from pendemix.tensor import VaccinationTensor
+
+LEVELS = ['DAILY', 'WEEKLY', 'MONTHLY']
+
+# Periods of the coarser levels; bins are labelled with their first day
+LEVEL_PERIODS = {'WEEKLY': 'W-SUN', 'MONTHLY': 'M'}
+
+# How one bin summarises the days in it: daily counts add up, cumulative
+# totals keep the last reported value, rates are averaged
+AGGREGATION = {
+    'total_vaccinations': 'last',
+    'daily_vaccinations': 'sum',
+    'people_vaccinated': 'last',
+    'people_fully_vaccinated': 'last',
+    'vaccination_rate': 'mean'
+}
+
+# A level "fills" a chart when it has at least this many points per horizontal pixel
+FILL_POINTS_PER_PIXEL = 0.1
+
+
+def fill_points(chart_width_px, points_per_pixel=FILL_POINTS_PER_PIXEL):
+    """Fewest points a level must have inside the window to be picked automatically"""
+    return max(2, int(chart_width_px * points_per_pixel))
+
+
+def _bin_starts(dates, period):
+    labels = dates.to_period(period).start_time
+    starts = np.flatnonzero(np.r_[True, labels[1:] != labels[:-1]])
+    return starts, pd.DatetimeIndex(labels[starts])
+
+
+def _reduce_bins(values, starts, metrics):
+    """(countries, bins, metrics) array of the day ranges beginning at starts, NaN where nothing was reported"""
+    reported = ~np.isnan(values)
+
+    sums = np.add.reduceat(np.where(reported, values, 0.0), starts, axis=1)
+    counts = np.add.reduceat(reported, starts, axis=1)
+    positions = np.where(reported, np.arange(values.shape[1])[None, :, None], -1)
+    last = np.maximum.reduceat(positions, starts, axis=1)
+
+    binned = np.full(sums.shape, np.nan)
+    for k, metric in enumerate(metrics):
+        how = AGGREGATION.get(metric, 'mean')
+        has = counts[:, :, k] > 0
+        if how == 'sum':
+            column = sums[:, :, k]
+        elif how == 'last':
+            column = np.take_along_axis(values[:, :, k], np.maximum(last[:, :, k], 0), axis=1)
+        else:
+            column = sums[:, :, k] / np.maximum(counts[:, :, k], 1)
+        binned[:, :, k] = np.where(has, column, np.nan)
+    return binned
+
+
+def aggregate_tensor(tensor, period):
+    """Tensor with one date per period, each metric reduced by its AGGREGATION rule.
+
+    Bins with no reported day stay NaN. Partial first and last periods are
+    reduced over the days they have.
+    """
+    if not len(tensor.dates):
+        return tensor
+    starts, labels = _bin_starts(tensor.dates, period)
+    binned = _reduce_bins(tensor.values, starts, tensor.metrics)
+    binned.flags.writeable = False
+    return VaccinationTensor(binned, tensor.countries, labels, tensor.metrics)
+
+
+class TimePyramid:
+    """The daily tensor plus pre-aggregated weekly and monthly levels.
+
+    Built once per dataset version; charts read whichever level suits the
+    selected date range instead of plotting every day of a long series.
+    A weekly or monthly bin cut by the window is re-aggregated over its
+    in-window days, so at most two bins per chart are reduced from daily data.
+    """
+
+    def __init__(self, levels):
+        self.levels = levels
+        # Daily position of every bin's first day, plus the end of the last bin
+        daily_dates = levels['DAILY'].dates
+        self._bounds = {
+            level: np.r_[daily_dates.searchsorted(tensor.dates), len(daily_dates)]
+            for level, tensor in levels.items()
+        }
+
+    @classmethod
+    def from_tensor(cls, tensor):
+        levels = {'DAILY': tensor}
+        for level, period in LEVEL_PERIODS.items():
+            levels[level] = aggregate_tensor(tensor, period)
+        return cls(levels)
+
+    def span(self, level, start=None, end=None):
+        """Bin positions (i, j) of the level's bins overlapping [start, end]"""
+        dates = self.levels[level].dates
+        i = 0 if start is None else max(0, dates.searchsorted(pd.Timestamp(start), side='right') - 1)
+        j = len(dates) if end is None else dates.searchsorted(pd.Timestamp(end), side='right')
+        return i, max(i, j)
+
+    def points(self, level, start=None, end=None):
+        i, j = self.span(level, start, end)
+        return j - i
+
+    def pick_level(self, start=None, end=None, min_points=2):
+        """Coarsest level with at least min_points bins in the window, else DAILY"""
+        for level in reversed(LEVELS):
+            if self.points(level, start, end) >= min_points:
+                return level
+        return 'DAILY'
+
+    def window(self, level, countries, metrics=None, start=None, end=None):
+        """Tensor of the level's bins overlapping [start, end] with only the in-window days in each.
+
+        Whole bins come from the level; a bin the window cuts is reduced again
+        from the daily days inside the window and labelled with the first of them.
+        """
+        tensor, daily = self.levels[level], self.levels['DAILY']
+        metrics = metrics or tensor.metrics
+        ids = tensor._country_ids(countries)
+        names = [tensor.countries[c] for c in ids]
+        columns = [tensor._metric_pos[m] for m in metrics]
+        i, j = self.span(level, start, end)
+        # Daily positions of the window: days a..b-1
+        a = 0 if start is None else daily.dates.searchsorted(pd.Timestamp(start), side='left')
+        b = len(daily.dates) if end is None else daily.dates.searchsorted(pd.Timestamp(end), side='right')
+        if j <= i or b <= a:
+            return VaccinationTensor(np.empty((len(ids), 0, len(metrics))), names, [], metrics)
+
+        bounds = self._bounds[level]
+        lo, hi = i, j
+        head = tail = None
+        if bounds[i] < a:
+            head, lo = (a, min(bounds[i + 1], b)), i + 1
+        if bounds[j] > b and j - 1 >= lo:
+            tail, hi = (max(bounds[j - 1], a), b), j - 1
+
+        def reduce_days(days):
+            block = daily.values[:, days[0]:days[1]][ids][:, :, columns]
+            return _reduce_bins(block, [0], metrics), daily.dates[days[0]:days[0] + 1]
+
+        blocks = [tensor.values[:, lo:hi][ids][:, :, columns]]
+        labels = [tensor.dates[lo:hi]]
+        if head is not None:
+            block, label = reduce_days(head)
+            blocks.insert(0, block)
+            labels.insert(0, label)
+        if tail is not None:
+            block, label = reduce_days(tail)
+            blocks.append(block)
+            labels.append(label)
+        return VaccinationTensor(np.concatenate(blocks, axis=1), names, labels[0].append(labels[1:]), metrics)
+
+    def to_long(self, level, countries, metrics=None, start=None, end=None):
+        """Long-form frame of one level over the window; edge bins only count their in-window days"""
+        if start is None and end is None:
+            return self.levels[level].to_long(countries, metrics)
+        windowed = self.window(level, countries, metrics, start, end)
+        return windowed.to_long(windowed.countries, metrics)
+
+    @property
+    def nbytes(self):
+        return sum(tensor.nbytes for level, tensor in self.levels.items() if level != 'DAILY')
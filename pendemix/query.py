@@ -0,0 +1,422 @@
+# PendemixAI - Query interface behind the dashboard, with pandas and DuckDB engines
+from abc import ABC, abstractmethod
+
+import numpy as np
+import pandas as pd
+
+from pendemix.country_index import CountryIndex
+from pendemix.schema import apply_row_schema
+from pendemix.summary import LATEST_COLUMNS, build_country_summary
+
+QUERY_BACKENDS = ['pandas', 'duckdb']
+
+EXPLORER_PAGE_SIZE = 50
+
+
+class QueryBackend(ABC):
+    """The dashboard's row-level queries over one dataset version.
+
+    Every engine answers the same questions with identical frames: one
+    country's rows, the latest row per country, the top n countries by a
+    metric, long-form comparison series and pages of the full row set.
+    """
+
+    name = None
+
+    def __init__(self, rows, country_table):
+        self.columns = list(rows.columns)
+        self.dtypes = rows.dtypes
+        self.categories = rows['country'].cat.categories
+        self.population = country_table['population_millions']
+
+    def _metric(self, metric):
+        # Metric names end up in SQL, so only known columns are accepted
+        if metric not in self.columns or metric in ('country', 'date'):
+            raise ValueError(f"Unknown metric: {metric}")
+        return metric
+
+    def _sort_column(self, column):
+        if column not in self.columns:
+            raise ValueError(f"Unknown column: {column}")
+        return column
+
+    def _country_filter(self, search=None, countries=None):
+        """Countries allowed by a case-insensitive name search and an optional country list; None means all"""
+        search = (search or '').strip().upper()
+        if not search and countries is None:
+            return None
+        names = list(self.categories) if countries is None else [c for c in countries if c in self.categories]
+        return [name for name in names if search in name.upper()]
+
+    @abstractmethod
+    def country_rows(self, country):
+        """All rows of one country, oldest first"""
+
+    @abstractmethod
+    def latest(self):
+        """One row per country in LATEST_COLUMNS layout: each column's last reported value"""
+
+    @abstractmethod
+    def top_n(self, metric, n, countries=None):
+        """The n countries with the highest latest value of metric; ties keep country order"""
+
+    @abstractmethod
+    def comparison_series(self, countries, metric, start=None, end=None):
+        """Long (country, date, metric) rows for the countries, in the order given, gaps dropped.
+
+        A country listed twice is returned once, at its first position.
+        """
+
+    @abstractmethod
+    def explore(self, search=None, countries=None, start=None, end=None, ranges=None,
+                sort_by='date', descending=False, offset=0, limit=EXPLORER_PAGE_SIZE):
+        """One page of the full row set; returns (page, number of matching rows).
+
+        search matches country names; ranges maps a metric to inclusive
+        (low, high) bounds, either of which may be None, and drops rows where
+        that metric is missing. Rows sort by sort_by with missing values last,
+        ties in (country, date) order.
+        """
+
+
+class PandasBackend(QueryBackend):
+    """Eager pandas over the country-sorted frame, using CountryIndex offsets"""
+
+    name = 'pandas'
+
+    def __init__(self, rows, country_table, summary=None):
+        super().__init__(rows, country_table)
+        self.rows = rows
+        self.index = CountryIndex.from_frame(rows)
+        if summary is None:
+            summary = build_country_summary(rows, country_table)
+        # Stored summaries may predate the compact latest values; same dtypes as every backend
+        self._latest = apply_row_schema(summary[LATEST_COLUMNS].copy())
+        # Built on first use and kept for the data version: (country, day) keys and sort permutations
+        self._keys = None
+        self._orders = {}
+
+    def country_rows(self, country):
+        return self.index.slice(self.rows, country)
+
+    def latest(self):
+        return self._latest
+
+    def top_n(self, metric, n, countries=None):
+        latest = self._latest
+        if countries is not None:
+            latest = latest[latest['country'].isin(countries)]
+        return latest.nlargest(n, self._metric(metric))
+
+    def comparison_series(self, countries, metric, start=None, end=None):
+        series = self.index.take(self.rows, countries)[['country', 'date', self._metric(metric)]]
+        keep = series[metric].notna().to_numpy()
+        if start is not None:
+            keep &= (series['date'] >= pd.Timestamp(start)).to_numpy()
+        if end is not None:
+            keep &= (series['date'] <= pd.Timestamp(end)).to_numpy()
+        return series[keep]
+
+    def _day_keys(self):
+        """Row keys country_code * 2**32 + day, ascending because rows are sorted by country then date"""
+        if self._keys is None:
+            days = self.rows['date'].to_numpy().astype('datetime64[D]').astype(np.int64)
+            self._keys = self.rows['country'].cat.codes.to_numpy().astype(np.int64) * 2 ** 32 + (days - days.min())
+            self._day_zero = days.min()
+        return self._keys
+
+    def _candidates(self, names, start, end):
+        """Row positions of the chosen countries inside the date window, found by binary search"""
+        if names is None and start is None and end is None:
+            return None
+        keys = self._day_keys()
+        codes = np.arange(len(self.categories), dtype=np.int64) if names is None else \
+            np.array([self.index._position[name] for name in names], dtype=np.int64)
+        first = 0 if start is None else np.datetime64(pd.Timestamp(start), 'D').astype(np.int64) - self._day_zero
+        last = 2 ** 32 - 1 if end is None else np.datetime64(pd.Timestamp(end), 'D').astype(np.int64) - self._day_zero
+        starts = np.searchsorted(keys, codes * 2 ** 32 + max(first, 0), side='left')
+        ends = np.searchsorted(keys, codes * 2 ** 32 + min(max(last, -1), 2 ** 32 - 1), side='right')
+        return _concat_ranges(starts, np.maximum(starts, ends))
+
+    def _sort_order(self, column, descending):
+        """Stable permutation of all rows by one column, missing values last; cached per column and direction"""
+        order = self._orders.get((column, descending))
+        if order is None:
+            values = self.rows[column]
+            if column == 'country':
+                values = values.cat.codes.to_numpy().astype(np.float64)
+            elif column == 'date':
+                values = values.to_numpy().astype(np.int64).astype(np.float64)
+            else:
+                values = values.to_numpy(dtype=np.float64, na_value=np.nan)
+            order = np.argsort(-values if descending else values, kind='stable')
+            order.flags.writeable = False
+            self._orders[(column, descending)] = order
+        return order
+
+    def explore(self, search=None, countries=None, start=None, end=None, ranges=None,
+                sort_by='date', descending=False, offset=0, limit=EXPLORER_PAGE_SIZE):
+        order = self._sort_order(self._sort_column(sort_by), descending)
+        candidates = self._candidates(self._country_filter(search, countries), start, end)
+        if candidates is None and not ranges:
+            return self.rows.iloc[order[offset:offset + limit]], len(self.rows)
+
+        if candidates is None:
+            candidates = np.arange(len(self.rows))
+        for metric, (low, high) in (ranges or {}).items():
+            values = self.rows[self._metric(metric)].to_numpy(dtype=np.float64, na_value=np.nan)[candidates]
+            keep = ~np.isnan(values)
+            if low is not None:
+                keep &= values >= low
+            if high is not None:
+                keep &= values <= high
+            candidates = candidates[keep]
+
+        selected = np.zeros(len(self.rows), dtype=bool)
+        selected[candidates] = True
+        matching = order[selected[order]]
+        return self.rows.iloc[matching[offset:offset + limit]], len(matching)
+
+
+def _concat_ranges(starts, ends):
+    """Concatenated np.arange(start, end) for every pair, without a Python loop"""
+    lengths = ends - starts
+    if not lengths.sum():
+        return np.empty(0, dtype=np.int64)
+    offsets = np.repeat(starts - np.concatenate(([0], np.cumsum(lengths)[:-1])), lengths)
+    return offsets + np.arange(lengths.sum())
+
+
+class DuckDBBackend(QueryBackend):
+    """Multi-threaded columnar engine: the rows are copied into an in-memory DuckDB database.
+
+    Each query runs on its own cursor, so concurrent sessions do not share a
+    connection. The latest-per-country table is materialised once at load.
+    Needs the optional duckdb package.
+    """
+
+    name = 'duckdb'
+
+    def __init__(self, rows, country_table, threads=0):
+        try:
+            import duckdb
+        except ImportError as exc:
+            raise ImportError("The duckdb query backend needs duckdb (listed in requirements.txt): pip install duckdb") from exc
+        super().__init__(rows, country_table)
+        self._con = duckdb.connect(':memory:')
+        if threads:
+            self._con.execute(f"SET threads TO {int(threads)}")
+
+        self._con.register('source_rows', rows)
+        self._con.register('source_countries', country_table.reset_index())
+        self._con.execute(
+            "CREATE TABLE rows AS SELECT * REPLACE (CAST(country AS VARCHAR) AS country) "
+            "FROM source_rows ORDER BY country, date"
+        )
+        self._con.execute(
+            "CREATE TABLE countries AS SELECT CAST(country AS VARCHAR) AS country, population_millions "
+            "FROM source_countries"
+        )
+        self._con.unregister('source_rows')
+        self._con.unregister('source_countries')
+
+        # groupby().last() semantics: each column's value on its last reported date
+        last_values = ',\n'.join(
+            f"arg_max({col}, date) FILTER (WHERE {col} IS NOT NULL) AS {col}"
+            for col in self.columns if col not in ('country', 'date')
+        )
+        self._con.execute(f"""
+            CREATE TABLE latest AS
+            SELECT r.*, c.population_millions
+            FROM (SELECT country, max(date) AS date, {last_values} FROM rows GROUP BY country) r
+            LEFT JOIN countries c USING (country)
+            ORDER BY country
+        """)
+        # Latest values follow ROW_SCHEMA like the pandas summary; top_n slices keep the full table's dtypes
+        self._latest_dtypes = apply_row_schema(
+            self._conform(self._query("SELECT * FROM latest"), LATEST_COLUMNS)
+        ).dtypes
+
+    def _query(self, sql, params=None):
+        cursor = self._con.cursor()
+        try:
+            return cursor.execute(sql, params or []).df()
+        finally:
+            cursor.close()
+
+    def _conform(self, frame, columns):
+        """Match the pandas backend's dtypes: categorical country, nanosecond dates, compact metrics"""
+        frame = frame[columns].copy()
+        for col in columns:
+            if col == 'country':
+                frame['country'] = pd.Categorical(frame['country'], categories=self.categories)
+            elif col == 'population_millions':
+                frame[col] = frame[col].astype(self.population.dtype)
+            elif col == 'date':
+                frame[col] = frame[col].astype('datetime64[ns]')
+            elif not (frame[col].isna().any() and np.issubdtype(self.dtypes[col], np.integer)):
+                frame[col] = frame[col].astype(self.dtypes[col])
+        return frame
+
+    def country_rows(self, country):
+        frame = self._query("SELECT * FROM rows WHERE country = ? ORDER BY date", [country])
+        return self._conform(frame, self.columns)
+
+    def _conform_latest(self, frame):
+        frame = self._conform(frame, LATEST_COLUMNS).astype(self._latest_dtypes.drop('country'))
+        frame['country'] = frame['country'].astype(str)
+        return frame
+
+    def latest(self):
+        return self._conform_latest(self._query("SELECT * FROM latest ORDER BY country"))
+
+    def top_n(self, metric, n, countries=None):
+        metric = self._metric(metric)
+        where, params = f"{metric} IS NOT NULL", []
+        if countries is not None:
+            where += " AND list_contains(?, country)"
+            params.append(list(countries))
+        frame = self._query(
+            f"SELECT * FROM latest WHERE {where} ORDER BY {metric} DESC, country LIMIT ?", params + [int(n)]
+        )
+        return self._conform_latest(frame)
+
+    def comparison_series(self, countries, metric, start=None, end=None):
+        metric = self._metric(metric)
+        countries = [c for c in dict.fromkeys(countries) if c in self.categories]
+        where, params = f"list_contains(?, country) AND {metric} IS NOT NULL", [countries]
+        if start is not None:
+            where += " AND date >= ?"
+            params.append(pd.Timestamp(start).to_pydatetime())
+        if end is not None:
+            where += " AND date <= ?"
+            params.append(pd.Timestamp(end).to_pydatetime())
+        frame = self._query(
+            f"SELECT country, date, {metric} FROM rows WHERE {where} "
+            f"ORDER BY list_position(?, country), date",
+            params + [countries]
+        )
+        return self._conform(frame, ['country', 'date', metric])
+
+    def explore(self, search=None, countries=None, start=None, end=None, ranges=None,
+                sort_by='date', descending=False, offset=0, limit=EXPLORER_PAGE_SIZE):
+        sort_by = self._sort_column(sort_by)
+        where, params = ['TRUE'], []
+        names = self._country_filter(search, countries)
+        if names is not None:
+            where.append("list_contains(?, country)")
+            params.append(names)
+        if start is not None:
+            where.append("date >= ?")
+            params.append(pd.Timestamp(start).to_pydatetime())
+        if end is not None:
+            where.append("date < ?")
+            params.append((pd.Timestamp(end).normalize() + pd.Timedelta(days=1)).to_pydatetime())
+        for metric, (low, high) in (ranges or {}).items():
+            metric = self._metric(metric)
+            where.append(f"{metric} IS NOT NULL")
+            if low is not None:
+                where.append(f"{metric} >= ?")
+                params.append(float(low))
+            if high is not None:
+                where.append(f"{metric} <= ?")
+                params.append(float(high))
+        where = ' AND '.join(where)
+
+        total = int(self._query(f"SELECT count(*) AS n FROM rows WHERE {where}", params)['n'].iloc[0])
+        frame = self._query(
+            f"SELECT * FROM rows WHERE {where} "
+            f"ORDER BY {sort_by} {'DESC' if descending else 'ASC'} NULLS LAST, country, date LIMIT ? OFFSET ?",
+            params + [int(limit), int(offset)]
+        )
+        return self._conform(frame, self.columns), total
+
+
+def make_backend(name, rows, country_table, summary=None, threads=0):
+    """The configured query engine over one dataset version"""
+    if name == 'pandas':
+        return PandasBackend(rows, country_table, summary)
+    if name == 'duckdb':
+        return DuckDBBackend(rows, country_table, threads)
+    raise ValueError(f"Unknown query backend: {name} (expected one of {', '.join(QUERY_BACKENDS)})")
+
+
+def _same(a, b):
+    try:
+        pd.testing.assert_frame_equal(
+            a.reset_index(drop=True), b.reset_index(drop=True), check_dtype=True, check_categorical=False
+        )
+    except AssertionError as exc:
+        return str(exc).splitlines()[0]
+    return None
+
+
+def cross_check(expected, actual, countries=None, metrics=('total_vaccinations', 'vaccination_rate'), n=20):
+    """Run every query on both backends; returns a list of (query, difference) for mismatches"""
+    countries = list(countries) if countries is not None else list(expected.categories)
+    checks = [('latest', lambda backend: backend.latest())]
+    for country in countries:
+        checks.append((f'country_rows {country}', lambda backend, c=country: backend.country_rows(c)))
+    for metric in metrics:
+        checks.append((f'top_n {metric}', lambda backend, m=metric: backend.top_n(m, n)))
+        checks.append((f'top_n {metric} in subset',
+                       lambda backend, m=metric: backend.top_n(m, n, countries[::2])))
+        checks.append((f'comparison_series {metric}',
+                       lambda backend, m=metric: backend.comparison_series(countries[:10], m)))
+        checks.append((f'comparison_series {metric} with a repeated country',
+                       lambda backend, m=metric: backend.comparison_series(countries[1:3] + countries[:3], m)))
+        for descending in (False, True):
+            checks.append((f'explore sorted by {metric}{" descending" if descending else ""}',
+                           lambda backend, m=metric, d=descending: backend.explore(
+                               sort_by=m, descending=d, offset=n, limit=n)))
+    explore_cases = {
+        'all rows': {},
+        'last page': {'offset': max(0, expected.explore(limit=0)[1] - 10)},
+        'search': {'search': countries[0][:3].lower(), 'sort_by': 'country', 'descending': True},
+        'countries and dates': {'countries': countries[:5], 'start': '2021-03-01', 'end': '2021-06-30',
+                                'sort_by': metrics[0], 'descending': True},
+        'metric range': {'ranges': {metrics[-1]: (10, 60)}, 'sort_by': metrics[-1]},
+        'no match': {'search': 'NO SUCH COUNTRY'}
+    }
+    for case, kwargs in explore_cases.items():
+        checks.append((f'explore {case}', lambda backend, k=kwargs: backend.explore(**k)))
+    mismatches = []
+    for query, run in checks:
+        a, b = run(expected), run(actual)
+        if isinstance(a, tuple):
+            # explore: compare the match counts, then the pages
+            difference = f"{a[1]:,} rows match, not {b[1]:,}" if a[1] != b[1] else _same(a[0], b[0])
+        else:
+            difference = _same(a, b)
+        if difference:
+            mismatches.append((query, difference))
+    return mismatches
+
+
+if __name__ == '__main__':
+    import argparse
+    import sys
+    import time
+
+    from pendemix.storage import load_dataset
+
+    parser = argparse.ArgumentParser(description='Cross-check a query backend against pandas')
+    parser.add_argument('--backend', default='duckdb', choices=QUERY_BACKENDS, help='backend to compare with pandas')
+    parser.add_argument('--threads', type=int, default=0, help='engine threads (0 = engine default)')
+    args = parser.parse_args()
+
+    rows, country_table = load_dataset()
+    backends = []
+    for name in ['pandas', args.backend]:
+        started = time.perf_counter()
+        backends.append(make_backend(name, rows, country_table, threads=args.threads))
+        print(f"{name}: loaded {len(rows):,} rows in {(time.perf_counter() - started) * 1000:,.1f} ms")
+
+    started = time.perf_counter()
+    mismatches = cross_check(*backends)
+    print(f"Cross-checked in {time.perf_counter() - started:.2f}s")
+    for query, difference in mismatches:
+        print(f"MISMATCH {query}: {difference}")
+    if mismatches:
+        sys.exit(1)
+    print(f"{args.backend} matches pandas on every query")
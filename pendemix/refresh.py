@@ -0,0 +1,118 @@
+# PendemixAI - Background data refresh with an atomic swap of the published snapshot
+import threading
+import time
+from collections import namedtuple
+
+# version: the data key the snapshot was built for; data: whatever build() returned
+Snapshot = namedtuple('Snapshot', ['version', 'data', 'built_at', 'build_seconds'])
+
+
+def format_age(seconds):
+    """Short uppercase duration for status captions, e.g. 45 S, 3 MIN, 2 H"""
+    if seconds is None:
+        return 'NEVER'
+    if seconds < 60:
+        return f"{seconds:.0f} S"
+    if seconds < 3600:
+        return f"{seconds / 60:.0f} MIN"
+    return f"{seconds / 3600:.1f} H"
+
+
+class DataRefresher:
+    """Rebuilds the dataset on a background thread and publishes it as one snapshot.
+
+    check() returns the current data version and should be cheap;
+    build(version, previous_snapshot) returns what the app serves for that
+    version. Publishing is a single reference assignment, so a reader that
+    takes `snapshot` once per rerun sees either the old or the new data,
+    never a mix, and requests never wait for a rebuild after the first one.
+    A failed check or build keeps the previous snapshot and is retried at
+    the next interval.
+    """
+
+    def __init__(self, check, build, interval=60):
+        self.check = check
+        self.build = build
+        self.interval = interval
+        self._snapshot = None
+        self._ready = threading.Event()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        self.refreshing = False
+        self.refreshes = 0
+        self.last_check = None
+        self.last_error = None
+
+    @property
+    def snapshot(self):
+        return self._snapshot
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='pendemix-refresh', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def request_refresh(self):
+        """Check for a new version now instead of at the next interval"""
+        self._wake.set()
+
+    def wait(self, timeout=None):
+        """The published snapshot; blocks until the first refresh attempt has finished.
+
+        Returns None when that attempt failed (see last_error).
+        """
+        self._ready.wait(timeout)
+        return self._snapshot
+
+    def refresh_once(self):
+        """Rebuild and publish when the data version changed; returns True when a new snapshot went live"""
+        checked = time.time()
+        try:
+            version = self.check()
+            previous = self._snapshot
+            if previous is not None and previous.version == version:
+                self.last_error = None
+                return False
+            self.refreshing = True
+            started = time.perf_counter()
+            data = self.build(version, previous)
+            self._snapshot = Snapshot(version, data, time.time(), time.perf_counter() - started)
+            self.refreshes += 1
+            self.last_error = None
+            return True
+        except Exception as exc:
+            self.last_error = f"{type(exc).__name__}: {exc}"
+            return False
+        finally:
+            self.refreshing = False
+            self.last_check = checked
+            self._ready.set()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self.refresh_once()
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def status(self, now=None):
+        """Staleness and timing of the published snapshot, in seconds"""
+        now = now or time.time()
+        snapshot = self._snapshot
+        return {
+            'version': snapshot.version if snapshot else None,
+            'age_s': now - snapshot.built_at if snapshot else None,
+            'build_s': snapshot.build_seconds if snapshot else None,
+            'checked_s': now - self.last_check if self.last_check else None,
+            'next_check_s': max(0.0, self.last_check + self.interval - now) if self.last_check else None,
+            'refreshing': self.refreshing,
+            'refreshes': self.refreshes,
+            'last_error': self.last_error
+        }
@@ -0,0 +1,265 @@
+# PendemixAI - Country to region / sub-region mapping and the regional rollup
+import numpy as np
+import pandas as pd
+
+# Region -> sub-region -> countries (UN geoscheme sub-regions; the Americas split
+# into NORTH AMERICA, covering Central America and the Caribbean, and SOUTH AMERICA)
+SUB_REGIONS = {
+    'ASIA': {
+        'CENTRAL ASIA': ['KAZAKHSTAN', 'KYRGYZSTAN', 'TAJIKISTAN', 'TURKMENISTAN', 'UZBEKISTAN'],
+        'EASTERN ASIA': ['CHINA', 'JAPAN', 'MONGOLIA', 'NORTH KOREA', 'SOUTH KOREA', 'TAIWAN'],
+        'SOUTH-EASTERN ASIA': [
+            'BRUNEI', 'CAMBODIA', 'INDONESIA', 'LAOS', 'MALAYSIA', 'MYANMAR', 'PHILIPPINES',
+            'SINGAPORE', 'THAILAND', 'TIMOR-LESTE', 'VIETNAM'
+        ],
+        'SOUTHERN ASIA': [
+            'AFGHANISTAN', 'BANGLADESH', 'BHUTAN', 'INDIA', 'IRAN', 'MALDIVES', 'NEPAL', 'PAKISTAN',
+            'SRI LANKA'
+        ],
+        'WESTERN ASIA': [
+            'ARMENIA', 'AZERBAIJAN', 'BAHRAIN', 'CYPRUS', 'GEORGIA', 'IRAQ', 'ISRAEL', 'JORDAN',
+            'KUWAIT', 'LEBANON', 'OMAN', 'PALESTINE', 'QATAR', 'SAUDI ARABIA', 'SYRIA', 'TURKEY',
+            'UNITED ARAB EMIRATES', 'YEMEN'
+        ]
+    },
+    'EUROPE': {
+        'EASTERN EUROPE': [
+            'BELARUS', 'BULGARIA', 'CZECH REPUBLIC', 'HUNGARY', 'MOLDOVA', 'POLAND', 'ROMANIA',
+            'RUSSIA', 'SLOVAKIA', 'UKRAINE'
+        ],
+        'NORTHERN EUROPE': [
+            'DENMARK', 'ESTONIA', 'FINLAND', 'ICELAND', 'IRELAND', 'LATVIA', 'LITHUANIA', 'NORWAY',
+            'SWEDEN', 'UNITED KINGDOM'
+        ],
+        'SOUTHERN EUROPE': [
+            'ALBANIA', 'ANDORRA', 'BOSNIA AND HERZEGOVINA', 'CROATIA', 'GREECE', 'ITALY', 'KOSOVO',
+            'MALTA', 'MONTENEGRO', 'NORTH MACEDONIA', 'PORTUGAL', 'SAN MARINO', 'SERBIA', 'SLOVENIA',
+            'SPAIN', 'VATICAN CITY'
+        ],
+        'WESTERN EUROPE': [
+            'AUSTRIA', 'BELGIUM', 'FRANCE', 'GERMANY', 'LIECHTENSTEIN', 'LUXEMBOURG', 'MONACO',
+            'NETHERLANDS', 'SWITZERLAND'
+        ]
+    },
+    'NORTH AMERICA': {
+        'NORTHERN AMERICA': ['CANADA', 'UNITED STATES'],
+        'CENTRAL AMERICA': [
+            'BELIZE', 'COSTA RICA', 'EL SALVADOR', 'GUATEMALA', 'HONDURAS', 'MEXICO', 'NICARAGUA',
+            'PANAMA'
+        ],
+        'CARIBBEAN': [
+            'ANTIGUA AND BARBUDA', 'BAHAMAS', 'BARBADOS', 'CUBA', 'DOMINICA', 'DOMINICAN REPUBLIC',
+            'GRENADA', 'HAITI', 'JAMAICA', 'SAINT KITTS AND NEVIS', 'SAINT LUCIA',
+            'SAINT VINCENT AND THE GRENADINES', 'TRINIDAD AND TOBAGO'
+        ]
+    },
+    'SOUTH AMERICA': {
+        'SOUTH AMERICA': [
+            'ARGENTINA', 'BOLIVIA', 'BRAZIL', 'CHILE', 'COLOMBIA', 'ECUADOR', 'GUYANA', 'PARAGUAY',
+            'PERU', 'SURINAME', 'URUGUAY', 'VENEZUELA'
+        ]
+    },
+    'AFRICA': {
+        'NORTHERN AFRICA': ['ALGERIA', 'EGYPT', 'LIBYA', 'MOROCCO', 'SUDAN', 'TUNISIA'],
+        'WESTERN AFRICA': [
+            'BENIN', 'BURKINA FASO', 'CABO VERDE', "CÔTE D'IVOIRE", 'GAMBIA', 'GHANA', 'GUINEA',
+            'GUINEA-BISSAU', 'LIBERIA', 'MALI', 'MAURITANIA', 'NIGER', 'NIGERIA', 'SENEGAL',
+            'SIERRA LEONE', 'TOGO'
+        ],
+        'MIDDLE AFRICA': [
+            'ANGOLA', 'CAMEROON', 'CENTRAL AFRICAN REPUBLIC', 'CHAD', 'CONGO',
+            'DEMOCRATIC REPUBLIC OF THE CONGO', 'EQUATORIAL GUINEA', 'GABON', 'SAO TOME AND PRINCIPE'
+        ],
+        'EASTERN AFRICA': [
+            'BURUNDI', 'COMOROS', 'DJIBOUTI', 'ERITREA', 'ETHIOPIA', 'KENYA', 'MADAGASCAR', 'MALAWI',
+            'MAURITIUS', 'MOZAMBIQUE', 'RWANDA', 'SEYCHELLES', 'SOMALIA', 'SOUTH SUDAN', 'TANZANIA',
+            'UGANDA', 'ZAMBIA', 'ZIMBABWE'
+        ],
+        'SOUTHERN AFRICA': ['BOTSWANA', 'ESWATINI', 'LESOTHO', 'NAMIBIA', 'SOUTH AFRICA']
+    },
+    'OCEANIA': {
+        'AUSTRALIA AND NEW ZEALAND': ['AUSTRALIA', 'NEW ZEALAND'],
+        'MELANESIA': ['FIJI', 'PAPUA NEW GUINEA', 'SOLOMON ISLANDS', 'VANUATU'],
+        'MICRONESIA': ['KIRIBATI', 'MARSHALL ISLANDS', 'MICRONESIA', 'NAURU', 'PALAU'],
+        'POLYNESIA': ['SAMOA', 'TONGA', 'TUVALU']
+    }
+}
+
+REGIONS = list(SUB_REGIONS)
+
+# Countries missing from the mapping (e.g. new names in an ingested feed) land here
+OTHER = 'OTHER'
+
+# country -> (region, sub-region)
+COUNTRY_REGIONS = {
+    country: (region, sub_region)
+    for region, sub_regions in SUB_REGIONS.items()
+    for sub_region, countries in sub_regions.items()
+    for country in countries
+}
+
+
+def region_of(country):
+    return COUNTRY_REGIONS.get(country, (OTHER, OTHER))[0]
+
+
+def sub_region_of(country):
+    return COUNTRY_REGIONS.get(country, (OTHER, OTHER))[1]
+
+
+def countries_in(countries, region=None, sub_region=None):
+    """The given countries that belong to region and/or sub_region, in their original order"""
+    return [
+        country for country in countries
+        if (region is None or region_of(country) == region)
+        and (sub_region is None or sub_region_of(country) == sub_region)
+    ]
+
+
+# Channels summed per sub-region and date. Levels are forward-filled per country,
+# so a country that skips a day still counts towards its region's running total.
+ROLLUP_CHANNELS = [
+    'daily_vaccinations', 'total_vaccinations', 'people_vaccinated',
+    'rate_x_population', 'reporting_population'
+]
+
+
+def _contributions(windows, population):
+    """(countries, dates, channels) array of what each country adds to its sub-region"""
+    k_daily = windows.metrics.index('daily_vaccinations')
+    daily = np.diff(windows.sums[:, :, k_daily], axis=1)
+    total = windows.carried[:, :, windows.metrics.index('total_vaccinations')]
+    people = windows.carried[:, :, windows.metrics.index('people_vaccinated')]
+    rate = windows.carried[:, :, windows.metrics.index('vaccination_rate')]
+
+    pop = population.reindex(windows.countries).to_numpy(dtype=np.float64)[:, None]
+    weighted = ~np.isnan(rate) & ~np.isnan(pop)
+    return np.stack([
+        daily,
+        np.nan_to_num(total),
+        np.nan_to_num(people),
+        np.where(weighted, rate * pop, 0.0),
+        np.where(weighted, pop, 0.0)
+    ], axis=2)
+
+
+class RegionRollup:
+    """Daily sub-region sums of every rollup channel, built once per data version.
+
+    Region figures are sums of their sub-regions, and the vaccination rate is
+    population weighted: sum(rate x population) / population of the reporting
+    countries. updated() folds a new data version in by re-adding only the
+    countries whose data changed.
+    """
+
+    def __init__(self, sums, groups, dates, country_groups, population):
+        self.sums = sums
+        self.groups = list(groups)
+        self.dates = pd.DatetimeIndex(dates)
+        # country -> sub-region and population (millions) behind these sums
+        self.country_groups = dict(country_groups)
+        self.population = population
+
+    @staticmethod
+    def _group_list(countries):
+        groups = [sub for subs in SUB_REGIONS.values() for sub in subs]
+        if any(sub_region_of(c) == OTHER for c in countries):
+            groups.append(OTHER)
+        return groups
+
+    @classmethod
+    def build(cls, windows, population):
+        groups = cls._group_list(windows.countries)
+        group_pos = {group: g for g, group in enumerate(groups)}
+        country_groups = {c: sub_region_of(c) for c in windows.countries}
+        gid = np.array([group_pos[country_groups[c]] for c in windows.countries], dtype=np.int64)
+
+        sums = np.zeros((len(groups), len(windows.dates), len(ROLLUP_CHANNELS)))
+        np.add.at(sums, gid, _contributions(windows, population))
+        sums.flags.writeable = False
+        return cls(sums, groups, windows.dates, country_groups, population)
+
+    def updated(self, old_windows, windows, population, changed=None):
+        """Rollup for a new data version, adjusting only the sub-regions of changed countries.
+
+        The new data must start on the same date as the old and may extend it.
+        Countries in `changed` (default: detected by comparing contributions)
+        have their old contribution subtracted and their new one added.
+        Anything else triggers a full rebuild.
+        """
+        n_old = len(self.dates)
+        extra = len(windows.dates) - n_old
+        if (not n_old or extra < 0 or windows.dates[0] != self.dates[0]
+                or self._group_list(windows.countries) != self.groups):
+            return RegionRollup.build(windows, population)
+
+        def pad(array):
+            # On dates past the old data an unchanged country adds no daily doses and holds its levels
+            if not extra:
+                return array
+            tail = np.repeat(array[:, -1:], extra, axis=1)
+            tail[:, :, 0] = 0.0
+            return np.concatenate([array, tail], axis=1)
+
+        old = pad(_contributions(old_windows, self.population))
+        new = _contributions(windows, population)
+        sums = pad(self.sums).copy()
+        old_pos = {c: i for i, c in enumerate(old_windows.countries)}
+        new_pos = {c: i for i, c in enumerate(windows.countries)}
+
+        if changed is None:
+            shared = [c for c in windows.countries if c in old_pos]
+            same = np.all(
+                old[[old_pos[c] for c in shared]] == new[[new_pos[c] for c in shared]], axis=(1, 2)
+            )
+            changed = [c for c, unchanged in zip(shared, same) if not unchanged]
+            changed += [c for c in windows.countries if c not in old_pos]
+            changed += [c for c in old_windows.countries if c not in new_pos]
+
+        group_pos = {group: g for g, group in enumerate(self.groups)}
+        for country in changed:
+            if country in old_pos:
+                sums[group_pos[self.country_groups[country]]] -= old[old_pos[country]]
+            if country in new_pos:
+                sums[group_pos[sub_region_of(country)]] += new[new_pos[country]]
+        sums.flags.writeable = False
+        return RegionRollup(sums, self.groups, windows.dates, {c: sub_region_of(c) for c in windows.countries}, population)
+
+    def _parents(self):
+        return [OTHER if group == OTHER else next(r for r, subs in SUB_REGIONS.items() if group in subs)
+                for group in self.groups]
+
+    def series(self, metric, level='region', start=None, end=None):
+        """Date x group frame of one metric at 'region' or 'sub_region' level"""
+        # Only groups with at least one country in the data
+        present = set(self.country_groups.values())
+        kept = [g for g, group in enumerate(self.groups) if group in present]
+        if level == 'region':
+            names = self._parents()
+            order = [r for r in REGIONS + [OTHER] if any(names[g] == r for g in kept)]
+            block = np.stack([
+                self.sums[[g for g in kept if names[g] == region]].sum(axis=0)
+                for region in order
+            ]) if order else self.sums[:0]
+        else:
+            order, block = [self.groups[g] for g in kept], self.sums[kept]
+
+        if metric == 'vaccination_rate':
+            with np.errstate(all='ignore'):
+                values = block[:, :, 3] / np.where(block[:, :, 4] > 0, block[:, :, 4], np.nan)
+        else:
+            values = block[:, :, ROLLUP_CHANNELS.index(metric)]
+        frame = pd.DataFrame(values.T, index=self.dates, columns=order)
+        frame.index.name = 'date'
+        frame.columns.name = level
+        lo = None if start is None else pd.Timestamp(start)
+        hi = None if end is None else pd.Timestamp(end)
+        return frame.loc[lo:hi]
+
+    def to_long(self, metric, level='region', start=None, end=None):
+        """Long (date, group, metric) frame for plotting"""
+        return self.series(metric, level, start, end).stack().rename(metric).reset_index()
+
+    @property
+    def nbytes(self):
+        return self.sums.nbytes
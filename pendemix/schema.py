@@ -0,0 +1,102 @@
+# PendemixAI - Compact dtype schema and memory-footprint report
+import numpy as np
+import pandas as pd
+
+from pendemix.country_index import sort_by_country
+
+# Per-row columns and their compact dtypes; country becomes a sorted categorical
+# and date stays datetime64 for plotting
+ROW_SCHEMA = {
+    'total_vaccinations': np.uint32,
+    'daily_vaccinations': np.uint32,
+    'people_vaccinated': np.uint32,
+    'people_fully_vaccinated': np.uint32,
+    'vaccination_rate': np.float32
+}
+
+# Values that only vary by country live in a side table indexed by country
+COUNTRY_SCHEMA = {
+    'population_millions': np.float32
+}
+
+# Column order of the wide frame the generator produces and downloads use
+WIDE_COLUMNS = [
+    'country', 'date', 'total_vaccinations', 'daily_vaccinations', 'people_vaccinated',
+    'people_fully_vaccinated', 'population_millions', 'vaccination_rate'
+]
+
+
+def _fit(values, dtype):
+    """Cast to dtype when every value fits, otherwise keep the wider original"""
+    if np.issubdtype(dtype, np.integer):
+        # Gaps in real feeds arrive as NaN, which integer columns cannot hold
+        if values.isna().any():
+            return values
+        info = np.iinfo(dtype)
+        if len(values) and (values.min() < info.min or values.max() > info.max):
+            return values
+    return values.astype(dtype)
+
+
+def apply_row_schema(rows):
+    """Cast the per-row metric columns to ROW_SCHEMA wherever the values allow"""
+    for col, dtype in ROW_SCHEMA.items():
+        rows[col] = _fit(rows[col], dtype)
+    return rows
+
+
+def compact_frame(df):
+    """Split a wide frame into compact per-row data and a per-country side table.
+
+    Rows come back sorted by country and date with a categorical country column.
+    """
+    rows = apply_row_schema(sort_by_country(df.drop(columns=list(COUNTRY_SCHEMA))))
+
+    countries = df.groupby(df['country'].astype(str), sort=True)[list(COUNTRY_SCHEMA)].first()
+    for col, dtype in COUNTRY_SCHEMA.items():
+        countries[col] = _fit(countries[col], dtype)
+    countries.index.name = 'country'
+    return rows, countries
+
+
+def expand_rows(rows, countries):
+    """Re-attach the per-country columns to rows, in the original wide column order"""
+    wide = rows.join(countries, on='country')
+    return wide[[c for c in WIDE_COLUMNS if c in wide.columns]]
+
+
+def memory_report(df, rows, countries):
+    """Bytes per column for the wide frame versus the compact rows plus side table"""
+    before = df.memory_usage(index=False, deep=True)
+    after = pd.concat([
+        rows.memory_usage(index=False, deep=True),
+        countries.memory_usage(index=False, deep=True)
+    ])
+    report = pd.DataFrame({
+        'dtype_before': df.dtypes.astype(str),
+        'bytes_before': before,
+        'dtype_after': pd.concat([rows.dtypes, countries.dtypes]).astype(str),
+        'bytes_after': after
+    })
+    report = report.reindex([c for c in WIDE_COLUMNS if c in report.index])
+    report.loc['TOTAL', ['bytes_before', 'bytes_after']] = [before.sum(), after.sum()]
+    report['bytes_before'] = report['bytes_before'].astype(np.int64)
+    report['bytes_after'] = report['bytes_after'].fillna(0).astype(np.int64)
+    report['saving_pct'] = (1 - report['bytes_after'] / report['bytes_before']) * 100
+    return report
+
+
+if __name__ == '__main__':
+    import argparse
+
+    from pendemix.generator import DEFAULT_DAYS_PER_COUNTRY, generate_vaccination_data
+
+    parser = argparse.ArgumentParser(description='Report per-column memory before and after the compact schema')
+    parser.add_argument('--countries', type=int, default=None, help='number of country series (default: all)')
+    parser.add_argument('--days', type=int, default=DEFAULT_DAYS_PER_COUNTRY, help='days per country')
+    args = parser.parse_args()
+
+    wide = generate_vaccination_data(n_countries=args.countries, days_per_country=args.days)
+    compact_rows, country_table = compact_frame(wide)
+    print(f"{len(wide):,} rows x {len(country_table):,} countries")
+    print(memory_report(wide, compact_rows, country_table).to_string())
@@ -0,0 +1,125 @@
+# PendemixAI - Read-only frames shared by every session in the process
+import tracemalloc
+
+import pandas as pd
+
+
+class FrozenDataError(TypeError):
+    """Raised when code tries to modify a shared read-only frame in place"""
+
+
+def _refuse(*args, **kwargs):
+    raise FrozenDataError(
+        "Shared dataset is read-only; take a .copy() before modifying it"
+    )
+
+
+class _ReadOnlyIndexer:
+    """Wraps .loc/.iloc/.at/.iat so reads work and assignments fail"""
+
+    def __init__(self, indexer):
+        self._indexer = indexer
+
+    def __getitem__(self, key):
+        return self._indexer[key]
+
+    __setitem__ = _refuse
+
+    def __call__(self, axis=None):
+        return _ReadOnlyIndexer(self._indexer(axis))
+
+    def __getattr__(self, name):
+        return getattr(self._indexer, name)
+
+
+class FrozenFrame(pd.DataFrame):
+    """DataFrame whose values, columns and index cannot be changed in place.
+
+    Every operation that derives a new frame (filters, groupbys, copies)
+    returns a plain, writable DataFrame.
+    """
+
+    @property
+    def _constructor(self):
+        return pd.DataFrame
+
+    @property
+    def loc(self):
+        return _ReadOnlyIndexer(super().loc)
+
+    @property
+    def iloc(self):
+        return _ReadOnlyIndexer(super().iloc)
+
+    @property
+    def at(self):
+        return _ReadOnlyIndexer(super().at)
+
+    @property
+    def iat(self):
+        return _ReadOnlyIndexer(super().iat)
+
+    __setitem__ = _refuse
+    __delitem__ = _refuse
+    insert = _refuse
+    pop = _refuse
+    update = _refuse
+    _update_inplace = _refuse
+
+    def __setattr__(self, name, value):
+        # pandas sets private attributes during construction; block public ones
+        # such as df.columns = [...] or df.index = [...]
+        if not name.startswith('_') and hasattr(self, '_mgr'):
+            _refuse()
+        super().__setattr__(name, value)
+
+
+def freeze_frame(df):
+    """Return a FrozenFrame over df's column arrays, marked read-only, without copying"""
+    columns = {}
+    for col in df.columns:
+        series = df[col]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            # Rebuild the categorical around read-only codes instead of materializing strings
+            codes = series.cat.codes.to_numpy(copy=False)
+            codes.flags.writeable = False
+            columns[col] = pd.Categorical.from_codes(codes, dtype=series.dtype)
+            continue
+        values = series.to_numpy(copy=False)
+        values.flags.writeable = False
+        columns[col] = values
+    # copy=False keeps one block per column, so the read-only views are used as-is
+    return FrozenFrame(columns, index=df.index, copy=False)
+
+
+class AllocationMeter:
+    """Measures bytes allocated by the Python process between start() and stop().
+
+    Reruns from concurrent sessions run on separate threads of the same process
+    and tracemalloc counts them together, so under load the figure is an upper
+    bound for a single session.
+    """
+
+    def __init__(self):
+        self.start_bytes = 0
+        self.net_bytes = 0
+        self.peak_bytes = 0
+        self._observed_peak = 0
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        self.start_bytes = tracemalloc.get_traced_memory()[0]
+        self._observed_peak = self.start_bytes
+        return self
+
+    def observe(self):
+        """Remember the peak so far; call before anything else resets tracemalloc's peak"""
+        self._observed_peak = max(self._observed_peak, tracemalloc.get_traced_memory()[1])
+
+    def stop(self):
+        self.observe()
+        self.net_bytes = tracemalloc.get_traced_memory()[0] - self.start_bytes
+        self.peak_bytes = max(0, self._observed_peak - self.start_bytes)
+        return self
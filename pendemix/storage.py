@@ -0,0 +1,156 @@
+# PendemixAI - Persistent columnar cache for the vaccination dataset
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from pendemix.schema import compact_frame
+from pendemix.generator import (
+    DEFAULT_DAYS_PER_COUNTRY, DEFAULT_SEED, DEFAULT_START_DATE, generate_vaccination_data
+)
+
+# Bump whenever the generator or the stored layout changes so old files are ignored
+DATA_VERSION = 3
+
+CACHE_DIR = os.environ.get(
+    'PENDEMIX_CACHE_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.pendemix_cache')
+)
+
+
+def dataset_params(seed=DEFAULT_SEED, n_countries=None,
+                   days_per_country=DEFAULT_DAYS_PER_COUNTRY, start_date=DEFAULT_START_DATE):
+    """Normalize generator parameters into the dict used for cache keys"""
+    return {
+        'seed': seed,
+        'n_countries': n_countries,
+        'days_per_country': days_per_country,
+        'start_date': str(start_date),
+        'data_version': DATA_VERSION
+    }
+
+
+def dataset_key(params):
+    """Short stable hash of the parameters, used to name cached and derived files"""
+    return hashlib.sha1(json.dumps(params, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+
+def cache_path(params, cache_dir=None):
+    """Return the Feather file that stores the dataset for these parameters"""
+    return os.path.join(cache_dir or CACHE_DIR, f"vaccination_{dataset_key(params)}.feather")
+
+
+def countries_path(path):
+    """Return the side-table file stored next to a dataset file"""
+    return path[:-len('.feather')] + '.countries.feather'
+
+
+def _write_feather(df, path):
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    os.close(fd)
+    try:
+        feather.write_feather(df, tmp_path, compression='uncompressed')
+        # Atomic rename so concurrent workers never see a half-written file
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def write_dataset(rows, countries, path):
+    """Write rows and the country side table as uncompressed Feather so they can be memory-mapped back"""
+    # Side table first: a dataset file only counts as cached once both exist
+    _write_feather(countries.reset_index(), countries_path(path))
+    _write_feather(rows, path)
+
+
+def read_dataset(path):
+    """Read cached rows and side table memory-mapped; returns None if missing or unreadable"""
+    if not (os.path.exists(path) and os.path.exists(countries_path(path))):
+        return None
+    try:
+        rows = feather.read_table(path, memory_map=True).to_pandas(split_blocks=True)
+        countries = feather.read_table(countries_path(path), memory_map=True).to_pandas()
+        return rows, countries.set_index('country')
+    except (OSError, ValueError, KeyError, pa.ArrowException):
+        # Corrupt or truncated file: drop it so the next load regenerates
+        invalidate_cache(path=path)
+        return None
+
+
+def load_dataset(seed=DEFAULT_SEED, n_countries=None,
+                 days_per_country=DEFAULT_DAYS_PER_COUNTRY, start_date=DEFAULT_START_DATE,
+                 cache_dir=None):
+    """Load (rows, countries) from the on-disk cache, generating and storing them on a miss.
+
+    Rows follow schema.ROW_SCHEMA, sorted by country and date; countries is the
+    per-country side table indexed by country name.
+    """
+    params = dataset_params(seed, n_countries, days_per_country, start_date)
+    path = cache_path(params, cache_dir)
+
+    cached = read_dataset(path)
+    if cached is not None:
+        return cached
+
+    rows, countries = compact_frame(generate_vaccination_data(
+        seed=seed,
+        n_countries=n_countries,
+        days_per_country=days_per_country,
+        start_date=start_date
+    ))
+    try:
+        write_dataset(rows, countries, path)
+    except OSError:
+        # Read-only or full disk: serve the generated frames without caching
+        pass
+    return rows, countries
+
+
+def invalidate_cache(params=None, path=None, cache_dir=None):
+    """Delete one cached dataset (by params or path), or every cached file if neither is given"""
+    if params is not None:
+        path = cache_path(params, cache_dir)
+    if path is not None:
+        paths = [path, countries_path(path)]
+    else:
+        directory = cache_dir or CACHE_DIR
+        if not os.path.isdir(directory):
+            return 0
+        paths = [
+            os.path.join(directory, name) for name in os.listdir(directory)
+            if name.endswith('.feather')
+        ]
+        # Derived files (e.g. download exports) live in subdirectories
+        for name in os.listdir(directory):
+            if os.path.isdir(os.path.join(directory, name)):
+                shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+
+    removed = 0
+    for p in paths:
+        try:
+            os.remove(p)
+            removed += 1
+        except FileNotFoundError:
+            pass
+    return removed
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Manage the PendemixAI dataset cache')
+    parser.add_argument('--clear', action='store_true', help='delete every cached dataset file')
+    args = parser.parse_args()
+
+    if args.clear:
+        print(f"Removed {invalidate_cache()} cached dataset file(s) from {CACHE_DIR}")
+    else:
+        load_dataset()
+        print(f"Dataset cached at {cache_path(dataset_params())}")
@@ -0,0 +1,90 @@
+# PendemixAI - Per-country summary table and global metric-card values
+import numpy as np
+
+from pendemix.schema import apply_row_schema
+
+# Columns of the latest-row-per-country view shown in charts, the explorer and downloads
+LATEST_COLUMNS = [
+    'country', 'date', 'total_vaccinations', 'daily_vaccinations', 'people_vaccinated',
+    'people_fully_vaccinated', 'population_millions', 'vaccination_rate'
+]
+
+
+def build_country_summary(df, countries):
+    """One row per country: its latest values, in ROW_SCHEMA dtypes, plus max/mean aggregates over all dates"""
+    grouped = df.groupby('country', sort=True, observed=True)
+
+    summary = grouped.last()
+    summary.index = summary.index.astype(str)
+    summary = summary.join(countries)
+    summary['max_total_vaccinations'] = grouped['total_vaccinations'].max()
+    summary['max_people_vaccinated'] = grouped['people_vaccinated'].max()
+    summary['max_vaccination_rate'] = grouped['vaccination_rate'].max()
+    summary['mean_daily_vaccinations'] = grouped['daily_vaccinations'].mean()
+    # Days the mean is over (it skips missing values), so merged means can be weighted
+    summary['daily_vaccinations_reported'] = grouped['daily_vaccinations'].count()
+    summary['first_date'] = grouped['date'].min()
+    summary['last_date'] = grouped['date'].max()
+    summary['days_reported'] = grouped.size()
+
+    # Plain string keys: the table is small and is handed straight to charts and widgets
+    return apply_row_schema(summary.rename_axis('country').reset_index())
+
+
+def merge_country_summaries(old, new, countries):
+    """Fold the summary of newly appended rows into an existing summary.
+
+    Assumes every row behind `new` is later than the rows behind `old` for the
+    same country, which is what incremental ingestion guarantees. The daily
+    mean is weighted by the number of days with a daily value on each side.
+    """
+    if old is None or old.empty:
+        return new
+    if 'daily_vaccinations_reported' not in old.columns:
+        # Summaries stored before the count was kept; every row is the best available weight
+        old = old.assign(daily_vaccinations_reported=old['days_reported'])
+    old = old.set_index('country')
+    new = new.set_index('country')
+    both = old.index.intersection(new.index)
+
+    # Latest values: take the new row's value unless it is missing
+    merged = new.combine_first(old)
+    o, n = old.loc[both], new.loc[both]
+    for col in ['max_total_vaccinations', 'max_people_vaccinated', 'max_vaccination_rate']:
+        merged.loc[both, col] = np.fmax(o[col], n[col])
+    merged.loc[both, 'first_date'] = o['first_date'].where(o['first_date'] <= n['first_date'], n['first_date'])
+    merged.loc[both, 'last_date'] = n['last_date'].where(n['last_date'] >= o['last_date'], o['last_date'])
+
+    reported = o['daily_vaccinations_reported'] + n['daily_vaccinations_reported']
+    merged.loc[both, 'mean_daily_vaccinations'] = ((
+        o['mean_daily_vaccinations'].fillna(0) * o['daily_vaccinations_reported']
+        + n['mean_daily_vaccinations'].fillna(0) * n['daily_vaccinations_reported']
+    ) / reported).where(reported > 0)
+    merged.loc[both, 'daily_vaccinations_reported'] = reported
+    merged.loc[both, 'days_reported'] = o['days_reported'] + n['days_reported']
+
+    merged['population_millions'] = countries['population_millions'].reindex(merged.index)
+    return apply_row_schema(merged.sort_index().rename_axis('country').reset_index()[new.reset_index().columns])
+
+
+def build_global_metrics(summary):
+    """Numbers for the GLOBAL VACCINATION OVERVIEW cards, derived from the summary table"""
+    if summary.empty:
+        return {'total_countries': 0, 'global_total': 0, 'avg_rate': 0.0, 'days_covered': 0}
+    return {
+        'total_countries': len(summary),
+        'global_total': summary['max_total_vaccinations'].sum(),
+        'avg_rate': summary['max_vaccination_rate'].mean(),
+        'days_covered': (summary['last_date'].max() - summary['first_date'].min()).days
+    }
+
+
+def top_countries(latest, metric, n):
+    """The n rows of the latest-per-country table with the highest value of metric"""
+    return latest.nlargest(n, metric)
+
+
+def build_summary(df, countries):
+    """Build the summary table and global metrics together, once per dataset version"""
+    summary = build_country_summary(df, countries)
+    return summary, build_global_metrics(summary)
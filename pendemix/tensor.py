@@ -0,0 +1,79 @@
+# PendemixAI - Dense country x date x metric array for comparisons and trends
+import numpy as np
+import pandas as pd
+
+TENSOR_METRICS = [
+    'total_vaccinations', 'daily_vaccinations', 'people_vaccinated',
+    'people_fully_vaccinated', 'vaccination_rate'
+]
+
+
+class VaccinationTensor:
+    """Every metric for every (country, date) pair in one float64 array, NaN for gaps.
+
+    Country comparisons and trends become array slices and cross-country
+    aggregates are vectorized reductions; long-form DataFrames are only built
+    for plotting via to_long().
+    """
+
+    def __init__(self, values, countries, dates, metrics):
+        self.values = values
+        self.countries = list(countries)
+        self.dates = pd.DatetimeIndex(dates)
+        self.metrics = list(metrics)
+        self._country_pos = {country: i for i, country in enumerate(self.countries)}
+        self._metric_pos = {metric: k for k, metric in enumerate(self.metrics)}
+
+    @classmethod
+    def from_frame(cls, df, metrics=TENSOR_METRICS):
+        """Scatter a frame with a categorical country column into the dense array"""
+        countries = df['country'].cat.categories
+        codes = df['country'].cat.codes.to_numpy()
+
+        if len(df):
+            dates = pd.date_range(df['date'].min(), df['date'].max(), freq='D')
+        else:
+            dates = pd.DatetimeIndex([])
+        day = ((df['date'].to_numpy() - dates.values[:1]) // np.timedelta64(1, 'D')).astype(np.int64)
+
+        values = np.full((len(countries), len(dates), len(metrics)), np.nan)
+        for k, metric in enumerate(metrics):
+            values[codes, day, k] = df[metric].to_numpy()
+        values.flags.writeable = False
+        return cls(values, countries, dates, metrics)
+
+    def _country_ids(self, countries):
+        return np.array([self._country_pos[c] for c in dict.fromkeys(countries) if c in self._country_pos], dtype=np.int64)
+
+    def series(self, countries, metric):
+        """(countries, dates) array of one metric; unknown countries are skipped, repeated ones taken once"""
+        return self.values[self._country_ids(countries), :, self._metric_pos[metric]]
+
+    def aggregate(self, metric, how='sum', countries=None):
+        """Reduce one metric across countries for every date, ignoring gaps"""
+        if countries is None:
+            block = self.values[:, :, self._metric_pos[metric]]
+        else:
+            block = self.series(countries, metric)
+        reducers = {'sum': np.nansum, 'mean': np.nanmean, 'max': np.nanmax, 'min': np.nanmin}
+        with np.errstate(all='ignore'):
+            return pd.Series(reducers[how](block, axis=0), index=self.dates, name=metric)
+
+    def to_long(self, countries, metrics=None):
+        """Long-form (country, date, metrics...) frame for plotting, skipping all-NaN days"""
+        metrics = metrics or self.metrics
+        ids = self._country_ids(countries)
+        block = self.values[ids][:, :, [self._metric_pos[m] for m in metrics]]
+
+        country_i, date_i = np.nonzero(~np.isnan(block).all(axis=2))
+        long_data = pd.DataFrame({
+            'country': np.array(self.countries, dtype=object)[ids][country_i],
+            'date': self.dates.values[date_i]
+        })
+        for k, metric in enumerate(metrics):
+            long_data[metric] = block[country_i, date_i, k]
+        return long_data
+
+    @property
+    def nbytes(self):
+        return self.values.nbytes
@@ -0,0 +1,47 @@
+# PendemixAI - Derived structures built once per dataset version
+from collections import namedtuple
+
+from pendemix.country_index import CountryIndex
+from pendemix.lineage import DataFingerprint
+from pendemix.pyramid import TimePyramid
+from pendemix.regions import RegionRollup
+from pendemix.summary import build_global_metrics, build_summary
+from pendemix.tensor import VaccinationTensor
+from pendemix.window import WindowEngine
+
+DatasetViews = namedtuple('DatasetViews', [
+    'summary', 'global_metrics', 'country_index', 'tensor', 'windows', 'regions', 'pyramid', 'fingerprint'
+])
+
+
+def build_dataset_views(df, country_table, summary=None, previous=None):
+    """Summary table, metric-card numbers, country offsets, the dense tensor, its prefix sums,
+    the regional rollup, the weekly/monthly pyramid and the content fingerprint.
+
+    Pass a stored summary (e.g. maintained by ingestion) to skip rebuilding it, and
+    the previous version's views to update the regional rollup incrementally.
+    """
+    if summary is None:
+        summary, global_metrics = build_summary(df, country_table)
+    else:
+        global_metrics = build_global_metrics(summary)
+    tensor = VaccinationTensor.from_frame(df)
+    windows = WindowEngine.from_tensor(tensor)
+    population = country_table['population_millions']
+    fingerprint = DataFingerprint.from_frames(df, country_table)
+    if previous is None:
+        regions = RegionRollup.build(windows, population)
+    else:
+        # Only countries whose content hash changed are moved in the rollup
+        changed = previous.fingerprint.diff(fingerprint).countries
+        regions = previous.regions.updated(previous.windows, windows, population, changed)
+    return DatasetViews(
+        summary=summary,
+        global_metrics=global_metrics,
+        country_index=CountryIndex.from_frame(df),
+        tensor=tensor,
+        windows=windows,
+        regions=regions,
+        pyramid=TimePyramid.from_tensor(tensor),
+        fingerprint=fingerprint
+    )
@@ -0,0 +1,143 @@
+# PendemixAI - Prefix-sum window engine for date-range totals, averages and growth
+import numpy as np
+import pandas as pd
+
+
+class WindowEngine:
+    """Per-country prefix sums over the tensor's date axis.
+
+    sums[c, t, k] holds the sum of metric k for country c over the first t
+    dates (gaps count as 0) and counts[c, t, k] how many of those dates
+    were reported, so the total or mean over any date window is two lookups
+    per country. carried[c, t, k] is the last reported value up to date t,
+    which gives the level of a cumulative metric at either end of a window.
+    """
+
+    def __init__(self, sums, counts, carried, countries, dates, metrics):
+        self.sums = sums
+        self.counts = counts
+        self.carried = carried
+        self.countries = list(countries)
+        self.dates = pd.DatetimeIndex(dates)
+        self.metrics = list(metrics)
+        self._country_pos = {country: i for i, country in enumerate(self.countries)}
+        self._metric_pos = {metric: k for k, metric in enumerate(self.metrics)}
+
+    @classmethod
+    def from_tensor(cls, tensor):
+        values = tensor.values
+        reported = ~np.isnan(values)
+        n_countries, n_dates, n_metrics = values.shape
+
+        sums = np.zeros((n_countries, n_dates + 1, n_metrics))
+        np.cumsum(np.where(reported, values, 0.0), axis=1, out=sums[:, 1:])
+        counts = np.zeros((n_countries, n_dates + 1, n_metrics), dtype=np.int32)
+        np.cumsum(reported, axis=1, out=counts[:, 1:])
+
+        # Forward fill: index of the last reported date at or before each date
+        last = np.where(reported, np.arange(n_dates)[None, :, None], -1)
+        np.maximum.accumulate(last, axis=1, out=last)
+        carried = np.take_along_axis(values, np.maximum(last, 0), axis=1)
+        carried[last < 0] = np.nan
+
+        for array in (sums, counts, carried):
+            array.flags.writeable = False
+        return cls(sums, counts, carried, tensor.countries, tensor.dates, tensor.metrics)
+
+    def span(self, start=None, end=None):
+        """Prefix positions (i, j) so that dates[i:j] is the window [start, end]"""
+        i = 0 if start is None else self.dates.searchsorted(pd.Timestamp(start), side='left')
+        j = len(self.dates) if end is None else self.dates.searchsorted(pd.Timestamp(end), side='right')
+        return i, max(i, j)
+
+    def is_full(self, start=None, end=None):
+        return self.span(start, end) == (0, len(self.dates))
+
+    def _rows(self, countries):
+        if countries is None:
+            return np.arange(len(self.countries)), self.countries
+        ids = [self._country_pos[c] for c in countries if c in self._country_pos]
+        return np.array(ids, dtype=np.int64), [self.countries[i] for i in ids]
+
+    def _series(self, values, names, metric):
+        return pd.Series(values, index=pd.Index(names, name='country'), name=metric)
+
+    def total(self, metric, start=None, end=None, countries=None):
+        """Sum of metric over the window, per country"""
+        i, j = self.span(start, end)
+        rows, names = self._rows(countries)
+        k = self._metric_pos[metric]
+        return self._series(self.sums[rows, j, k] - self.sums[rows, i, k], names, metric)
+
+    def reported(self, metric, start=None, end=None, countries=None):
+        """Number of reported dates in the window, per country"""
+        i, j = self.span(start, end)
+        rows, names = self._rows(countries)
+        k = self._metric_pos[metric]
+        return self._series(self.counts[rows, j, k] - self.counts[rows, i, k], names, metric)
+
+    def mean(self, metric, start=None, end=None, countries=None):
+        """Mean of metric over the reported dates in the window, NaN where none were reported"""
+        total = self.total(metric, start, end, countries)
+        days = self.reported(metric, start, end, countries)
+        return total / days.where(days > 0)
+
+    def _level_at(self, metric, t, countries):
+        rows, names = self._rows(countries)
+        if t < 0:
+            return self._series(np.full(len(rows), np.nan), names, metric)
+        return self._series(self.carried[rows, t, self._metric_pos[metric]], names, metric)
+
+    def level(self, metric, end=None, countries=None):
+        """Last reported value at or before end, per country"""
+        return self._level_at(metric, self.span(end=end)[1] - 1, countries)
+
+    def growth(self, metric, start=None, end=None, countries=None):
+        """Change of a cumulative metric across the window, per country"""
+        i, j = self.span(start, end)
+        closing = self._level_at(metric, j - 1, countries)
+        opening = self._level_at(metric, i - 1, countries)
+        return closing - opening.fillna(0)
+
+    def rolling_mean(self, country, metric, days):
+        """Trailing `days`-day mean of one country's metric for every date, over reported dates"""
+        row, k = self._country_pos[country], self._metric_pos[metric]
+        sums, counts = self.sums[row, :, k], self.counts[row, :, k]
+        lagged = np.maximum(np.arange(1, len(self.dates) + 1) - days, 0)
+        window_sum = sums[1:] - sums[lagged]
+        window_days = counts[1:] - counts[lagged]
+        with np.errstate(all='ignore'):
+            values = np.where(window_days > 0, window_sum / window_days, np.nan)
+        return pd.Series(values, index=self.dates, name=metric)
+
+    def window_table(self, start=None, end=None, countries=None):
+        """Per-country window figures in the latest_data layout, for rankings and cards.
+
+        total_vaccinations is the growth within the window, daily_vaccinations
+        the mean daily count, and the other metrics their level at the window end.
+        """
+        table = pd.DataFrame({
+            'total_vaccinations': self.growth('total_vaccinations', start, end, countries),
+            'daily_vaccinations': self.mean('daily_vaccinations', start, end, countries),
+            'people_vaccinated': self.level('people_vaccinated', end, countries),
+            'people_fully_vaccinated': self.level('people_fully_vaccinated', end, countries),
+            'vaccination_rate': self.level('vaccination_rate', end, countries),
+            'days_reported': self.reported('total_vaccinations', start, end, countries)
+        })
+        return table[table['days_reported'] > 0].reset_index()
+
+    def window_metrics(self, start=None, end=None):
+        """GLOBAL VACCINATION OVERVIEW numbers for a date window"""
+        table = self.window_table(start, end)
+        i, j = self.span(start, end)
+        return {
+            'total_countries': len(table),
+            'global_total': table['total_vaccinations'].sum(),
+            'avg_rate': table['vaccination_rate'].mean() if len(table) else 0.0,
+            'days_covered': max(0, j - i - 1),
+            'avg_daily': self.total('daily_vaccinations', start, end).sum() / max(1, j - i)
+        }
+
+    @property
+    def nbytes(self):
+        return self.sums.nbytes + self.counts.nbytes + self.carried.nbytes
@@ -0,0 +1,21 @@
+# PendemixAI - Shared test helpers
+import pandas as pd
+import pytest
+
+
+def _write_feed(path, dates, location='France', start_total=1000):
+    """Write a small OWID-style feed for one location, one row per date"""
+    totals = [start_total + 100 * i for i in range(len(dates))]
+    pd.DataFrame({
+        'location': location,
+        'iso_code': 'FRA',
+        'date': dates,
+        'total_vaccinations': totals,
+        'daily_vaccinations': 100,
+        'total_vaccinations_per_hundred': [t / 680_000 for t in totals]
+    }).to_csv(path, index=False)
+
+
+@pytest.fixture
+def write_feed():
+    return _write_feed
@@ -0,0 +1,43 @@
+# PendemixAI - LTTB downsampling of chart series
+import numpy as np
+import pandas as pd
+import pytest
+
+from pendemix.downsample import downsample_frame, lttb_indices
+
+
+@pytest.mark.parametrize('n, n_out', [(1000, 100), (1000, 3), (101, 50), (10, 9)])
+def test_keeps_endpoints_and_returns_the_requested_count(n, n_out):
+    x = np.arange(n, dtype=np.float64)
+    y = np.sin(x / 17) * 100 + x
+
+    kept = lttb_indices(x, y, n_out)
+    assert len(kept) == n_out
+    assert kept[0] == 0 and kept[-1] == n - 1
+    assert np.all(np.diff(kept) > 0)
+
+
+def test_short_series_are_returned_whole():
+    x = np.arange(20)
+    assert list(lttb_indices(x, x, 50)) == list(range(20))
+    assert list(lttb_indices(x, x, 2)) == list(range(20))
+
+
+def test_a_spike_survives():
+    y = np.zeros(1000)
+    y[437] = 50
+    assert 437 in lttb_indices(np.arange(1000), y, 40)
+
+
+def test_downsample_frame_budgets_each_country():
+    dates = pd.date_range('2021-01-01', periods=300, freq='D')
+    frame = pd.concat([
+        pd.DataFrame({'country': country, 'date': dates, 'total_vaccinations': np.arange(300) * scale})
+        for country, scale in [('FRANCE', 1.0), ('CHILE', 2.0)]
+    ])
+
+    sampled, raw_points = downsample_frame(frame, 'date', 'total_vaccinations', 60, group='country')
+    assert raw_points == 600
+    assert sampled.groupby('country')['date'].agg(['count', 'min', 'max']).to_dict('list') == {
+        'count': [60, 60], 'min': [dates[0]] * 2, 'max': [dates[-1]] * 2
+    }
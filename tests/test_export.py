@@ -0,0 +1,21 @@
+# PendemixAI - Chunked download exports
+import pandas as pd
+import pytest
+
+from pendemix.export import iter_export_chunks, write_export
+from pendemix.storage import load_dataset
+
+
+@pytest.mark.parametrize('export_format, read', [
+    ('CSV', pd.read_csv),
+    ('CSV (GZIP)', pd.read_csv),
+    ('PARQUET', pd.read_parquet)
+])
+def test_empty_selection_still_has_a_header(tmp_path, export_format, read):
+    rows, country_table = load_dataset(n_countries=2, days_per_country=10, cache_dir=str(tmp_path))
+    path = str(tmp_path / 'export')
+    write_export(iter_export_chunks(rows.iloc[:0], country_table), path, export_format)
+
+    exported = read(path, compression='gzip') if export_format == 'CSV (GZIP)' else read(path)
+    assert exported.empty
+    assert list(exported.columns) == list(next(iter_export_chunks(rows, country_table)).columns)
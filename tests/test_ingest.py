@@ -0,0 +1,81 @@
+# PendemixAI - Incremental ingestion of dropped CSV feeds
+import os
+
+import pandas as pd
+
+from pendemix.ingest import IngestStore
+from pendemix.summary import build_country_summary
+
+
+def test_bad_file_is_rejected_and_the_rest_ingested(tmp_path, write_feed):
+    drop_dir, store = tmp_path / 'in', IngestStore(str(tmp_path / 'store'))
+    drop_dir.mkdir()
+    # Sorts before the good file, so a failure must not stop the run
+    pd.DataFrame({'country': ['FRANCE'], 'day': ['2021-01-01']}).to_csv(drop_dir / 'a_bad.csv', index=False)
+    write_feed(drop_dir / 'b_good.csv', ['2021-01-01', '2021-01-02'])
+
+    assert store.ingest_directory(str(drop_dir)) == {'b_good.csv': 2}
+    rejected = store.rejected_files()
+    assert list(rejected) == ['a_bad.csv']
+    assert 'missing columns' in rejected['a_bad.csv']
+    # Skipped until it changes
+    assert store.pending_files(str(drop_dir)) == ()
+
+    write_feed(drop_dir / 'a_bad.csv', ['2021-01-01'], location='Germany')
+    assert store.ingest_directory(str(drop_dir)) == {'a_bad.csv': 1}
+    assert store.rejected_files() == {}
+    assert sorted(store.load()[0]['country'].astype(str).unique()) == ['FRANCE', 'GERMANY']
+
+
+def test_run_interrupted_before_the_state_commit_loses_no_rows(tmp_path, monkeypatch, write_feed):
+    store = IngestStore(str(tmp_path / 'store'))
+    write_feed(tmp_path / 'first.csv', ['2021-01-01', '2021-01-02'])
+    write_feed(tmp_path / 'second.csv', ['2021-01-03', '2021-01-04'], start_total=2000)
+    store.ingest_file(str(tmp_path / 'first.csv'))
+
+    def crash(state):
+        raise KeyboardInterrupt
+    # Segment, countries and summary are written, state.json is not
+    with monkeypatch.context() as patch:
+        patch.setattr(store, '_write_state', crash)
+        try:
+            store.ingest_file(str(tmp_path / 'second.csv'))
+        except KeyboardInterrupt:
+            pass
+    assert len(store.load()[0]) == 2
+    assert store.watermarks()['FRANCE'] == pd.Timestamp('2021-01-02')
+
+    assert store.ingest_file(str(tmp_path / 'second.csv')) == 2
+    rows, _, summary = store.load()
+    assert list(rows['date'].dt.day) == [1, 2, 3, 4]
+    assert summary['days_reported'].tolist() == [4]
+    assert sorted(name for name in os.listdir(store.directory) if name.startswith('summary')) == [
+        'summary_000001.feather', 'summary_000002.feather'
+    ]
+
+
+def test_overlapping_feed_only_adds_newer_rows(tmp_path, write_feed):
+    store = IngestStore(str(tmp_path / 'store'))
+    write_feed(tmp_path / 'early.csv', ['2021-01-01', '2021-01-02', '2021-01-03'])
+    # Overlaps two stored days, with different (revised) values for them
+    write_feed(tmp_path / 'late.csv', ['2021-01-02', '2021-01-03', '2021-01-04', '2021-01-05'], start_total=5000)
+
+    assert store.ingest_file(str(tmp_path / 'early.csv')) == 3
+    assert store.ingest_file(str(tmp_path / 'late.csv')) == 2
+    rows, country_table, summary = store.load()
+    assert list(rows['date'].dt.day) == [1, 2, 3, 4, 5]
+    assert list(rows['total_vaccinations']) == [1000, 1100, 1200, 5200, 5300]
+
+    # The incrementally merged summary matches one built from every stored row
+    columns = ['country', 'total_vaccinations', 'max_total_vaccinations', 'mean_daily_vaccinations',
+               'first_date', 'last_date', 'days_reported']
+    pd.testing.assert_frame_equal(summary[columns], build_country_summary(rows, country_table)[columns],
+                                  check_dtype=False)
+    assert summary['days_reported'].tolist() == [5]
+    assert summary['last_date'].tolist() == [pd.Timestamp('2021-01-05')]
+    assert summary['total_vaccinations'].tolist() == [5300]
+    assert summary['max_total_vaccinations'].tolist() == [5300]
+
+    version = store.version
+    assert store.ingest_file(str(tmp_path / 'late.csv')) == 0
+    assert store.version == version
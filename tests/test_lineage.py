@@ -0,0 +1,53 @@
+# PendemixAI - Content fingerprints and selective invalidation of derived artifacts
+import pytest
+
+from pendemix.lineage import ArtifactRegistry, DataFingerprint
+from pendemix.storage import load_dataset
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    return load_dataset(n_countries=6, days_per_country=30, cache_dir=str(tmp_path))
+
+
+def edit(rows, country, column):
+    """Copy of rows with one value of one country's column changed"""
+    rows = rows.copy()
+    at = rows.index[rows['country'] == country][-1]
+    rows.loc[at, column] = rows.loc[at, column] + 1
+    return rows
+
+
+def test_diff_reports_only_the_edited_cell(dataset):
+    rows, country_table = dataset
+    country = rows['country'].cat.categories[2]
+    before = DataFingerprint.from_frames(rows, country_table)
+    after = DataFingerprint.from_frames(edit(rows, country, 'daily_vaccinations'), country_table)
+
+    change = before.diff(after)
+    assert change.countries == {country}
+    assert change.columns == {'daily_vaccinations'}
+    assert not change.calendar
+    assert before.version != after.version
+    assert before.diff(DataFingerprint.from_frames(rows, country_table)).countries == frozenset()
+
+
+def test_advance_returns_only_artifacts_that_read_the_edit(dataset):
+    rows, country_table = dataset
+    countries = list(rows['country'].cat.categories)
+    edited, other = countries[2], countries[3]
+    before = DataFingerprint.from_frames(rows, country_table)
+    after = DataFingerprint.from_frames(edit(rows, edited, 'daily_vaccinations'), country_table)
+
+    registry = ArtifactRegistry(before)
+    daily = registry.cache_key(('daily', edited), before, [edited], ['daily_vaccinations'])
+    trend = registry.cache_key(('trend', edited), before, [edited], ['total_vaccinations'])
+    other_daily = registry.cache_key(('daily', other), before, [other], ['daily_vaccinations'])
+    everything = registry.cache_key(('export',), before)
+
+    stale = registry.advance(after)
+    assert sorted(stale) == sorted([daily, everything])
+    assert trend not in stale and other_daily not in stale
+    # Unchanged inputs keep their key under the new version
+    assert registry.cache_key(('trend', edited), after, [edited], ['total_vaccinations']) == trend
+    assert registry.status()['stale'].sum() == 2
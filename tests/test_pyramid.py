@@ -0,0 +1,60 @@
+# PendemixAI - Weekly and monthly windows that cut through bins
+import numpy as np
+import pandas as pd
+
+from pendemix.pyramid import TimePyramid
+from pendemix.tensor import VaccinationTensor
+
+METRICS = ['total_vaccinations', 'daily_vaccinations', 'vaccination_rate']
+
+
+def make_pyramid():
+    dates = pd.date_range('2021-01-01', '2021-06-30', freq='D')
+    daily = np.arange(1, len(dates) + 1, dtype=np.float64) * 1000
+    values = np.stack([np.cumsum(daily), daily, np.linspace(0, 50, len(dates))], axis=1)[None]
+    values[0, 40:45] = np.nan
+    return TimePyramid.from_tensor(VaccinationTensor(values, ['FRANCE'], dates, METRICS)), values[0], dates
+
+
+def in_window(values, dates, start, end):
+    inside = (dates >= start) & (dates <= end)
+    return values[inside], dates[inside]
+
+
+def test_monthly_window_off_bin_boundaries_counts_only_in_window_days():
+    pyramid, values, dates = make_pyramid()
+    start, end = pd.Timestamp('2021-02-10'), pd.Timestamp('2021-04-01')
+    frame = pyramid.to_long('MONTHLY', ['FRANCE'], METRICS, start, end)
+    days, day_dates = in_window(values, dates, start, end)
+
+    assert list(frame['date']) == [start, pd.Timestamp('2021-03-01'), end]
+    assert frame['daily_vaccinations'].sum() == np.nansum(days[:, 1])
+    # The last point carries the window's last total, not the end of April's
+    assert frame['total_vaccinations'].iloc[-1] == days[-1, 0]
+    assert frame['daily_vaccinations'].iloc[-1] == days[-1, 1]
+    feb = days[day_dates.month == 2]
+    assert np.isclose(frame['vaccination_rate'].iloc[0], np.nanmean(feb[:, 2]))
+
+
+def test_weekly_window_inside_one_bin():
+    pyramid, values, dates = make_pyramid()
+    start, end = pd.Timestamp('2021-03-02'), pd.Timestamp('2021-03-04')
+    frame = pyramid.to_long('WEEKLY', ['FRANCE'], ['daily_vaccinations'], start, end)
+    days, _ = in_window(values, dates, start, end)
+
+    assert list(frame['date']) == [start]
+    assert frame['daily_vaccinations'].iloc[0] == days[:, 1].sum()
+
+
+def test_window_on_bin_boundaries_matches_the_level():
+    pyramid, _, _ = make_pyramid()
+    frame = pyramid.to_long('MONTHLY', ['FRANCE'], METRICS, '2021-02-01', '2021-04-30')
+    level = pyramid.levels['MONTHLY'].to_long(['FRANCE'], METRICS)
+
+    expected = level[level['date'].between('2021-02-01', '2021-04-01')].reset_index(drop=True)
+    pd.testing.assert_frame_equal(frame, expected)
+
+
+def test_window_outside_the_data_is_empty():
+    pyramid, _, _ = make_pyramid()
+    assert pyramid.to_long('WEEKLY', ['FRANCE'], METRICS, '2022-01-01', '2022-02-01').empty
@@ -0,0 +1,33 @@
+# PendemixAI - The DuckDB query backend answers exactly like the pandas one
+import pytest
+
+from pendemix.ingest import IngestStore
+from pendemix.query import cross_check, make_backend
+from pendemix.storage import load_dataset
+
+pytest.importorskip('duckdb')
+
+
+def test_duckdb_matches_pandas_on_generated_data(tmp_path):
+    rows, country_table = load_dataset(n_countries=12, days_per_country=200, cache_dir=str(tmp_path))
+    pandas_backend = make_backend('pandas', rows, country_table)
+    duckdb_backend = make_backend('duckdb', rows, country_table, threads=2)
+
+    assert cross_check(pandas_backend, duckdb_backend, n=5) == []
+
+
+def test_duckdb_matches_pandas_on_ingested_data_with_gaps(tmp_path, write_feed):
+    # Ingested counters with gaps stay float64 while the stored summary is compact
+    write_feed(tmp_path / 'france.csv', ['2021-03-01', '2021-03-02', '2021-03-03'])
+    write_feed(tmp_path / 'chile.csv', ['2021-03-01', '2021-03-02'], location='Chile', start_total=5000)
+    text = (tmp_path / 'chile.csv').read_text().replace(',100,', ',,')
+    (tmp_path / 'chile.csv').write_text(text)
+    store = IngestStore(str(tmp_path / 'store'))
+    for name in ('france.csv', 'chile.csv'):
+        store.ingest_file(str(tmp_path / name))
+
+    rows, country_table, summary = store.load()
+    pandas_backend = make_backend('pandas', rows, country_table, summary)
+    duckdb_backend = make_backend('duckdb', rows, country_table)
+
+    assert cross_check(pandas_backend, duckdb_backend, n=2) == []
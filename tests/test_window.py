@@ -0,0 +1,53 @@
+# PendemixAI - Date-window queries from per-country prefix sums
+import numpy as np
+import pandas as pd
+import pytest
+
+from pendemix.storage import load_dataset
+from pendemix.tensor import VaccinationTensor
+from pendemix.window import WindowEngine
+
+
+@pytest.fixture
+def daily(tmp_path):
+    """Daily metrics per country with a few unreported days, and the engine built from them"""
+    rows, _ = load_dataset(n_countries=5, days_per_country=60, cache_dir=str(tmp_path))
+    rows = rows.astype({'daily_vaccinations': np.float64, 'total_vaccinations': np.float64})
+    gaps = rows.sample(frac=0.1, random_state=3).index
+    rows.loc[gaps, ['daily_vaccinations', 'total_vaccinations']] = np.nan
+    engine = WindowEngine.from_tensor(VaccinationTensor.from_frame(rows))
+    return rows, engine
+
+
+def assert_per_country(actual, expected, **kwargs):
+    expected = expected.set_axis(expected.index.astype(str))
+    pd.testing.assert_series_equal(actual, expected, check_names=False, **kwargs)
+
+
+def test_window_totals_and_means_match_a_naive_filter(daily):
+    rows, engine = daily
+    start, end = pd.Timestamp('2021-01-10'), pd.Timestamp('2021-02-05')
+    inside = rows[rows['date'].between(start, end)].groupby('country', observed=True)['daily_vaccinations']
+
+    assert_per_country(engine.total('daily_vaccinations', start, end), inside.sum())
+    assert_per_country(engine.mean('daily_vaccinations', start, end), inside.mean())
+    assert_per_country(engine.reported('daily_vaccinations', start, end), inside.count(), check_dtype=False)
+
+
+@pytest.mark.parametrize('days', [1, 7, 14])
+def test_rolling_mean_matches_pandas_rolling(daily, days):
+    rows, engine = daily
+    for country in engine.countries:
+        series = rows[rows['country'] == country].set_index('date')['daily_vaccinations']
+        series = series.reindex(engine.dates)
+        expected = series.rolling(days, min_periods=1).mean()
+        pd.testing.assert_series_equal(engine.rolling_mean(country, 'daily_vaccinations', days), expected,
+                                       check_names=False, check_freq=False)
+
+
+def test_level_carries_the_last_reported_value(daily):
+    rows, engine = daily
+    end = pd.Timestamp('2021-02-01')
+    expected = (rows[rows['date'] <= end].dropna(subset=['total_vaccinations'])
+                .groupby('country', observed=True)['total_vaccinations'].last())
+    assert_per_country(engine.level('total_vaccinations', end), expected)